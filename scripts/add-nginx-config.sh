@@ -18,9 +18,15 @@ CONFIG_BLOCK='    location /sapiens/ {
         alias /var/www/html/sapiens/;
         try_files $uri $uri/ /sapiens/index.html;
         
-        location ~* \.(js|css|png|jpg|jpeg|gif|ico|svg|woff|woff2|ttf|eot|webp|json)$ {
+        # Файлы с хешем содержимого в имени: сборка Vite, изображения меню, шарды
+        location ~* "(/assets/.+|\.[0-9a-f]{12}(-[0-9]+)?\.(jpg|jpeg|png|webp)|/(details|search)-[0-9a-f]{10}\.json)$" {
             expires 1y;
-            add_header Cache-Control "public, immutable";
+            add_header Cache-Control "public, max-age=31536000, immutable";
+        }
+        
+        # menu.json, menu-index.json и изображения без хеша - с проверкой актуальности
+        location ~* \.(js|css|png|jpg|jpeg|gif|ico|svg|woff|woff2|ttf|eot|webp|json)$ {
+            add_header Cache-Control "no-cache";
         }
         
         location ~* \.html$ {
@@ -32,6 +38,10 @@ CONFIG_BLOCK='    location /sapiens/ {
 # Проверяем, есть ли уже конфигурация
 if run_ssh "grep -q 'location /sapiens/' $NGINX_CONFIG"; then
     echo "   ✓ Конфигурация /sapiens/ уже существует"
+    if ! run_ssh "grep -qF '[0-9a-f]{12}' $NGINX_CONFIG"; then
+        echo "   ⚠ В ней нет правила immutable для изображений с хешем в имени"
+        echo "     Обновите блок /sapiens/ через scripts/fix-nginx-config.sh"
+    fi
     exit 0
 fi
 
@@ -56,9 +66,13 @@ if grep -q 'root /var/www/landing' \"\$CONFIG_FILE\"; then
         alias /var/www/html/sapiens/;\
         try_files \$uri \$uri/ /sapiens/index.html;\
         \
-        location ~* \\.(js|css|png|jpg|jpeg|gif|ico|svg|woff|woff2|ttf|eot|webp|json)\$ {\
+        location ~* \"(/assets/.+|\\.[0-9a-f]{12}(-[0-9]+)?\\.(jpg|jpeg|png|webp)|/(details|search)-[0-9a-f]{10}\\.json)\$\" {\
             expires 1y;\
-            add_header Cache-Control \"public, immutable\";\
+            add_header Cache-Control \"public, max-age=31536000, immutable\";\
+        }\
+        \
+        location ~* \\.(js|css|png|jpg|jpeg|gif|ico|svg|woff|woff2|ttf|eot|webp|json)\$ {\
+            add_header Cache-Control \"no-cache\";\
         }\
         \
         location ~* \\.html\$ {\
@@ -78,9 +92,13 @@ else
         alias /var/www/html/sapiens/;\\
         try_files \\\$uri \\\$uri/ /sapiens/index.html;\\
         \\
-        location ~* \\\\.(js|css|png|jpg|jpeg|gif|ico|svg|woff|woff2|ttf|eot|webp|json)\\\$ {\\
+        location ~* \\\"(/assets/.+|\\\\.[0-9a-f]{12}(-[0-9]+)?\\\\.(jpg|jpeg|png|webp)|/(details|search)-[0-9a-f]{10}\\\\.json)\\\$\\\" {\\
             expires 1y;\\
-            add_header Cache-Control \\\"public, immutable\\\";\\
+            add_header Cache-Control \\\"public, max-age=31536000, immutable\\\";\\
+        }\\
+        \\
+        location ~* \\\\.(js|css|png|jpg|jpeg|gif|ico|svg|woff|woff2|ttf|eot|webp|json)\\\$ {\\
+            add_header Cache-Control \\\"no-cache\\\";\\
         }\\
         \\
         location ~* \\\\.html\\\$ {\\
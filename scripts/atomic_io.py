@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Атомарная запись файлов: данные пишутся во временный файл в целевой
+директории и переименовываются на место только после успешной записи.
+Прерванный процесс не оставляет наполовину записанных файлов.
+
+Число записанных файлов и байт учитывается в счетчиках instrumentation.py.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from instrumentation import count
+
+# mkstemp создает файлы с правами 0600, а раздавать их будет nginx
+_umask = os.umask(0)
+os.umask(_umask)
+FILE_MODE = 0o666 & ~_umask
+
+
+@contextmanager
+def atomic_open(path, mode='wb', fsync=False, **kwargs):
+    """Открывает временный файл рядом с path и атомарно заменяет path при выходе"""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.chmod(tmp_path, FILE_MODE)
+        count('files_written')
+        count('bytes_written', os.path.getsize(tmp_path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
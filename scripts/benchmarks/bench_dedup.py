@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк поиска почти одинаковых фото: multi-index hashing против перебора пар
+
+Генерирует случайные 64-битные перцептивные хеши, к каждому десятому
+добавляет почти-копию (до --max-bits измененных бит) и ищет группы
+повторов через duplicate_groups (image_dedup.py). Для размеров не больше
+--pairs-limit то же считается полным перебором пар, и результаты
+сравниваются. Хеши синтетические, Pillow не нужен.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from image_dedup import DEFAULT_THRESHOLD, HASH_BITS, duplicate_groups
+
+
+def synthetic_hashes(count, max_bits, seed=0):
+    """(ключ, хеш): count случайных хешей и почти-копия каждого десятого"""
+    rng = random.Random(seed)
+    hashes = [rng.getrandbits(HASH_BITS) for _ in range(count)]
+    for i in range(0, count, 10):
+        value = hashes[i]
+        for bit in rng.sample(range(HASH_BITS), rng.randint(0, max_bits)):
+            value ^= 1 << bit
+        hashes.append(value)
+    return list(enumerate(hashes))
+
+
+def all_pairs_groups(hashes, threshold):
+    """Те же группы полным перебором пар (для проверки)"""
+    parent = list(range(len(hashes)))
+
+    def root(key):
+        while parent[key] != key:
+            key = parent[key]
+        return key
+
+    for i, (_, a) in enumerate(hashes):
+        for j in range(i):
+            if (a ^ hashes[j][1]).bit_count() <= threshold:
+                parent[root(i)] = root(j)
+    groups = {}
+    for key, _ in hashes:
+        groups.setdefault(root(key), []).append(key)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000],
+                        help='число фото (без почти-копий)')
+    parser.add_argument('--threshold', type=int, default=DEFAULT_THRESHOLD,
+                        help='максимальное число различающихся бит')
+    parser.add_argument('--max-bits', type=int, default=DEFAULT_THRESHOLD,
+                        help='сколько бит меняется у почти-копии (не больше)')
+    parser.add_argument('--pairs-limit', type=int, default=5000,
+                        help='перебор пар только для размеров не больше этого')
+    args = parser.parse_args()
+
+    print(f"{'Фото':>10} {'Индекс, с':>10} {'Групп':>7} {'Перебор, с':>11}  Совпадает")
+    for size in args.sizes:
+        hashes = synthetic_hashes(size, args.max_bits)
+        start = time.perf_counter()
+        groups = duplicate_groups(hashes, args.threshold)
+        index_seconds = time.perf_counter() - start
+
+        pairs = '-'
+        same = '-'
+        if size <= args.pairs_limit:
+            start = time.perf_counter()
+            expected = all_pairs_groups(hashes, args.threshold)
+            pairs = f'{time.perf_counter() - start:.2f}'
+            same = 'да' if sorted(map(sorted, groups)) == sorted(map(sorted, expected)) else 'НЕТ'
+        print(f'{len(hashes):>10} {index_seconds:>10.2f} {len(groups):>7} {pairs:>11}  {same}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк памяти: блюда как dict (форма menu.json) против Dish на __slots__
+
+Для каждого размера каталога пишет синтетические блюда в JSON Lines и
+загружает их в отдельном процессе в каждом из представлений, сравнивая
+прирост пикового RSS и время. Для Dish заодно проверяется, что
+Dish.to_dict() возвращает исходный dict без потерь.
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from menu_core import Dish
+from synthetic import iter_menu_items
+
+BATCH_SIZE = 10000
+
+
+def iter_batches(path):
+    """Блюда из файла пачками (общие ключи внутри пачки, как у json.load целого меню)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        batch = []
+        for line in f:
+            batch.append(line)
+            if len(batch) == BATCH_SIZE:
+                yield json.loads('[' + ','.join(batch) + ']')
+                batch = []
+        if batch:
+            yield json.loads('[' + ','.join(batch) + ']')
+
+
+def peak_rss_mb():
+    # ru_maxrss в Linux - в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mode, path):
+    """Загружает каталог в одном представлении и печатает JSON с результатами"""
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    dishes = []
+    lossless = True
+    for batch in iter_batches(path):
+        if mode == 'dict':
+            dishes.extend(batch)
+        else:
+            for item in batch:
+                dish = Dish.from_dict(item)
+                if dish.to_dict() != item:
+                    lossless = False
+                dishes.append(dish)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        'count': len(dishes),
+        'rss_mb': peak_rss_mb() - baseline,
+        'seconds': elapsed,
+        'lossless': lossless,
+    }))
+
+
+def run_child(mode, path):
+    result = subprocess.run(
+        [sys.executable, __file__, '--child', mode, str(path)],
+        check=True, stdout=subprocess.PIPE, text=True)
+    return json.loads(result.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000],
+                        help='число блюд в каталоге')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = Path(tmp) / f'items-{size}.jsonl'
+            with open(path, 'w', encoding='utf-8') as f:
+                for item in iter_menu_items(size):
+                    f.write(json.dumps(item, ensure_ascii=False) + '\n')
+            print(f'{size} блюд ({path.stat().st_size / 1024 / 1024:.0f} МБ JSON):')
+
+            as_dict = run_child('dict', path)
+            as_dish = run_child('dish', path)
+            saved = 100 - as_dish['rss_mb'] * 100 / as_dict['rss_mb']
+            print(f"  dict   {as_dict['rss_mb']:8.1f} МБ  {as_dict['seconds']:6.2f} с")
+            print(f"  Dish   {as_dish['rss_mb']:8.1f} МБ  {as_dish['seconds']:6.2f} с  "
+                  f"экономия {saved:.0f}%  {'✓ без потерь' if as_dish['lossless'] else '✗ потери при to_dict'}")
+            path.unlink()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк rebuild-menu-from-zip.py --jobs N на синтетическом архиве
+
+Запускает скрипт отдельным процессом для каждого N, сравнивает время
+и проверяет, что menu.json не зависит от числа процессов.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic import write_photo_archive
+
+SCRIPT = Path(__file__).parent.parent / 'rebuild-menu-from-zip.py'
+
+
+def run_rebuild(zip_path, work_dir, jobs):
+    """Запускает перегенерацию и возвращает (время, содержимое menu.json)"""
+    menu_dir = work_dir / f'menu-{jobs}'
+    menu_json = work_dir / f'menu-{jobs}.json'
+    menu_dir.mkdir()
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, str(SCRIPT), '--zip', str(zip_path), '--menu-dir', str(menu_dir),
+         '--output', str(menu_json), '--jobs', str(jobs)],
+        check=True, stdout=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    return elapsed, menu_json.read_bytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--photos', type=int, default=3000, help='число фотографий в архиве')
+    parser.add_argument('--photo-size', type=int, default=128 * 1024, help='размер фотографии, байт')
+    parser.add_argument('--jobs', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}), help='значения N для сравнения')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        zip_path = work_dir / 'photos.zip'
+        print(f'Генерирую архив: {args.photos} фото по {args.photo_size // 1024} КБ...')
+        write_photo_archive(zip_path, args.photos, args.photo_size)
+        print(f'Размер архива: {zip_path.stat().st_size / 1024 / 1024:.1f} МБ')
+        print()
+
+        baseline_time = None
+        baseline_json = None
+        for jobs in args.jobs:
+            elapsed, menu_json = run_rebuild(zip_path, work_dir, jobs)
+            if baseline_time is None:
+                baseline_time, baseline_json = elapsed, menu_json
+            same = '✓' if menu_json == baseline_json else '✗ menu.json отличается'
+            print(f'  --jobs {jobs:<3} {elapsed:7.2f} с  ускорение x{baseline_time / elapsed:.2f}  {same}')
+
+
+if __name__ == '__main__':
+    main()
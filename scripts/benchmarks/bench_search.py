@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк поискового индекса: запросы по индексу против прохода по текстам
+
+Для каждого размера меню строит индекс по синтетическим блюдам, печатает
+время построения, размер JSON (с разностным кодированием списков и без
+него, а также после gzip) и среднее время запроса по индексу и прежним
+способом - проверкой подстрок в названии, описании и составе всех блюд.
+"""
+
+import argparse
+import gzip
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from search_index import SearchIndex, build_search_index, delta_decode
+from synthetic import iter_menu_items
+
+SYLLABLES = ['ка', 'ро', 'ми', 'ла', 'ту', 'не', 'са', 'во', 'ри', 'шо', 'да', 'пе', 'бу', 'жи', 'ко', 'ны']
+ENDINGS = ['', 'а', 'ом', 'ой', 'ами', 'и', 'ый', 'ая']
+
+
+def vocabulary(rng, size):
+    """Псевдо-слова из слогов (основы) с падежными окончаниями"""
+    stems = set()
+    while len(stems) < size:
+        stems.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(stems)
+
+
+def zipf_words(rng, words, k):
+    """k слов с распределением Ципфа: частых немного, редких много"""
+    return [words[min(int(rng.paretovariate(1.0)) - 1, len(words) - 1)] for _ in range(k)]
+
+
+def menu_items(size, words, seed=0):
+    """Синтетические блюда с описанием и составом из словаря"""
+    rng = random.Random(seed)
+    for item in iter_menu_items(size, seed):
+        item['description'] = ' '.join(
+            word + rng.choice(ENDINGS) for word in zipf_words(rng, words, rng.randint(8, 25)))
+        item['composition'] = '\n'.join(f'* {word}' for word in zipf_words(rng, words, rng.randint(2, 8)))
+        yield item
+
+
+def linear_search(items, query):
+    """Прежний поиск: все слова запроса - подстроки текста блюда"""
+    query_words = query.lower().split()
+    found = []
+    for item in items:
+        text = ' '.join(item.get(field) or '' for field in ('name', 'description', 'composition')).lower()
+        if all(word in text for word in query_words):
+            found.append(item['id'])
+    return found
+
+
+def json_size(data):
+    return len(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def without_deltas(data):
+    """Тот же индекс с абсолютными номерами документов (для сравнения размера)"""
+    plain = dict(data)
+    for table in ('terms', 'prefixes', 'trigrams'):
+        plain[table] = {key: delta_decode(values) for key, values in data[table].items()}
+    return plain
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000], help='число блюд')
+    parser.add_argument('--queries', type=int, default=200, help='число запросов на размер')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    words = vocabulary(rng, 20000)
+    # Слова запросов - из середины частотного списка: их находят десятки блюд, а не все
+    queries = [' '.join(rng.sample(words[10:2000], rng.randint(1, 2))) for _ in range(args.queries)]
+
+    print(f"{'Блюд':>8} {'Сборка, с':>10} {'JSON, КБ':>9} {'без разн.':>10} {'gzip, КБ':>9} "
+          f"{'Индекс, мс':>11} {'Проход, мс':>11}")
+    for size in args.sizes:
+        items = list(menu_items(size, words))
+        start = time.perf_counter()
+        data = build_search_index(items)
+        build_seconds = time.perf_counter() - start
+        encoded = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+        index = SearchIndex(json.loads(encoded))
+        start = time.perf_counter()
+        for query in queries:
+            index.search(query, limit=20)
+        index_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        start = time.perf_counter()
+        for query in queries:
+            linear_search(items, query)
+        linear_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        print(f'{size:>8} {build_seconds:>10.2f} {len(encoded) / 1024:>9.0f} '
+              f'{json_size(without_deltas(data)) / 1024:>10.0f} {len(gzip.compress(encoded)) / 1024:>9.0f} '
+              f'{index_ms:>11.2f} {linear_ms:>11.2f}')
+
+
+if __name__ == '__main__':
+    main()
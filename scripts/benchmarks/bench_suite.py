@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Набор бенчмарков скриптов загрузки меню на синтетических данных
+
+Для каждого масштаба генерирует входные данные (zip с cp866-именами,
+HTML-экспорт и txt-техкарту в формате Sapiens Kitchen, menu.json и
+прайс) и замеряет время, пропускную способность и пиковую память:
+
+- add_dishes_from_zip (parse-menu-from-zip.py);
+- detect_category (category_classifier.py);
+- extract_dish_info_from_html (update-menu-from-html.py);
+- parse_txt_file (update-menu-from-txt.py);
+- update_menu_json из HTML, из txt и из PDF (цены).
+
+Результаты пишутся в JSON (--output), а --compare сравнивает их с
+результатами прошлого запуска:
+
+    python3 scripts/benchmarks/bench_suite.py --scales small medium --output bench.json
+    python3 scripts/benchmarks/bench_suite.py --compare bench.json
+"""
+
+import argparse
+import contextlib
+import gc
+import importlib.util
+import io
+import json
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime, timezone
+from pathlib import Path
+
+from synthetic import dish_name, docs_export_html, iter_menu_items, kitchen_spec_text, write_photo_archive
+
+SCRIPTS_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from category_classifier import detect_category, get_classifier
+from data_io import write_data
+from menu_core import normalize_name
+from menu_io import build_menu, empty_menu
+
+RESULTS_VERSION = 1
+
+# Размеры входных данных по масштабам
+SCALES = {
+    'small': {'photos': 500, 'names': 10000, 'html_dishes': 1000, 'txt_mb': 1, 'menu_items': 1000},
+    'medium': {'photos': 2000, 'names': 100000, 'html_dishes': 5000, 'txt_mb': 10, 'menu_items': 10000},
+    'large': {'photos': 5000, 'names': 1000000, 'html_dishes': 20000, 'txt_mb': 50, 'menu_items': 100000},
+}
+
+
+def load_script(name):
+    """Импортирует скрипт с дефисами в имени как модуль"""
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+zip_script = load_script('parse-menu-from-zip')
+html_script = load_script('update-menu-from-html')
+txt_script = load_script('update-menu-from-txt')
+prices_script = load_script('update-prices-from-pdf')
+
+
+# Бенчмарк: prepare(масштаб, рабочая директория) -> Case.
+# run вызывается для каждого замера, reset - перед каждым замером.
+Benchmark = namedtuple('Benchmark', 'name unit prepare')
+Case = namedtuple('Case', 'run amount input_bytes reset')
+
+
+def prepare_zip(scale, work_dir, photo_size):
+    zip_path = write_photo_archive(work_dir / 'photos.zip', scale['photos'], photo_size)
+    menu_dir = work_dir / 'menu'
+
+    # Каждый замер добавляет все фото архива в пустое меню и пустую директорию
+    def reset():
+        shutil.rmtree(menu_dir, ignore_errors=True)
+
+    return Case(lambda: zip_script.add_dishes_from_zip(empty_menu(), zip_path, menu_dir),
+                scale['photos'], zip_path.stat().st_size, reset)
+
+
+def prepare_classify(scale, work_dir, photo_size):
+    rng = random.Random(1)
+    names = [dish_name(rng, i) for i in range(scale['names'])]
+
+    def run():
+        for name in names:
+            detect_category(name)
+
+    # Кеш классификатора сбрасывается, чтобы каждый замер классифицировал заново
+    return Case(run, len(names), sum(len(name.encode('utf-8')) for name in names),
+                get_classifier().clear_cache)
+
+
+def prepare_html(scale, work_dir, photo_size):
+    html = docs_export_html(scale['html_dishes'])
+    return Case(lambda: html_script.extract_dish_info_from_html(html),
+                scale['html_dishes'], len(html.encode('utf-8')), None)
+
+
+def prepare_txt(scale, work_dir, photo_size):
+    txt_path = work_dir / 'spec.txt'
+    txt_path.write_text(kitchen_spec_text(scale['txt_mb'] * 1024 * 1024), encoding='utf-8')
+    return Case(lambda: txt_script.parse_txt_file(txt_path),
+                txt_path.stat().st_size, txt_path.stat().st_size, None)
+
+
+def _menu_case(scale, work_dir, update, data):
+    """menu.json с синтетическими блюдами; перед каждым замером пишется заново"""
+    items = list(iter_menu_items(scale['menu_items']))
+    for item in items:
+        item['description'] = item['composition'] = item['allergens'] = None
+        item.pop('price', None)
+    menu = build_menu(items)
+    menu_path = work_dir / 'menu' / 'menu.json'
+    menu_path.parent.mkdir(exist_ok=True)
+    source = json.dumps(menu, ensure_ascii=False, indent=2).encode('utf-8')
+
+    def reset():
+        menu_path.write_bytes(source)
+
+    return Case(lambda: update(menu_path, data), len(items), len(source), reset)
+
+
+def _matching_names(scale):
+    """Названия половины блюд меню (вперемешку с отсутствующими в меню)"""
+    rng = random.Random(2)
+    names = [item['name'] for item in iter_menu_items(scale['menu_items'])]
+    matched = rng.sample(names, len(names) // 2)
+    extra = [dish_name(rng, len(names) + i) for i in range(len(names) // 2)]
+    return matched + extra
+
+
+def prepare_update_html(scale, work_dir, photo_size):
+    dishes = {
+        normalize_name(name): {'name': name, 'description': f'Описание {name}',
+                               'composition': '* состав', 'allergens': 'молоко'}
+        for name in _matching_names(scale)
+    }
+    return _menu_case(scale, work_dir, html_script.update_menu_json, dishes)
+
+
+def prepare_update_txt(scale, work_dir, photo_size):
+    dishes = {
+        normalize_name(name): {'name': name, 'normalized_name': normalize_name(name), 'category': 'Салаты',
+                               'description': f'Описание {name}', 'composition': '* состав',
+                               'allergens': 'молоко'}
+        for name in _matching_names(scale)
+    }
+    return _menu_case(scale, work_dir, txt_script.update_menu_json, dishes)
+
+
+def prepare_update_prices(scale, work_dir, photo_size):
+    rng = random.Random(3)
+    lines = [f'{name} / {rng.randint(100, 400)} г ..... {rng.randrange(300, 3000, 10)}'
+             for name in _matching_names(scale)]
+    prices = prices_script.parse_price_lines(lines)
+    return _menu_case(scale, work_dir, prices_script.update_menu_json, prices)
+
+
+BENCHMARKS = [
+    Benchmark('add_dishes_from_zip', 'файлов', prepare_zip),
+    Benchmark('detect_category', 'названий', prepare_classify),
+    Benchmark('extract_dish_info_from_html', 'блюд', prepare_html),
+    Benchmark('parse_txt_file', 'байт', prepare_txt),
+    Benchmark('update_menu_json[html]', 'блюд', prepare_update_html),
+    Benchmark('update_menu_json[txt]', 'блюд', prepare_update_txt),
+    Benchmark('update_menu_json[prices]', 'блюд', prepare_update_prices),
+]
+
+
+def measure(case, repeat):
+    """Лучшее время из repeat замеров и пиковая память отдельного замера под tracemalloc"""
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            if case.reset:
+                case.reset()
+            gc.collect()
+            start = time.perf_counter()
+            case.run()
+            times.append(time.perf_counter() - start)
+
+        if case.reset:
+            case.reset()
+        gc.collect()
+        tracemalloc.start()
+        case.run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def git_revision():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPTS_DIR,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def result_key(result):
+    return result['benchmark'], result['scale']
+
+
+def print_comparison(results, baseline_path):
+    """Печатает изменение времени и памяти относительно прошлого запуска"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {result_key(result): result for result in json.load(f)['results']}
+    print(f'\nСравнение с {baseline_path}:')
+    for result in results:
+        old = baseline.get(result_key(result))
+        if old is None:
+            continue
+        time_change = (result['seconds'] - old['seconds']) * 100 / old['seconds'] if old['seconds'] else 0
+        memory_change = (result['peak_mb'] - old['peak_mb']) * 100 / old['peak_mb'] if old['peak_mb'] else 0
+        print(f"  {result['benchmark']:<30} {result['scale']:<7} "
+              f"время {time_change:+6.1f}%  память {memory_change:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', nargs='+', choices=SCALES, default=['small', 'medium'],
+                        help='масштабы входных данных')
+    parser.add_argument('--only', nargs='+', choices=[benchmark.name for benchmark in BENCHMARKS],
+                        help='запустить только указанные бенчмарки')
+    parser.add_argument('--repeat', type=int, default=3, help='число замеров времени (берется лучший)')
+    parser.add_argument('--photo-size', type=int, default=32 * 1024, help='размер фотографии в архиве, байт')
+    parser.add_argument('--output', type=Path, help='файл для результатов в JSON')
+    parser.add_argument('--compare', type=Path, help='результаты прошлого запуска для сравнения')
+    args = parser.parse_args()
+
+    benchmarks = [b for b in BENCHMARKS if not args.only or b.name in args.only]
+    results = []
+    for scale_name in args.scales:
+        scale = SCALES[scale_name]
+        print(f'== Масштаб {scale_name}')
+        for benchmark in benchmarks:
+            with tempfile.TemporaryDirectory() as tmp:
+                case = benchmark.prepare(scale, Path(tmp), args.photo_size)
+                seconds, peak = measure(case, args.repeat)
+            result = {
+                'benchmark': benchmark.name,
+                'scale': scale_name,
+                'amount': case.amount,
+                'unit': benchmark.unit,
+                'input_bytes': case.input_bytes,
+                'seconds': round(seconds, 6),
+                'throughput': round(case.amount / seconds, 2) if seconds else None,
+                'mb_per_second': round(case.input_bytes / 1024 / 1024 / seconds, 2) if seconds else None,
+                'peak_mb': round(peak / 1024 / 1024, 2),
+            }
+            results.append(result)
+            print(f"  {benchmark.name:<30} {seconds:8.3f} с  "
+                  f"{result['throughput']:>12,.0f} {benchmark.unit}/с  "
+                  f"{result['mb_per_second']:>8.1f} МБ/с  пик {result['peak_mb']:8.1f} МБ")
+
+    if args.output:
+        write_data(args.output, {
+            'version': RESULTS_VERSION,
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scales': {name: SCALES[name] for name in args.scales},
+            'results': results,
+        })
+        print(f'\nРезультаты записаны в {args.output}')
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
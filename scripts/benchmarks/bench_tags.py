@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк фильтра по аллергенам: битовые маски против поиска подстрок
+
+Для каждого размера меню размечает синтетические блюда (tag_menu из
+menu_tags.py), затем для --queries случайных сочетаний исключаемых
+аллергенов ("без орехов и рыбы") отбирает блюда по маскам и прежним
+способом - поиском подстрок в аллергенах и составе каждого блюда.
+Маски строятся и по названию с описанием, поэтому исключают больше
+блюд (например, "Ролл с крабом", у которого в аллергенах нет
+морепродуктов) - в последних столбцах среднее число оставшихся блюд.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from menu_tags import filter_items, tag_menu
+from synthetic import iter_menu_items
+
+# Аллергены синтетических блюд: ключ в menu_tags -> подстрока для прежнего поиска
+SUBSTRINGS = {
+    'milk': 'молок', 'eggs': 'яйц', 'gluten': 'глютен', 'nuts': 'орех', 'fish': 'рыб',
+    'seafood': 'морепродукт', 'soy': 'соя', 'sesame': 'кунжут', 'mustard': 'горчиц',
+}
+
+
+def substring_filter(items, keys):
+    """Прежний фильтр: ни одной подстроки исключаемых аллергенов в тексте блюда"""
+    substrings = [SUBSTRINGS[key] for key in keys]
+    found = []
+    for item in items:
+        text = f"{item.get('allergens') or ''} {item.get('composition') or ''}".lower()
+        if not any(substring in text for substring in substrings):
+            found.append(item)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000], help='число блюд')
+    parser.add_argument('--queries', type=int, default=100, help='число фильтров на размер')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    queries = [rng.sample(sorted(SUBSTRINGS), rng.randint(1, 3)) for _ in range(args.queries)]
+
+    print(f"{'Блюд':>8} {'Разметка, с':>12} {'Маски, мс':>10} {'Подстроки, мс':>14} "
+          f"{'Осталось: маски':>16} {'подстроки':>10}")
+    for size in args.sizes:
+        menu = {'all_items': list(iter_menu_items(size))}
+        start = time.perf_counter()
+        tag_menu(menu)
+        tag_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        by_mask = [filter_items(menu, without_allergens=keys) for keys in queries]
+        mask_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        start = time.perf_counter()
+        by_substring = [substring_filter(menu['all_items'], keys) for keys in queries]
+        substring_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        print(f'{size:>8} {tag_seconds:>12.2f} {mask_ms:>10.2f} {substring_ms:>14.2f} '
+              f'{sum(map(len, by_mask)) / len(queries):>16.0f} {sum(map(len, by_substring)) / len(queries):>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк разбора текстовой техкарты: лексер и парсер против прежнего автомата
+
+Генерирует синтетическую техкарту заданного размера, разбирает ее прежней
+реализацией parse_txt_file и новой (txt_menu_parser.py), сравнивает время,
+пиковую память и проверяет, что результаты совпадают.
+"""
+
+import argparse
+import importlib.util
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from synthetic import kitchen_spec_text
+
+SCRIPTS_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+def load_script(name):
+    """Импортирует скрипт с дефисами в имени как модуль"""
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+txt_script = load_script('update-menu-from-txt')
+
+
+def legacy_parse_txt_file(txt_path):
+    """Прежний разбор: весь файл в память и построчный автомат по индексу"""
+    with open(txt_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    dishes = {}
+    lines = content.split('\n')
+    
+    current_dish = None
+    current_section = None
+    current_category = None
+    
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        
+        # Пропускаем пустые строки
+        if not line:
+            i += 1
+            continue
+        
+        # Определяем категорию (строка начинающаяся с большой буквы без двоеточия)
+        if re.match(r'^[А-ЯЁ][а-яё\s]+$', line) and ':' not in line:
+            current_category = line.strip()
+            current_dish = None
+            i += 1
+            continue
+        
+        # Определяем название блюда (строка после категории, но не "Описание:", "Состав:" и т.д.)
+        if (current_category and 
+            not line.startswith('Описание') and 
+            not line.startswith('Состав') and
+            not line.startswith('Аллергены') and
+            not line.startswith('Конфликт') and
+            not line.startswith('Тайминг') and
+            not line.startswith('Приборы') and
+            not line.startswith('Технические') and
+            not line.startswith('Пищевая') and
+            not line.startswith('*') and
+            not line.startswith('________________') and
+            not re.match(r'^[А-ЯЁ][а-яё\s]+$', line) and
+            len(line) > 5):
+            
+            dish_name = line.strip()
+            normalized_name = txt_script.normalize_name(dish_name)
+            
+            # Создаем новое блюдо
+            current_dish = {
+                'name': dish_name,
+                'normalized_name': normalized_name,
+                'category': current_category,
+                'description': None,
+                'composition': None,
+                'allergens': None
+            }
+            dishes[normalized_name] = current_dish
+            current_section = None
+            i += 1
+            continue
+        
+        # Если у нас есть текущее блюдо, парсим его данные
+        if current_dish:
+            # Описание
+            if line.startswith('Описание') or line.startswith('Описание блюда'):
+                # Может быть "Описание: текст" или "Описание блюда" на следующей строке
+                if ':' in line:
+                    desc_text = line.split(':', 1)[1].strip()
+                    if desc_text:
+                        current_dish['description'] = desc_text
+                    current_section = 'description'
+                else:
+                    current_section = 'description'
+                i += 1
+                # Читаем следующую строку, если текущая была заголовком
+                if current_section == 'description' and not current_dish['description']:
+                    if i < len(lines):
+                        next_line = lines[i].strip()
+                        if next_line and not next_line.startswith('*') and not next_line.startswith('Состав'):
+                            current_dish['description'] = next_line
+                            i += 1
+                continue
+            
+            # Состав
+            if line.startswith('Состав') or line.startswith('Состав:'):
+                current_section = 'composition'
+                composition_lines = []
+                i += 1
+                # Читаем строки состава до следующего раздела
+                while i < len(lines):
+                    next_line = lines[i].strip()
+                    if (not next_line or 
+                        next_line.startswith('Описание') or 
+                        next_line.startswith('Аллергены') or
+                        next_line.startswith('Конфликт') or
+                        next_line.startswith('Тайминг') or
+                        next_line.startswith('Технические') or
+                        next_line.startswith('________________') or
+                        (not next_line.startswith('*') and not next_line.startswith('Основ') and len(next_line) > 50)):
+                        break
+                    if next_line:
+                        composition_lines.append(next_line)
+                    i += 1
+                if composition_lines:
+                    current_dish['composition'] = '\n'.join(composition_lines)
+                continue
+            
+            # Аллергены
+            if line.startswith('Аллергены') or 'аллергены' in line.lower():
+                if ':' in line:
+                    allergen_text = line.split(':', 1)[1].strip()
+                    if allergen_text:
+                        current_dish['allergens'] = allergen_text
+                current_section = 'allergens'
+                allergen_lines = []
+                i += 1
+                # Читаем дополнительные строки с аллергенами
+                while i < len(lines):
+                    next_line = lines[i].strip()
+                    if (not next_line or 
+                        next_line.startswith('Описание') or
+                        next_line.startswith('Состав') or
+                        next_line.startswith('Конфликт') or
+                        next_line.startswith('Тайминг') or
+                        next_line.startswith('Технические') or
+                        next_line.startswith('________________')):
+                        break
+                    if next_line and (next_line.startswith('*') or 'аллерген' in next_line.lower()):
+                        allergen_lines.append(next_line.replace('*', '').strip())
+                    elif next_line and len(next_line) < 100:
+                        allergen_lines.append(next_line)
+                    i += 1
+                if allergen_lines and not current_dish['allergens']:
+                    current_dish['allergens'] = ' '.join(allergen_lines)
+                continue
+            
+            # Продолжаем читать описание, если мы в секции описания
+            if current_section == 'description' and not line.startswith('*'):
+                if not current_dish['description']:
+                    current_dish['description'] = line
+                elif not line.startswith('Состав') and not line.startswith('Аллергены'):
+                    # Добавляем к описанию, если это продолжение
+                    if len(line) > 20:
+                        current_dish['description'] += ' ' + line
+        
+        i += 1
+    
+    return dishes
+
+
+def measure(func, path):
+    """Возвращает (время, пиковая память в МБ, результат)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(path)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=float, default=50, help='размер техкарты, МБ')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        txt_path = Path(tmp) / 'spec.txt'
+        print(f'Генерирую техкарту ~{args.size_mb:g} МБ...')
+        txt_path.write_text(kitchen_spec_text(int(args.size_mb * 1024 * 1024)), encoding='utf-8')
+        print(f'Размер файла: {txt_path.stat().st_size / 1024 / 1024:.1f} МБ')
+        print()
+
+        legacy_time, legacy_peak, legacy = measure(legacy_parse_txt_file, txt_path)
+        print(f'  прежний автомат  {legacy_time:7.2f} с  пик памяти {legacy_peak:8.1f} МБ')
+        new_time, new_peak, new = measure(txt_script.parse_txt_file, txt_path)
+        print(f'  лексер + парсер  {new_time:7.2f} с  пик памяти {new_peak:8.1f} МБ'
+              f'  ускорение x{legacy_time / new_time:.2f}')
+        same = legacy == new and list(legacy) == list(new)
+        print(f'Блюд: {len(new)}  {"✓ результаты совпадают" if same else "✗ результаты отличаются"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Генераторы синтетических входных данных для бенчмарков скриптов меню
+"""
+
+import random
+import zlib
+import zipfile
+from html import escape as html_escape
+
+# Слова для правдоподобных названий блюд
+DISH_WORDS = [
+    'Ролл', 'Калифорния', 'с', 'крабом', 'лосось', 'тунец', 'угорь', 'Салат', 'романо',
+    'Суп', 'из', 'тыквы', 'креветками', 'Шатобриан', 'Тартар', 'говядины', 'Чизкейк',
+    'малиновым', 'соусом', 'Карпаччо', 'кабачков', 'Равиоли', 'уткой', 'шиитаке',
+    'Бульон', 'шпинатом', 'Паштет', 'трюфелем', 'Пожарская', 'котлета', 'Медовик',
+]
+
+
+class CP866ZipInfo(zipfile.ZipInfo):
+    """ZipInfo, который пишет имя в cp866 без флага UTF-8, как архиваторы Windows"""
+
+    def _encodeFilenameFlags(self):
+        return self.filename.encode('cp866'), self.flag_bits
+
+
+def dish_name(rng, index):
+    """Случайное название блюда с уникальным номером"""
+    words = rng.sample(DISH_WORDS, rng.randint(2, 6))
+    return f"{' '.join(words)} {index}"
+
+
+def photo_bytes(rng, size):
+    """Псевдо-изображение: смесь случайных и повторяющихся блоков (частично сжимается)"""
+    chunks = []
+    total = 0
+    while total < size:
+        block = rng.randbytes(rng.randint(64, 512))
+        chunks.append(block * rng.randint(1, 8))
+        total += len(chunks[-1])
+    return b''.join(chunks)[:size]
+
+
+def write_photo_archive(path, count, photo_size=64 * 1024, seed=0):
+    """Пишет zip-архив с count фотографиями под cp866-именами в 'sapiens photo/'"""
+    rng = random.Random(seed)
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for i in range(count):
+            ext = rng.choice(['.jpg', '.jpg', '.png'])
+            name = f'sapiens photo/{dish_name(rng, i)}{ext}'
+            zf.writestr(CP866ZipInfo(name), photo_bytes(rng, photo_size))
+    return path
+
+
+def _pdf_text(text):
+    """Текст в кодах шрифта Identity-H: два байта на символ (код = Unicode)"""
+    return '<' + text.encode('utf-16-be').hex() + '>'
+
+
+def _pdf_page_content(lines, rng, page_height=822):
+    """Содержимое страницы: название и цена отдельными фрагментами на одной строке"""
+    ops = ['BT', '/F1 10 Tf', f'1 0 0 1 40 {page_height - 40} Tm', '14 TL']
+    for name, price in lines:
+        if rng.random() < 0.5:
+            ops.append(f'{_pdf_text(name)} Tj')
+        else:
+            # Побуквенный вывод с кернингом, как в файлах из верстальных программ
+            parts = ' '.join(f'{_pdf_text(char)} {rng.randint(-30, 10)}' for char in name)
+            ops.append(f'[{parts}] TJ')
+        ops.append(f'q 1 0 0 1 380 0 cm [{_pdf_text(str(price))}] TJ Q')
+        ops.append('T*')
+    ops.append('ET')
+    return '\n'.join(ops).encode('latin-1')
+
+
+def write_price_pdf(path, entries, per_page=50, seed=0):
+    """Пишет PDF с текстовым слоем: строки "название ... цена" по per_page на страницу
+
+    Шрифт Type0 с ToUnicode CMap, содержимое сжато FlateDecode.
+    """
+    rng = random.Random(seed)
+    pages = [entries[i:i + per_page] for i in range(0, len(entries), per_page)] or [[]]
+    chars = sorted({ord(c) for name, price in entries for c in f'{name}{price}'} | {32})
+
+    cmap = ['/CIDInit /ProcSet findresource begin', '12 dict begin', 'begincmap',
+            '1 begincodespacerange <0000> <FFFF> endcodespacerange']
+    for i in range(0, len(chars), 100):
+        block = chars[i:i + 100]
+        cmap.append(f'{len(block)} beginbfchar')
+        cmap.extend(f'<{c:04X}> <{c:04X}>' for c in block)
+        cmap.append('endbfchar')
+    cmap += ['endcmap', 'end', 'end']
+    cmap_data = zlib.compress('\n'.join(cmap).encode('latin-1'))
+
+    # Объекты: 1 каталог, 2 дерево страниц, 3 шрифт, 4 потомок, 5 ToUnicode, далее страницы
+    objects = {
+        1: b'<< /Type /Catalog /Pages 2 0 R >>',
+        3: b'<< /Type /Font /Subtype /Type0 /BaseFont /Synthetic /Encoding /Identity-H '
+           b'/DescendantFonts [4 0 R] /ToUnicode 5 0 R >>',
+        4: b'<< /Type /Font /Subtype /CIDFontType2 /BaseFont /Synthetic /DW 550 '
+           b'/W [32 [280] 48 57 560] >>',
+        5: b'<< /Filter /FlateDecode /Length %d >>\nstream\n' % len(cmap_data)
+           + cmap_data + b'\nendstream',
+    }
+    kids = []
+    for number, lines in enumerate(pages):
+        page_num, content_num = 6 + number * 2, 7 + number * 2
+        content = zlib.compress(_pdf_page_content(lines, rng))
+        objects[page_num] = (b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 467 822] '
+                             b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % content_num)
+        objects[content_num] = (b'<< /Filter /FlateDecode /Length %d >>\nstream\n' % len(content)
+                                + content + b'\nendstream')
+        kids.append(f'{page_num} 0 R')
+    objects[2] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'.encode()
+
+    out = bytearray(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+    offsets = {}
+    for num in sorted(objects):
+        offsets[num] = len(out)
+        out += b'%d 0 obj\n' % num + objects[num] + b'\nendobj\n'
+    xref_offset = len(out)
+    size = max(objects) + 1
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % size
+    for num in range(1, size):
+        out += b'%010d 00000 n \n' % offsets[num]
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (size, xref_offset)
+    with open(path, 'wb') as f:
+        f.write(out)
+    return path
+
+
+_DOCS_SPAN = '<span class="c{0}">{1}</span>'
+
+
+def _docs_paragraph(rng, text):
+    """Абзац в стиле экспорта Google Docs: текст разбит на несколько span"""
+    words = text.split(' ')
+    cut = rng.randint(0, len(words)) if len(words) > 3 and rng.random() < 0.3 else len(words)
+    spans = [' '.join(words[:cut]), ' '.join(words[cut:])]
+    inner = ''.join(_DOCS_SPAN.format(rng.randint(1, 9), html_escape(part)) for part in spans if part)
+    return f'<p class="c{rng.randint(1, 9)}">{inner}</p>'
+
+
+def docs_export_html(count, seed=0):
+    """HTML-экспорт Google Docs с count блюдами: заголовок h4 и абзацы описания"""
+    rng = random.Random(seed)
+    parts = ['<html><head><meta content="text/html; charset=UTF-8" http-equiv="content-type">',
+             '<style type="text/css">.c1{color:#000}p{margin:0}</style></head><body class="c5">']
+    for i in range(count):
+        name = dish_name(rng, i)
+        if rng.random() < 0.05:
+            name = f'#{i}'
+        parts.append(f'<h4 class="c3" id="h.{i:x}"><span class="c2">{html_escape(name)}</span></h4>')
+        if rng.random() < 0.5:
+            parts.append(_docs_paragraph(rng, f'Описание: {" ".join(rng.choices(DISH_WORDS, k=rng.randint(3, 20)))} & "шеф"'))
+        if rng.random() < 0.3:
+            parts.append(_docs_paragraph(rng, ' '.join(rng.choices(DISH_WORDS, k=rng.randint(10, 15)))))
+        parts.append(_docs_paragraph(rng, 'Состав:'))
+        for _ in range(rng.randint(0, 5)):
+            parts.append(_docs_paragraph(rng, f'* {rng.choice(DISH_WORDS)} {rng.randint(5, 200)} гр'))
+        if rng.random() < 0.3:
+            parts.append(_docs_paragraph(rng, 'Тайминг: 15 минут'))
+        if rng.random() < 0.6:
+            parts.append(_docs_paragraph(rng, f'Аллергены: {", ".join(rng.sample(DISH_WORDS, 2))}'))
+        if rng.random() < 0.1:
+            parts.append('<p class="c1"><a href="#x">ссылка на техкарту</a></p>')
+        parts.append('<p class="c1 c4"><span class="c7"></span></p>')
+    parts.append('</body></html>')
+    return '\n'.join(parts)
+
+
+SPEC_CATEGORIES = ['Завтраки', 'Салаты', 'Супы', 'Горячие блюда', 'Десерты', 'Суши и роллы']
+
+
+def _spec_dish(rng, index):
+    """Карточка блюда в формате техкарты кухни"""
+    words = lambda low, high: ' '.join(rng.choices(DISH_WORDS, k=rng.randint(low, high)))
+    lines = [dish_name(rng, index), '', '  ', '']
+    if rng.random() < 0.7:
+        lines.append(f'Описание: {words(8, 25)}')
+    else:
+        lines += ['Описание блюда', words(8, 25)]
+    if rng.random() < 0.2:
+        lines.append(words(2, 3))
+    lines.append(rng.choice(['Состав: ', 'Состав']))
+    if rng.random() < 0.3:
+        lines.append('Основные компоненты (на 2 порции):')
+    lines += [f'* {words(1, 6)}' for _ in range(rng.randint(1, 12))]
+    if rng.random() < 0.2:
+        lines.append(f'Соус: {words(1, 3)}')
+    lines += ['', ''] if rng.random() < 0.5 else []
+    lines.append(f'Аллергены: {words(1, 5)}' if rng.random() < 0.8 else 'Аллергены:')
+    if rng.random() < 0.3:
+        lines.append(f'* {words(1, 3)} (аллерген)')
+    lines += ['Конфликтогены:', 'Тайминг приготовления: 15 минут', 'Приборы: вилка, нож', '', '']
+    if rng.random() < 0.1:
+        lines += ['________________', '']
+    return lines
+
+
+def kitchen_spec_text(size, seed=0):
+    """Текстовая техкарта кухни размером около size байт в UTF-8"""
+    rng = random.Random(seed)
+    lines = ['\ufeff' + SPEC_CATEGORIES[0] + ' ']
+    total = 0
+    index = 0
+    while total < size:
+        if rng.random() < 0.05:
+            lines += [rng.choice(SPEC_CATEGORIES), '']
+        dish = _spec_dish(rng, index)
+        total += sum(len(line.encode("utf-8")) + 1 for line in dish)
+        lines += dish
+        index += 1
+    return '\n'.join(lines) + '\n'
+
+
+ALLERGENS = ['молоко', 'яйцо', 'глютен', 'орехи', 'рыба', 'морепродукты', 'соя', 'кунжут', 'горчица']
+
+
+def iter_menu_items(count, seed=0):
+    """Блюда в форме all_items menu.json (как у нескольких заведений после сборки)"""
+    rng = random.Random(seed)
+    for i in range(count):
+        name = dish_name(rng, i)
+        ext = rng.choice(['jpg', 'jpg', 'png'])
+        item = {
+            'id': i + 1,
+            'name': name,
+            'category': rng.choice(SPEC_CATEGORIES),
+            'image': f'images/{name.replace(" ", "_")}.{ext}',
+            'image_format': ext,
+            'description': ' '.join(rng.choices(DISH_WORDS, k=rng.randint(5, 20))),
+            'composition': '\n'.join(f'* {rng.choice(DISH_WORDS)}' for _ in range(rng.randint(2, 8))),
+            'allergens': ', '.join(sorted(rng.sample(ALLERGENS, rng.randint(1, 3)))),
+        }
+        if rng.random() < 0.9:
+            item['price'] = rng.randrange(300, 3000, 10)
+        yield item
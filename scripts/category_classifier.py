@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Классификатор категорий блюд по названию.
+
+Таблица ключевых слов компилируется один раз в одно регулярное выражение
+(альтернатива в виде префиксного дерева внутри lookahead, поэтому
+находятся и пересекающиеся вхождения). Для названия считаются все
+совпадения, и категория выбирается по счету:
+
+1. максимальный вес найденного ключевого слова - слова, задающие тип
+   блюда (ролл, суп, салат...), важнее ингредиентов (лосось, креветка);
+2. число найденных ключевых слов категории;
+3. явный приоритет категории при равенстве.
+
+Поэтому "Ролл с лососем" попадает в "Суши и роллы", а не в "Рыба и
+морепродукты", как раньше при выборе по порядку словаря.
+"""
+
+import re
+
+from instrumentation import record_match, timer
+
+DEFAULT_CATEGORY = 'Прочее'
+
+# Ключевые слова категорий (подстроки названия в нижнем регистре)
+CATEGORY_KEYWORDS = {
+    'Десерты': ['десерт', 'пирог', 'торт', 'кекс', 'вафля', 'блинчик', 'сырник', 'чизкейк', 'медовик', 'синнабон', 'крафл', 'орео', 'варенье', 'эклер'],
+    'Закуски': ['закуск', 'оливк', 'маслин', 'артишок', 'карпаччо', 'брускетт'],
+    'Мясные блюда': ['мясн', 'перепелк', 'утк', 'котлет', 'шатобриан', 'брискет', 'бургер', 'бекон', 'окорок', 'омлет', 'яйц', 'ребр'],
+    'Рыба и морепродукты': ['рыб', 'лосос', 'тунец', 'угор', 'креветк', 'гребешок', 'краб', 'икра', 'голубец', 'треск', 'щук', 'темпура', 'нори'],
+    'Салаты': ['салат', 'руккола', 'боул', 'коул', 'stefan'],
+    'Супы': ['суп', 'бульон', 'том-ям', 'вонтон'],
+    'Суши и роллы': ['ролл', 'суши', 'калифорни', 'филадельфи', 'радуга'],
+    'Завтраки': ['завтрак', 'вафля', 'бриошь', 'драник', 'скрэмбл', 'птитим', 'киноа', 'овсян', 'сырник'],
+    DEFAULT_CATEGORY: []
+}
+
+# Ключевые слова, задающие тип блюда, весят больше ингредиентов
+DISH_TYPE_WEIGHT = 2
+DISH_TYPE_KEYWORDS = {
+    'десерт', 'пирог', 'торт', 'чизкейк', 'медовик', 'эклер',
+    'закуск', 'карпаччо', 'брускетт',
+    'бургер', 'котлет', 'шатобриан',
+    'салат', 'боул',
+    'суп', 'бульон', 'том-ям',
+    'ролл', 'суши',
+    'завтрак',
+}
+
+# Приоритет категорий при равном счете (больше - важнее)
+CATEGORY_PRIORITY = {
+    'Суши и роллы': 90,
+    'Десерты': 80,
+    'Закуски': 70,
+    'Мясные блюда': 60,
+    'Рыба и морепродукты': 50,
+    'Салаты': 40,
+    'Супы': 30,
+    'Завтраки': 20,
+    DEFAULT_CATEGORY: 0,
+}
+
+
+def _trie_pattern(words):
+    """Строит регулярное выражение из слов в виде префиксного дерева"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        is_end = '' in node
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Квантификатор жадный: сначала пробуется самое длинное слово
+        if is_end:
+            return '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+
+class CategoryClassifier:
+    """Скомпилированная таблица ключевых слов с приоритетами"""
+
+    def __init__(self, keywords=None, type_keywords=None, priority=None,
+                 default=DEFAULT_CATEGORY):
+        keywords = CATEGORY_KEYWORDS if keywords is None else keywords
+        type_keywords = DISH_TYPE_KEYWORDS if type_keywords is None else type_keywords
+        priority = CATEGORY_PRIORITY if priority is None else priority
+        self.default = default
+
+        # ключевое слово -> [(категория, вес)]
+        owners = {}
+        for category, words in keywords.items():
+            for word in words:
+                weight = DISH_TYPE_WEIGHT if word in type_keywords else 1
+                owners.setdefault(word.lower(), []).append((category, weight))
+
+        # В одной позиции регулярное выражение находит самое длинное слово;
+        # более короткие слова-префиксы засчитываем вместе с ним
+        self._credits = {
+            word: [(prefix, category, weight)
+                   for prefix in owners if word.startswith(prefix)
+                   for category, weight in owners[prefix]]
+            for word in owners
+        }
+        self._priority = {category: priority.get(category, 0) for category in keywords}
+        self._pattern = re.compile('(?=(' + _trie_pattern(owners) + '))') if owners else None
+        self._cache = {}
+
+    def scores(self, name):
+        """Возвращает {категория: (макс. вес, число совпадений, приоритет)}"""
+        if self._pattern is None:
+            return {}
+        matched = {}
+        for match in self._pattern.finditer(name.lower()):
+            for keyword, category, weight in self._credits[match.group(1)]:
+                matched.setdefault(category, {})[keyword] = weight
+        return {
+            category: (max(words.values()), len(words), self._priority.get(category, 0))
+            for category, words in matched.items()
+        }
+
+    def classify(self, name):
+        """Определяет категорию блюда по названию"""
+        category = self._cache.get(name)
+        if category is None:
+            scores = self.scores(name)
+            category = max(scores, key=scores.get) if scores else self.default
+            self._cache[name] = category
+        record_match('category_classifier', category != self.default)
+        return category
+
+    @timer('classify')
+    def classify_many(self, names):
+        """Классифицирует список названий за один вызов (повторы считаются один раз)"""
+        classify = self.classify
+        return [classify(name) for name in names]
+
+    def clear_cache(self):
+        """Сбрасывает кеш результатов (для замеров)"""
+        self._cache.clear()
+
+
+_default_classifier = None
+
+
+def get_classifier():
+    """Классификатор со стандартной таблицей (компилируется один раз)"""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = CategoryClassifier()
+    return _default_classifier
+
+
+def detect_category(dish_name):
+    """Определяет категорию блюда по названию"""
+    return get_classifier().classify(dish_name)
+
+
+def classify_many(names):
+    """Определяет категории для списка названий"""
+    return get_classifier().classify_many(names)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Запись и чтение данных меню в нескольких форматах.
+
+Форматы (--format в скриптах):
+
+- pretty - JSON с отступами, удобен для diff (по умолчанию);
+- min - компактный JSON без пробелов для продакшена;
+- msgpack - бинарный снимок в формате MessagePack для инструментов.
+
+Файл пишется атомарно: во временный файл рядом с целевым, fsync и
+переименование на место (atomic_io.py), поэтому прерванный процесс не
+оставляет наполовину записанный menu.json.
+
+Если установлен orjson (pip install orjson), им разбирается JSON и
+кодируется формат min, а если установлен msgpack - бинарный формат
+пишется им. Без них используются стандартный json и встроенный
+кодировщик MessagePack; результат совместим в обоих случаях. Формат
+pretty всегда кодируется стандартным json: отступы orjson отличаются, а
+menu.json в репозитории не должен меняться от того, установлен ли orjson.
+"""
+
+import json
+import struct
+
+from atomic_io import atomic_open
+from instrumentation import count, timer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FORMATS = ('pretty', 'min', 'msgpack')
+DEFAULT_FORMAT = 'pretty'
+FORMAT_SUFFIXES = {'pretty': '.json', 'min': '.json', 'msgpack': '.msgpack'}
+
+
+# MessagePack (https://msgpack.org/) без сторонних библиотек
+
+def _pack(obj, out):
+    if obj is None:
+        out.append(0xc0)
+    elif obj is True:
+        out.append(0xc3)
+    elif obj is False:
+        out.append(0xc2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -0x20 <= obj < 0:
+            out.append(obj & 0xff)
+        elif obj >= 0:
+            for code, fmt, limit in ((0xcc, '>B', 1 << 8), (0xcd, '>H', 1 << 16),
+                                     (0xce, '>I', 1 << 32), (0xcf, '>Q', 1 << 64)):
+                if obj < limit:
+                    out.append(code)
+                    out += struct.pack(fmt, obj)
+                    break
+            else:
+                raise OverflowError(f'Целое {obj} не помещается в MessagePack')
+        else:
+            for code, fmt, limit in ((0xd0, '>b', 1 << 7), (0xd1, '>h', 1 << 15),
+                                     (0xd2, '>i', 1 << 31), (0xd3, '>q', 1 << 63)):
+                if obj >= -limit:
+                    out.append(code)
+                    out += struct.pack(fmt, obj)
+                    break
+            else:
+                raise OverflowError(f'Целое {obj} не помещается в MessagePack')
+    elif isinstance(obj, float):
+        out.append(0xcb)
+        out += struct.pack('>d', obj)
+    elif isinstance(obj, str):
+        data = obj.encode('utf-8')
+        _pack_header(out, len(data), 0xa0, 32, (0xd9, 0xda, 0xdb))
+        out += data
+    elif isinstance(obj, (bytes, bytearray)):
+        _pack_header(out, len(obj), None, 0, (0xc4, 0xc5, 0xc6))
+        out += obj
+    elif isinstance(obj, (list, tuple)):
+        _pack_header(out, len(obj), 0x90, 16, (None, 0xdc, 0xdd))
+        for value in obj:
+            _pack(value, out)
+    elif isinstance(obj, dict):
+        _pack_header(out, len(obj), 0x80, 16, (None, 0xde, 0xdf))
+        for key, value in obj.items():
+            _pack(key, out)
+            _pack(value, out)
+    else:
+        raise TypeError(f'Тип {type(obj).__name__} не поддерживается MessagePack')
+
+
+def _pack_header(out, length, fix_code, fix_limit, codes):
+    """Заголовок строки, bin, массива или map: fix-форма или 8/16/32-битная длина"""
+    if fix_code is not None and length < fix_limit:
+        out.append(fix_code | length)
+        return
+    for code, fmt, limit in zip(codes, ('>B', '>H', '>I'), (1 << 8, 1 << 16, 1 << 32)):
+        if code is not None and length < limit:
+            out.append(code)
+            out += struct.pack(fmt, length)
+            return
+    raise OverflowError('Слишком длинный объект для MessagePack')
+
+
+def pack(obj):
+    """Кодирует объект (dict, list, str, int, float, bool, None, bytes) в MessagePack"""
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    out = bytearray()
+    _pack(obj, out)
+    return bytes(out)
+
+
+_FIXED = {
+    0xcc: '>B', 0xcd: '>H', 0xce: '>I', 0xcf: '>Q',
+    0xd0: '>b', 0xd1: '>h', 0xd2: '>i', 0xd3: '>q',
+    0xca: '>f', 0xcb: '>d',
+}
+_LENGTHS = {
+    0xd9: ('>B', 'str'), 0xda: ('>H', 'str'), 0xdb: ('>I', 'str'),
+    0xc4: ('>B', 'bin'), 0xc5: ('>H', 'bin'), 0xc6: ('>I', 'bin'),
+    0xdc: ('>H', 'array'), 0xdd: ('>I', 'array'),
+    0xde: ('>H', 'map'), 0xdf: ('>I', 'map'),
+}
+
+
+def _unpack(data, pos):
+    code = data[pos]
+    pos += 1
+    if code < 0x80:
+        return code, pos
+    if code >= 0xe0:
+        return code - 0x100, pos
+    if 0xa0 <= code <= 0xbf:
+        kind, length = 'str', code & 0x1f
+    elif 0x90 <= code <= 0x9f:
+        kind, length = 'array', code & 0x0f
+    elif 0x80 <= code <= 0x8f:
+        kind, length = 'map', code & 0x0f
+    elif code == 0xc0:
+        return None, pos
+    elif code == 0xc2:
+        return False, pos
+    elif code == 0xc3:
+        return True, pos
+    elif code in _FIXED:
+        fmt = _FIXED[code]
+        return struct.unpack_from(fmt, data, pos)[0], pos + struct.calcsize(fmt)
+    elif code in _LENGTHS:
+        fmt, kind = _LENGTHS[code]
+        length = struct.unpack_from(fmt, data, pos)[0]
+        pos += struct.calcsize(fmt)
+    else:
+        raise ValueError(f'Неподдерживаемый код MessagePack 0x{code:02x} в позиции {pos - 1}')
+
+    if kind == 'str':
+        return str(data[pos:pos + length], 'utf-8'), pos + length
+    if kind == 'bin':
+        return bytes(data[pos:pos + length]), pos + length
+    if kind == 'array':
+        items = []
+        for _ in range(length):
+            value, pos = _unpack(data, pos)
+            items.append(value)
+        return items, pos
+    result = {}
+    for _ in range(length):
+        key, pos = _unpack(data, pos)
+        result[key], pos = _unpack(data, pos)
+    return result, pos
+
+
+def unpack(data):
+    """Разбирает MessagePack, записанный pack()"""
+    if msgpack is not None:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+    value, pos = _unpack(memoryview(data), 0)
+    if pos != len(data):
+        raise ValueError('Лишние данные после объекта MessagePack')
+    return value
+
+
+# JSON
+
+@timer('serialize')
+def dumps(data, format=DEFAULT_FORMAT):
+    """Кодирует данные в байты в выбранном формате"""
+    if format == 'msgpack':
+        return pack(data)
+    if format not in FORMATS:
+        raise ValueError(f'Неизвестный формат {format!r}, допустимые: {", ".join(FORMATS)}')
+    if orjson is not None and format == 'min':
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            # Например, целые больше 64 бит - отдаем стандартному json
+            pass
+    if format == 'pretty':
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+    else:
+        text = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return text.encode('utf-8')
+
+
+@timer('parse')
+def loads(data):
+    """Разбирает JSON или MessagePack (формат определяется по первому байту)"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    # JSON-документ меню начинается с "{" или "[" (возможно, после пробелов и BOM)
+    head = data.lstrip(b' \t\r\n')
+    if head[:1] in (b'{', b'[') or head.startswith(b'\xef\xbb\xbf'):
+        if orjson is not None and not head.startswith(b'\xef\xbb\xbf'):
+            return orjson.loads(data)
+        return json.loads(data.decode('utf-8-sig'))
+    return unpack(data)
+
+
+def write_data(path, data, format=DEFAULT_FORMAT, fsync=True):
+    """Атомарно записывает данные в файл; возвращает размер записанного в байтах"""
+    content = dumps(data, format)
+    with timer('write'), atomic_open(path, 'wb', fsync=fsync) as f:
+        f.write(content)
+    return len(content)
+
+
+def read_data(path):
+    """Читает файл, записанный write_data, в любом из форматов"""
+    with timer('read'), open(path, 'rb') as f:
+        data = f.read()
+    count('bytes_read', len(data))
+    return loads(data)
+
+
+def add_format_argument(parser):
+    """Добавляет в argparse-парсер параметр --format"""
+    parser.add_argument('--format', choices=FORMATS, default=DEFAULT_FORMAT,
+                        help='формат menu.json: pretty - JSON с отступами, min - компактный JSON, '
+                             'msgpack - бинарный снимок menu.msgpack для инструментов')
@@ -83,9 +83,13 @@ else
     echo "        alias /var/www/html/sapiens/;"
     echo "        try_files \$uri \$uri/ /sapiens/index.html;"
     echo "        "
-    echo "        location ~* \.(js|css|png|jpg|jpeg|gif|ico|svg|woff|woff2|ttf|eot|webp|json)\$ {"
+    echo "        location ~* \"(/assets/.+|\.[0-9a-f]{12}(-[0-9]+)?\.(jpg|jpeg|png|webp)|/(details|search)-[0-9a-f]{10}\.json)\$\" {"
     echo "            expires 1y;"
-    echo "            add_header Cache-Control \"public, immutable\";"
+    echo "            add_header Cache-Control \"public, max-age=31536000, immutable\";"
+    echo "        }"
+    echo "        "
+    echo "        location ~* \.(js|css|png|jpg|jpeg|gif|ico|svg|woff|woff2|ttf|eot|webp|json)\$ {"
+    echo "            add_header Cache-Control \"no-cache\";"
     echo "        }"
     echo "        "
     echo "        location ~* \.html\$ {"
@@ -60,9 +60,13 @@ server {
         alias /var/www/html/sapiens/;
         try_files \$uri \$uri/ /sapiens/index.html;
         
-        location ~* \.(js|css|png|jpg|jpeg|gif|ico|svg|woff|woff2|ttf|eot|webp|json)\$ {
+        location ~* \"(/assets/.+|\.[0-9a-f]{12}(-[0-9]+)?\.(jpg|jpeg|png|webp)|/(details|search)-[0-9a-f]{10}\.json)\$\" {
             expires 1y;
-            add_header Cache-Control \"public, immutable\";
+            add_header Cache-Control \"public, max-age=31536000, immutable\";
+        }
+        
+        location ~* \.(js|css|png|jpg|jpeg|gif|ico|svg|woff|woff2|ttf|eot|webp|json)\$ {
+            add_header Cache-Control \"no-cache\";
         }
         
         location ~* \.html\$ {
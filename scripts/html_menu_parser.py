@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Потоковый разбор HTML-экспорта Google Docs с описаниями блюд.
+
+Документ подается кусками (например, прямо из ZipFile.open) в
+html.parser.HTMLParser. Заголовок <h4 id="..."><span>Название</span></h4>
+открывает блок блюда, абзацы <p><span>...</span></p> после него
+накапливаются, и запись о блюде выдается, как только блок закрывается
+следующим заголовком или концом документа. Память не зависит от размера
+документа: хранится только текущий блок.
+
+Абзацы раскладываются по описанию, составу и аллергенам теми же
+правилами, что и в прежнем разборе регулярными выражениями.
+"""
+
+import io
+import re
+from collections import deque
+from html.parser import HTMLParser
+
+READ_CHUNK_SIZE = 64 * 1024
+# Последний блок документа ограничен этим числом символов после заголовка
+LAST_BLOCK_LIMIT = 10000
+MIN_NAME_LENGTH = 5
+MIN_PARAGRAPH_LENGTH = 5
+
+_SPACES_RE = re.compile(r'\s+')
+
+
+def _clean(text):
+    return _SPACES_RE.sub(' ', text.strip())
+
+
+def classify_paragraphs(paragraphs):
+    """Раскладывает абзацы блока по описанию, составу и аллергенам
+
+    Возвращает (описание, состав, аллергены); отсутствующие части - None.
+    """
+    description_parts = []
+    composition_parts = []
+    allergens_parts = []
+
+    current_section = None
+
+    for text in paragraphs:
+        text = _clean(text)
+
+        if not text or len(text) < MIN_PARAGRAPH_LENGTH:
+            continue
+
+        text_lower = text.lower()
+
+        # Определяем тип информации
+        if 'тайминг' in text_lower or 'подача:' in text_lower or 'приборы:' in text_lower:
+            continue
+        elif text_lower.startswith('описание'):
+            current_section = 'description'
+            desc_text = text.split(':', 1)[-1].strip() if ':' in text else ''
+            if desc_text:
+                description_parts.append(desc_text)
+        elif text_lower.startswith('состав'):
+            current_section = 'composition'
+            comp_text = text.split(':', 1)[-1].strip() if ':' in text else ''
+            if comp_text:
+                composition_parts.append(comp_text)
+        elif text_lower.startswith('аллерген'):
+            current_section = 'allergens'
+            all_text = text.split(':', 1)[-1].strip() if ':' in text else ''
+            if all_text:
+                allergens_parts.append(all_text)
+        elif current_section == 'description':
+            description_parts.append(text)
+        elif current_section == 'composition' or '*' in text or ('начинка' in text_lower or 'тесто' in text_lower):
+            composition_parts.append(text)
+        elif current_section == 'allergens' or 'аллерген' in text_lower:
+            allergens_parts.append(text)
+        elif len(text) > 50 and not any(x in text_lower for x in ['тайминг', 'подача', 'приборы']):
+            # Если не определено, но текст длинный, считаем описанием
+            if not description_parts:
+                description_parts.append(text)
+
+    # Объединяем части
+    description = ' '.join(description_parts).strip() if description_parts else None
+    composition = '\n'.join(composition_parts).strip() if composition_parts else None
+    allergens = ' '.join(allergens_parts).strip() if allergens_parts else None
+    return description, composition, allergens
+
+
+def is_dish_name(name):
+    """Отсеивает заголовки, которые не являются названиями блюд (ссылки, разделители)"""
+    return bool(name) and len(name) >= MIN_NAME_LENGTH and not name.startswith('http') and '#' not in name
+
+
+class DishHtmlParser(HTMLParser):
+    """Событийный разбор экспорта: готовые блюда складываются в self.dishes"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.dishes = deque()
+        self.headings = 0
+        # Примерная позиция в документе (в символах) для ограничения последнего блока
+        self._offset = 0
+        self._block_name = None
+        self._block_start = 0
+        self._paragraphs = []        # [(текст, позиция конца абзаца)]
+        # Текущий заголовок или абзац: тег, первый дочерний узел, текст
+        self._element = None
+        self._first_child = None
+        self._text = []
+
+    # Блоки
+
+    def _close_block(self, limit=None):
+        name = self._block_name
+        if name is not None:
+            paragraphs = [
+                text for text, end in self._paragraphs
+                if limit is None or end - self._block_start <= limit
+            ]
+            description, composition, allergens = classify_paragraphs(paragraphs)
+            if description or composition or allergens:
+                self.dishes.append({
+                    'name': name,
+                    'description': description,
+                    'composition': composition,
+                    'allergens': allergens
+                })
+        self._block_name = None
+        self._paragraphs = []
+
+    def close(self):
+        super().close()
+        self._close_block(limit=LAST_BLOCK_LIMIT)
+
+    # События HTMLParser
+
+    def handle_starttag(self, tag, attrs):
+        self._offset += len(self.get_starttag_text() or '')
+        if self._element is not None:
+            if self._first_child is None:
+                self._first_child = tag
+            return
+        if tag == 'p' or (tag == 'h4' and any(key == 'id' for key, _ in attrs)):
+            self._element = tag
+            self._first_child = None
+            self._text = []
+
+    def handle_endtag(self, tag):
+        self._offset += len(tag) + 3
+        if tag != self._element:
+            return
+        self._element = None
+        if self._first_child != 'span':
+            return
+        text = ''.join(self._text)
+        if tag == 'h4':
+            # Любой заголовок блюда закрывает предыдущий блок
+            self._close_block()
+            self.headings += 1
+            name = _clean(text)
+            if is_dish_name(name):
+                self._block_name = name
+                self._block_start = self._offset
+        elif self._block_name is not None:
+            self._paragraphs.append((text, self._offset))
+
+    def handle_data(self, data):
+        self._offset += len(data)
+        if self._element is not None:
+            if self._first_child is None:
+                self._first_child = '#text'
+            self._text.append(data)
+
+    def handle_comment(self, data):
+        self._offset += len(data) + 7
+
+
+def iter_dishes(chunks):
+    """Выдает записи о блюдах по мере разбора кусков HTML (строк)"""
+    parser = DishHtmlParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        while parser.dishes:
+            yield parser.dishes.popleft()
+    parser.close()
+    while parser.dishes:
+        yield parser.dishes.popleft()
+
+
+def iter_text_chunks(binary_file, encoding='utf-8', chunk_size=READ_CHUNK_SIZE):
+    """Читает двоичный поток кусками текста (многобайтовые символы не разрываются)"""
+    reader = io.TextIOWrapper(binary_file, encoding=encoding, errors='replace')
+    while True:
+        chunk = reader.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Поиск почти одинаковых фотографий блюд по перцептивному хешу.
+
+В выгрузках фото один и тот же снимок часто лежит под двумя именами
+(например, .png и .jpg одного ролла). Для каждого изображения считается
+разностный хеш (dHash, 64 бита): копия 9x8 в оттенках серого, каждый бит -
+сравнение соседних пикселей. Пересжатие, смена формата и размера меняют
+лишь несколько бит, поэтому повторы - это хеши на малом расстоянии
+Хэмминга.
+
+Хеши считаются в пуле процессов прямо из архива, до записи файлов в
+src/assets/menu, и кешируются по CRC файла архива (и по имени файла для
+изображений меню с хешем содержимого). Пары ищутся без полного перебора:
+хеш делится на 4 блока по 16 бит, и у хешей на расстоянии не больше r
+хотя бы один блок отличается не больше чем на r // 4 бит (multi-index
+hashing). Кандидаты берутся из словарей блоков и проверяются точно.
+
+Режимы (--dedup): report - напечатать повторы, collapse - не добавлять
+повторяющиеся фото в меню, off - не искать.
+
+Требуется Pillow (pip install Pillow); без него этап выполняется, только
+если все хеши уже есть в кеше.
+"""
+
+import contextlib
+import json
+import os
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, repeat
+from pathlib import Path
+
+from atomic_io import atomic_open
+from image_store import is_hashed_name
+from instrumentation import count, map_with_stats, timer
+from zip_index import cached_zip_index
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+HASH_SIZE = 8
+HASH_BITS = HASH_SIZE * HASH_SIZE
+INDEX_BLOCKS = 4
+BLOCK_BITS = HASH_BITS // INDEX_BLOCKS
+BLOCK_MASK = (1 << BLOCK_BITS) - 1
+DEFAULT_THRESHOLD = 6
+CACHE_FILE_NAME = '.menu-phash-cache.json'
+
+DEDUP_REPORT = 'report'
+DEDUP_COLLAPSE = 'collapse'
+DEDUP_OFF = 'off'
+DEDUP_MODES = (DEDUP_REPORT, DEDUP_COLLAPSE, DEDUP_OFF)
+
+DedupOptions = namedtuple('DedupOptions', 'mode threshold cache_path jobs')
+
+
+def add_dedup_arguments(parser):
+    """Добавляет в argparse-парсер параметры --dedup и --dedup-threshold"""
+    parser.add_argument('--dedup', choices=DEDUP_MODES, default=DEDUP_REPORT,
+                        help='почти одинаковые фото: report - напечатать, collapse - не добавлять '
+                             'повторы в меню, off - не искать (по умолчанию report)')
+    parser.add_argument('--dedup-threshold', type=int, default=DEFAULT_THRESHOLD, metavar='BITS',
+                        help=f'максимальное число различающихся бит перцептивного хеша '
+                             f'(из {HASH_BITS}, по умолчанию {DEFAULT_THRESHOLD})')
+
+
+def dedup_options(args, cache_dir, jobs=None):
+    """DedupOptions из разобранных аргументов; кеш хешей - в cache_dir"""
+    return DedupOptions(args.dedup, args.dedup_threshold, Path(cache_dir) / CACHE_FILE_NAME, jobs)
+
+
+def dhash(image):
+    """Разностный хеш изображения Pillow (64-битное число)"""
+    # draft() позволяет декодеру JPEG сразу читать уменьшенную копию
+    image.draft('RGB', (HASH_SIZE * 8, HASH_SIZE * 8))
+    if image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info:
+        # Прозрачный фон PNG - на белом, как у JPEG-версии того же снимка
+        image = image.convert('RGBA')
+        background = Image.new('RGBA', image.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(background, image)
+    small = image.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.BOX)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = value << 1 | (pixels[offset + col] < pixels[offset + col + 1])
+    return value
+
+
+def image_hash(source):
+    """(dHash, число пикселей) для пути или открытого файла"""
+    with Image.open(source) as image:
+        width, height = image.size
+        value = dhash(image)
+    count('images.phash_computed')
+    return value, width * height
+
+
+def _hash_batch(zip_path, sources):
+    """Обертка для пула процессов: [(хеш, пиксели, ошибка)] для файлов архива или путей"""
+    results = []
+    with zipfile.ZipFile(zip_path, 'r') if zip_path else contextlib.nullcontext() as zip_ref:
+        for source in sources:
+            try:
+                if zip_ref is None:
+                    value, pixels = image_hash(source)
+                else:
+                    with zip_ref.open(source) as f:
+                        value, pixels = image_hash(f)
+                results.append((value, pixels, None))
+            except Exception as e:
+                results.append((None, None, str(e)))
+    return results
+
+
+def hash_sources(sources, zip_path=None, jobs=None):
+    """Считает хеши параллельно; возвращает [(хеш, пиксели, ошибка)] в порядке sources"""
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(sources) < 2:
+        return _hash_batch(zip_path, sources)
+    # Каждая часть открывает архив один раз; частей больше, чем процессов, для баланса
+    size = max(1, len(sources) // (jobs * 4))
+    chunks = [sources[i:i + size] for i in range(0, len(sources), size)]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(chunks))) as executor:
+        batches = map_with_stats(executor, _hash_batch, repeat(zip_path), chunks)
+    return [result for batch in batches for result in batch]
+
+
+def _block_flips(radius):
+    """Маски, меняющие в блоке не больше radius бит (включая пустую)"""
+    masks = [0]
+    for bits in range(1, radius + 1):
+        for positions in combinations(range(BLOCK_BITS), bits):
+            mask = 0
+            for position in positions:
+                mask |= 1 << position
+            masks.append(mask)
+    return masks
+
+
+class HashIndex:
+    """Поиск хешей на расстоянии Хэмминга не больше threshold (multi-index hashing)"""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._flips = _block_flips(threshold // INDEX_BLOCKS)
+        self._tables = [{} for _ in range(INDEX_BLOCKS)]
+        self._hashes = []
+        self._keys = []
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def add(self, value, key):
+        position = len(self._hashes)
+        self._hashes.append(value)
+        self._keys.append(key)
+        for i, table in enumerate(self._tables):
+            table.setdefault(value >> (i * BLOCK_BITS) & BLOCK_MASK, []).append(position)
+
+    def find(self, value):
+        """Ключи близких хешей: [(расстояние, ключ)]"""
+        candidates = set()
+        for i, table in enumerate(self._tables):
+            block = value >> (i * BLOCK_BITS) & BLOCK_MASK
+            for flip in self._flips:
+                positions = table.get(block ^ flip)
+                if positions:
+                    candidates.update(positions)
+        hashes = self._hashes
+        found = []
+        for position in candidates:
+            distance = (hashes[position] ^ value).bit_count()
+            if distance <= self.threshold:
+                found.append((distance, self._keys[position]))
+        return found
+
+
+def duplicate_groups(hashes, threshold=DEFAULT_THRESHOLD):
+    """Группы ключей с близкими хешами
+
+    hashes - последовательность (ключ, хеш). Возвращает группы из двух и
+    более ключей в порядке входа; близость транзитивна (a~b, b~c -> одна группа).
+    """
+    index = HashIndex(threshold)
+    parent = {}
+
+    def root(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    order = []
+    for key, value in hashes:
+        parent[key] = key
+        order.append(key)
+        for _, other in index.find(value):
+            a, b = root(key), root(other)
+            if a != b:
+                parent[a] = b
+        index.add(value, key)
+
+    groups = {}
+    for key in order:
+        groups.setdefault(root(key), []).append(key)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def load_cache(cache_path):
+    """Читает кеш ключ -> [хеш в hex, пиксели]"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache_path, cache):
+    """Атомарно сохраняет кеш"""
+    with atomic_open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, sort_keys=True)
+
+
+@timer('images.dedup')
+def find_duplicates(zip_path, members, options, existing_images=()):
+    """Находит фото архива, повторяющие другие фото архива или изображения меню
+
+    members - имена файлов в архиве (в порядке архива), existing_images -
+    пути к изображениям, которые уже есть в меню. Печатает найденные повторы
+    и возвращает {файл архива: оригинал}. Оригинал - изображение меню, а
+    если его нет в группе - фото архива с наибольшим разрешением (при
+    равенстве - первое в архиве).
+    """
+    if options is None or options.mode == DEDUP_OFF or not members:
+        return {}
+
+    zip_index = cached_zip_index(zip_path)
+    cache = load_cache(options.cache_path) if options.cache_path else {}
+
+    # Ключ кеша: CRC и размер для файлов архива, имя - для изображений с хешем содержимого
+    keys = {}
+    for member in members:
+        entry = zip_index.get(member)
+        keys[member] = f'zip:{entry.crc:08x}:{entry.file_size}' if entry else None
+    for path in existing_images:
+        keys[path] = f'file:{path.name}' if is_hashed_name(path.name) else None
+
+    missing_members = [member for member in members if keys[member] not in cache]
+    missing_files = [path for path in existing_images if keys[path] not in cache]
+    if Image is None and (missing_members or missing_files):
+        print('⚠ Pillow не установлен, поиск одинаковых фото пропускается')
+        return {}
+    hashes = {}
+    for sources, archive in ((missing_members, zip_path), (missing_files, None)):
+        for source, (value, pixels, error) in zip(sources, hash_sources(sources, archive, options.jobs)):
+            if error:
+                print(f'✗ Не удалось посчитать хеш {source}: {error}')
+                continue
+            hashes[source] = (value, pixels)
+            if keys[source] is not None:
+                cache[keys[source]] = [f'{value:016x}', pixels]
+    for source, key in keys.items():
+        if source not in hashes and key in cache:
+            value, pixels = cache[key]
+            hashes[source] = (int(value, 16), pixels)
+
+    if options.cache_path:
+        used = set(keys.values())
+        save_cache(options.cache_path, {key: value for key, value in cache.items() if key in used})
+
+    # Изображения меню идут первыми: при повторе остаются они
+    ordered = [(path, hashes[path][0]) for path in existing_images if path in hashes]
+    ordered += [(member, hashes[member][0]) for member in members if member in hashes]
+    existing = set(existing_images)
+    duplicates = {}
+    for group in duplicate_groups(ordered, options.threshold):
+        new = [key for key in group if key not in existing]
+        if not new:
+            continue
+        kept = [key for key in group if key in existing]
+        original = kept[0] if kept else max(new, key=lambda key: hashes[key][1])
+        for key in new:
+            if key != original:
+                duplicates[key] = original
+    count('images.duplicates', len(duplicates))
+
+    def display(key):
+        return key.name if key in existing else zip_index.fixed_name(key)
+
+    for member, original in duplicates.items():
+        distance = (hashes[member][0] ^ hashes[original][0]).bit_count()
+        print(f'≈ {display(member)} повторяет {display(original)} (различается бит: {distance})')
+    if duplicates:
+        action = 'не добавляются' if options.mode == DEDUP_COLLAPSE else 'для удаления используйте --dedup collapse'
+        print(f'Найдено почти одинаковых фото: {len(duplicates)} ({action})')
+    return duplicates
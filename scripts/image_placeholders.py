@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Заглушки низкого качества (LQIP) для фотографий блюд.
+
+Для каждого изображения создается крошечная миниатюра (до 16 пикселей по
+большей стороне) в WebP и встраивается в menu.json как data URI в поле
+placeholder (~200 байт). Сетка меню показывает ее размытой сразу, пока
+грузится полноразмерное фото. Заглушки считаются пакетно в пуле процессов
+и кешируются по хешу содержимого изображения.
+
+Требуется Pillow (pip install Pillow); без него этап пропускается.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from atomic_io import atomic_open
+from instrumentation import count, map_with_stats, timer
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 30
+CACHE_FILE_NAME = '.menu-placeholders-cache.json'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_hash(path):
+    """SHA-1 содержимого файла (ключ кеша)"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+        count('bytes_read', f.tell())
+    return digest.hexdigest()
+
+
+def make_placeholder(source_path):
+    """Строит data URI с крошечной WebP-миниатюрой изображения"""
+    with Image.open(source_path) as image:
+        # draft() позволяет декодеру JPEG сразу читать уменьшенную копию
+        image.draft('RGB', (PLACEHOLDER_SIZE * 4, PLACEHOLDER_SIZE * 4))
+        image = image.convert('RGB')
+        image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.BILINEAR)
+        buffer = io.BytesIO()
+        image.save(buffer, 'WEBP', quality=PLACEHOLDER_QUALITY, method=6)
+    count('images.placeholders_computed')
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def _make_placeholder_safe(source_path):
+    """Обертка для пула процессов: возвращает (заглушка, ошибка)"""
+    try:
+        return make_placeholder(source_path), None
+    except Exception as e:
+        return None, str(e)
+
+
+def load_cache(cache_path):
+    """Читает кеш хеш -> заглушка"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache_path, cache):
+    """Атомарно сохраняет кеш"""
+    with atomic_open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, sort_keys=True)
+
+
+@timer('images.placeholders')
+def generate_placeholders(menu_dir, dishes, cache_path, jobs=None):
+    """Записывает заглушки в поле placeholder блюд
+
+    Возвращает (число блюд с заглушкой, число заново посчитанных заглушек).
+    """
+    if Image is None:
+        print('⚠ Pillow не установлен, заглушки изображений не создаются')
+        return 0, 0
+
+    menu_dir = Path(menu_dir)
+    cache = load_cache(cache_path)
+
+    # Хешируем все изображения; считаем заглушки только для новых хешей
+    hashes = {}
+    for dish in dishes:
+        image = dish.get('image')
+        if not image:
+            continue
+        source = menu_dir / image.split('/', 1)[-1]
+        if source not in hashes and source.exists():
+            hashes[source] = file_hash(source)
+
+    missing = {}
+    for source, digest in hashes.items():
+        if digest not in cache:
+            missing.setdefault(digest, source)
+
+    paths = list(missing.values())
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(paths) < 2:
+        results = [_make_placeholder_safe(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = map_with_stats(executor, _make_placeholder_safe, paths,
+                                     chunksize=max(1, len(paths) // (jobs * 4)))
+
+    for digest, source, (placeholder, error) in zip(missing, paths, results):
+        if error:
+            print(f'✗ Ошибка при создании заглушки {source.name}: {error}')
+            continue
+        cache[digest] = placeholder
+
+    done = 0
+    for dish in dishes:
+        image = dish.get('image')
+        if not image:
+            continue
+        digest = hashes.get(menu_dir / image.split('/', 1)[-1])
+        if digest in cache:
+            dish['placeholder'] = cache[digest]
+            done += 1
+
+    # В кеше оставляем только заглушки текущих изображений
+    used = set(hashes.values())
+    save_cache(cache_path, {digest: value for digest, value in cache.items() if digest in used})
+    return done, len(paths)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Изображения блюд с именами по хешу содержимого.
+
+Фото из архива сохраняется как "<безопасное имя>.<12 символов SHA-256>.jpg":
+переснятое фото получает новый URL, поэтому nginx отдает такие файлы как
+immutable на год (см. add-nginx-config.sh), а телефоны не показывают
+старую картинку. Версии для srcset (image_variants.py) называются по
+имени исходника и тоже содержат хеш.
+
+Манифест menu.images.json рядом с menu.json хранит id блюда -> путь к
+изображению и версиям, а также файлы, на которые меню больше не
+ссылается, и время, с которого они не нужны. Такие файлы удаляются не
+сразу, а через GC_GRACE_PERIOD: клиенты со старым menu.json еще успевают
+их загрузить.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from data_io import read_data, write_data
+from instrumentation import count, timer
+from zip_index import stream_member
+
+HASH_LENGTH = 12
+IMAGE_MANIFEST_FILE_NAME = 'menu.images.json'
+IMAGE_MANIFEST_VERSION = 1
+GC_GRACE_PERIOD = 7 * 24 * 3600
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# "Имя.0123456789ab.jpg" и версии "Имя.0123456789ab-640.webp"
+_HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{%d}(?:-\d+)?\.[A-Za-z0-9]+$' % HASH_LENGTH)
+
+
+def hashed_file_name(stem, digest, ext):
+    """Имя файла с хешем содержимого: stem.<хеш>ext"""
+    return f'{stem}.{digest[:HASH_LENGTH]}{ext}'
+
+
+def is_hashed_name(file_name):
+    """Содержит ли имя файла хеш содержимого"""
+    return _HASHED_NAME_RE.search(file_name) is not None
+
+
+def store_member(zip_ref, member, menu_dir, stem, ext):
+    """Распаковывает файл из архива под именем с хешем содержимого; возвращает имя
+
+    Хеш считается по ходу распаковки. Если файл с таким содержимым уже
+    есть, он не перезаписывается (и его версии остаются актуальными).
+    Временный файл уникален: при --jobs одно имя могут распаковывать
+    несколько процессов сразу.
+    """
+    digest = hashlib.sha256()
+    fd, incoming = tempfile.mkstemp(dir=menu_dir, prefix=f'.{stem}{ext}.', suffix='.incoming')
+    os.close(fd)
+    try:
+        stream_member(zip_ref, member, incoming, digest=digest)
+        file_name = hashed_file_name(stem, digest.hexdigest(), ext)
+        target = Path(menu_dir) / file_name
+        if not target.exists():
+            os.replace(incoming, target)
+    finally:
+        # Такой файл уже есть или распаковка не удалась
+        if os.path.exists(incoming):
+            os.unlink(incoming)
+    return file_name
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+        count('bytes_read', f.tell())
+    return digest.hexdigest()
+
+
+@timer('images.hash')
+def hash_existing_images(menu_dir, dishes):
+    """Переводит изображения со старыми именами на имена с хешем
+
+    Создается копия (жесткая ссылка) под новым именем, старый файл
+    удаляется сборщиком мусора после GC_GRACE_PERIOD. Возвращает число
+    блюд, у которых изменился путь к изображению.
+    """
+    menu_dir = Path(menu_dir)
+    renamed = {}
+    changed = 0
+    for dish in dishes:
+        image = dish.get('image')
+        if not image:
+            continue
+        prefix, _, file_name = image.rpartition('/')
+        if is_hashed_name(file_name):
+            continue
+        if file_name not in renamed:
+            source = menu_dir / file_name
+            if not source.exists():
+                continue
+            path = Path(file_name)
+            new_name = hashed_file_name(path.stem, _file_sha256(source), path.suffix)
+            target = menu_dir / new_name
+            if not target.exists():
+                try:
+                    os.link(source, target)
+                except OSError:
+                    shutil.copy2(source, target)
+            renamed[file_name] = new_name
+        dish['image'] = f'{prefix}/{renamed[file_name]}' if prefix else renamed[file_name]
+        changed += 1
+    return changed
+
+
+def _relative_path(image_path):
+    """Путь из menu.json ("images/variants/x.webp") -> путь в директории изображений"""
+    return image_path.split('/', 1)[-1]
+
+
+def load_image_manifest(manifest_path):
+    """Читает манифест; пустой, если его нет или он поврежден"""
+    try:
+        manifest = read_data(manifest_path)
+        if manifest.get('version') == IMAGE_MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {'version': IMAGE_MANIFEST_VERSION, 'images': {}, 'orphans': {}}
+
+
+def _iter_image_files(menu_dir):
+    """Файлы изображений и версий (без скрытых и временных)"""
+    for directory in (menu_dir, menu_dir / 'variants'):
+        if not directory.is_dir():
+            continue
+        for path in directory.iterdir():
+            if path.is_file() and not path.name.startswith('.'):
+                yield path
+
+
+@timer('images.gc')
+def update_image_manifest(menu_dir, dishes, manifest_path, grace_period=GC_GRACE_PERIOD, now=None):
+    """Записывает манифест изображений и удаляет давно ненужные файлы
+
+    Возвращает (удаленные файлы, число файлов, ожидающих удаления).
+    """
+    menu_dir = Path(menu_dir)
+    now = time.time() if now is None else now
+    manifest = load_image_manifest(manifest_path)
+
+    images = {}
+    referenced = set()
+    for dish in dishes:
+        image = dish.get('image')
+        if not image:
+            continue
+        variants = [variant['path'] for variant in dish.get('image_variants') or []]
+        images[str(dish['id'])] = {'image': image, 'variants': variants}
+        referenced.add(_relative_path(image))
+        referenced.update(_relative_path(path) for path in variants)
+
+    orphans = {}
+    removed = []
+    for path in _iter_image_files(menu_dir):
+        relative = path.relative_to(menu_dir).as_posix()
+        if relative in referenced:
+            continue
+        since = manifest['orphans'].get(relative, now)
+        if now - since >= grace_period:
+            path.unlink()
+            removed.append(relative)
+        else:
+            orphans[relative] = since
+    count('images.gc_removed', len(removed))
+
+    write_data(manifest_path, {
+        'version': IMAGE_MANIFEST_VERSION,
+        'images': images,
+        'orphans': orphans,
+    })
+    return removed, len(orphans)
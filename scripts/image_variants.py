@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Адаптивные версии фотографий блюд для srcset.
+
+Для каждого изображения из src/assets/menu создаются уменьшенные копии
+нескольких ширин в WebP и JPEG (запасной вариант для старых браузеров)
+в подкаталоге variants/. Актуальные копии не пересоздаются. Список версий
+с размерами в байтах записывается в поле image_variants каждого блюда.
+Ненужные версии удаляет сборщик мусора изображений (image_store.py).
+
+Требуется Pillow (pip install Pillow); без него этап пропускается.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from instrumentation import count, map_with_stats, timer
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+VARIANTS_DIR_NAME = 'variants'
+VARIANT_WIDTHS = (320, 640, 1280)
+VARIANT_FORMATS = (
+    # (расширение, формат Pillow, параметры сохранения)
+    ('webp', 'WEBP', {'quality': 75, 'method': 4}),
+    ('jpg', 'JPEG', {'quality': 80, 'optimize': True, 'progressive': True}),
+)
+# Цвет фона карточек меню: на него накладываются PNG с прозрачностью для JPEG
+JPEG_BACKGROUND = (0xee, 0xec, 0xdd)
+
+
+def variant_path(variants_dir, stem, width, ext):
+    """Путь к версии изображения заданной ширины"""
+    return variants_dir / f'{stem}-{width}.{ext}'
+
+
+def target_widths(source_width):
+    """Ширины версий без увеличения исходника"""
+    widths = [w for w in VARIANT_WIDTHS if w < source_width]
+    # Исходник уже маленький - делаем одну версию в исходной ширине
+    if not widths or source_width <= VARIANT_WIDTHS[-1]:
+        widths.append(min(source_width, VARIANT_WIDTHS[-1]))
+    return sorted(set(widths))
+
+
+def _is_up_to_date(path, source_mtime):
+    """Версия существует и не старше исходника"""
+    try:
+        return path.stat().st_mtime >= source_mtime
+    except FileNotFoundError:
+        return False
+
+
+def build_variants(source_path, variants_dir):
+    """Создает недостающие версии одного изображения и возвращает их список
+
+    Выполняется в отдельном процессе.
+    """
+    source_path = Path(source_path)
+    variants_dir = Path(variants_dir)
+    source_mtime = source_path.stat().st_mtime
+    stem = source_path.stem
+
+    with Image.open(source_path) as image:
+        widths = target_widths(image.width)
+        missing = [
+            (width, ext, fmt, params)
+            for width in widths
+            for ext, fmt, params in VARIANT_FORMATS
+            if not _is_up_to_date(variant_path(variants_dir, stem, width, ext), source_mtime)
+        ]
+        if missing:
+            image.load()
+            count('bytes_read', source_path.stat().st_size)
+            if image.mode not in ('RGB', 'RGBA'):
+                has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+                image = image.convert('RGBA' if has_alpha else 'RGB')
+
+            resized = {}
+            for width, ext, fmt, params in missing:
+                if width not in resized:
+                    height = max(1, round(image.height * width / image.width))
+                    resized[width] = image.resize((width, height), Image.LANCZOS)
+                frame = resized[width]
+                if fmt == 'JPEG' and frame.mode == 'RGBA':
+                    background = Image.new('RGB', frame.size, JPEG_BACKGROUND)
+                    background.paste(frame, mask=frame.getchannel('A'))
+                    frame = background
+                target = variant_path(variants_dir, stem, width, ext)
+                tmp_target = target.with_name(f'.{target.name}.tmp')
+                frame.save(tmp_target, fmt, **params)
+                os.replace(tmp_target, target)
+                count('images.variants_written')
+                count('bytes_written', target.stat().st_size)
+
+    variants = []
+    for width in widths:
+        for ext, _, _ in VARIANT_FORMATS:
+            path = variant_path(variants_dir, stem, width, ext)
+            variants.append({
+                'width': width,
+                'format': ext,
+                'path': f'images/{VARIANTS_DIR_NAME}/{path.name}',
+                'bytes': path.stat().st_size
+            })
+    return variants
+
+
+@timer('images.variants')
+def generate_variants(menu_dir, dishes, jobs=None):
+    """Создает версии изображений для блюд и записывает их в image_variants
+
+    Возвращает число блюд, для которых версии доступны.
+    """
+    if Image is None:
+        print('⚠ Pillow не установлен, адаптивные версии изображений не создаются')
+        return 0
+
+    menu_dir = Path(menu_dir)
+    variants_dir = menu_dir / VARIANTS_DIR_NAME
+    variants_dir.mkdir(parents=True, exist_ok=True)
+
+    sources = {}
+    for dish in dishes:
+        image = dish.get('image')
+        if image:
+            source = menu_dir / image.split('/', 1)[-1]
+            if source.exists():
+                sources.setdefault(source, []).append(dish)
+
+    jobs = jobs or os.cpu_count() or 1
+    paths = list(sources)
+    if jobs <= 1 or len(paths) < 2:
+        results = [_build_variants_safe(path, variants_dir) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = map_with_stats(
+                executor, _build_variants_safe, paths, [variants_dir] * len(paths),
+                chunksize=max(1, len(paths) // (jobs * 4)))
+
+    done = 0
+    for source, (variants, error) in zip(paths, results):
+        if error:
+            print(f'✗ Ошибка при создании версий {source.name}: {error}')
+            continue
+        for dish in sources[source]:
+            dish['image_variants'] = variants
+            done += 1
+
+    return done
+
+
+def _build_variants_safe(source_path, variants_dir):
+    """Обертка для пула процессов: возвращает (версии, ошибка)"""
+    try:
+        return build_variants(source_path, variants_dir), None
+    except Exception as e:
+        return None, str(e)
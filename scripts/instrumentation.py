@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Замеры выполнения скриптов меню: таймеры этапов, счетчики и совпадения.
+
+Общие модули (zip_index, atomic_io, data_io, классификатор, индексы) сами
+отмечают свою работу, поэтому любой скрипт видит, куда ушло время:
+чтение каталога архива, распаковка, запись файлов, классификация,
+сериализация JSON.
+
+- timer(name) - контекстный менеджер и декоратор; вложенные таймеры
+  образуют путь "zip.extract/zip.decompress";
+- count(name, amount) - счетчик (bytes_read, bytes_written, zip.members...);
+- record_match(matcher, matched) - совпадения и промахи сопоставителя.
+
+Скрипты вызывают start_run(args) после разбора аргументов
+(add_profile_arguments добавляет параметры):
+
+    --profile-report FILE   записать JSON-отчет о запуске
+    --profile [FILE]        включить выборочный профилировщик (SIGPROF);
+                            с FILE - сохранить стеки в формате collapsed
+                            для flamegraph.pl и speedscope
+
+Процессы пулов считают свою работу отдельно: call_with_stats возвращает
+их счетчики вместе с результатом, а merge_stats (или map_with_stats
+вместо executor.map) добавляет их к текущему этапу. Время воркеров
+суммируется и может превышать время этапа.
+"""
+
+import atexit
+import os
+import platform
+import signal
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+
+REPORT_VERSION = 1
+PROFILE_INTERVAL = 0.005
+PROFILE_TOP = 15
+
+
+class RunStats:
+    """Время этапов, счетчики и совпадения одного процесса"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.timings = {}  # путь этапа -> [секунды, вызовы]
+        self.counters = Counter()
+        self.matches = Counter()  # (сопоставитель, совпало) -> число
+        self._stack = []
+
+    def _path(self, name):
+        return '/'.join(self._stack + [name]) if self._stack else name
+
+    @contextmanager
+    def timer(self, name):
+        self._stack.append(name)
+        # Запись создается при входе: в отчете этапы идут в порядке начала
+        record = self.timings.setdefault('/'.join(self._stack), [0.0, 0])
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record[0] += time.perf_counter() - start
+            record[1] += 1
+            self._stack.pop()
+
+    def add_time(self, name, seconds, calls=1):
+        record = self.timings.setdefault(self._path(name), [0.0, 0])
+        record[0] += seconds
+        record[1] += calls
+
+    def export(self):
+        """Снимок для передачи из процесса пула (только встроенные типы)"""
+        return {
+            'timings': self.timings,
+            'counters': dict(self.counters),
+            'matches': [[matcher, matched, n] for (matcher, matched), n in self.matches.items()],
+        }
+
+    def merge(self, exported):
+        """Добавляет снимок другого процесса к текущему этапу"""
+        for path, (seconds, calls) in exported['timings'].items():
+            self.add_time(path, seconds, calls)
+        self.counters.update(exported['counters'])
+        for matcher, matched, n in exported['matches']:
+            self.matches[matcher, matched] += n
+
+
+_stats = RunStats()
+
+
+def timer(name):
+    """Замеряет этап: with timer('menu.save'): ... или @timer('menu.save')"""
+    return _stats.timer(name)
+
+
+def add_time(name, seconds, calls=1):
+    """Добавляет время, замеренное вручную (например, в цикле по блокам)"""
+    _stats.add_time(name, seconds, calls)
+
+
+def count(name, amount=1):
+    _stats.counters[name] += amount
+
+
+def record_match(matcher, matched):
+    _stats.matches[matcher, bool(matched)] += 1
+
+
+def call_with_stats(func, *args):
+    """Выполняет func в процессе пула; возвращает (результат, снимок счетчиков)"""
+    _stats.reset()
+    result = func(*args)
+    return result, _stats.export()
+
+
+def merge_stats(exported):
+    _stats.merge(exported)
+
+
+def map_with_stats(executor, func, *iterables, **kwargs):
+    """executor.map, переносящий счетчики процессов пула в текущий этап"""
+    results = []
+    for result, exported in executor.map(partial(call_with_stats, func), *iterables, **kwargs):
+        merge_stats(exported)
+        results.append(result)
+    return results
+
+
+# Выборочный профилировщик
+
+class SamplingProfiler:
+    """Снимает стек главного потока по сигналу SIGPROF (процессорное время)"""
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self._labels = {}
+        self._previous_handler = None
+
+    def start(self):
+        """Запускает таймер; False, если платформа не поддерживает setitimer"""
+        if not hasattr(signal, 'setitimer'):
+            return False
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        return True
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f'{os.path.basename(code.co_filename)}:{code.co_name}'
+            self._labels[code] = label
+        return label
+
+    def _sample(self, signum, frame):
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        self.stacks[';'.join(labels)] += 1
+
+    @property
+    def samples(self):
+        return sum(self.stacks.values())
+
+    def top(self, limit=PROFILE_TOP):
+        """Функции с наибольшим числом собственных выборок: [(функция, выборки)]"""
+        own = Counter()
+        for stack, n in self.stacks.items():
+            own[stack.rsplit(';', 1)[-1]] += n
+        return own.most_common(limit)
+
+    def write_collapsed(self, path):
+        """Стеки в формате "a;b;c N" (flamegraph.pl, speedscope)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f'{stack} {n}\n')
+
+
+# Отчет о запуске
+
+def add_profile_arguments(parser):
+    """Добавляет в argparse-парсер параметры --profile-report и --profile"""
+    parser.add_argument('--profile-report', type=Path, metavar='FILE',
+                        help='записать JSON-отчет: время этапов, счетчики, совпадения')
+    parser.add_argument('--profile', nargs='?', const='', metavar='FILE',
+                        help='включить выборочный профилировщик; с FILE - записать стеки '
+                             'в формате collapsed (flamegraph.pl, speedscope)')
+
+
+def start_run(args, script=None):
+    """Начинает замер запуска; сводка и отчет выводятся при выходе из процесса"""
+    report_path = getattr(args, 'profile_report', None)
+    profile = getattr(args, 'profile', None)
+    profiler = None
+    if profile is not None:
+        profiler = SamplingProfiler()
+        if not profiler.start():
+            print('⚠ Выборочный профилировщик недоступен на этой платформе (нет setitimer)')
+            profiler = None
+
+    _stats.reset()
+    run = {
+        'script': script or Path(sys.argv[0]).stem,
+        'argv': sys.argv[1:],
+        'started': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'start': time.perf_counter(),
+    }
+    if report_path is not None or profile is not None:
+        atexit.register(finish_run, run, report_path, profiler, profile or None)
+
+
+def build_report(run, profiler=None):
+    """Отчет о запуске в виде dict"""
+    report = {
+        'version': REPORT_VERSION,
+        'script': run['script'],
+        'argv': run['argv'],
+        'started': run['started'],
+        'seconds': round(time.perf_counter() - run['start'], 6),
+        'python': platform.python_version(),
+        'stages': {
+            path: {'seconds': round(seconds, 6), 'calls': calls}
+            for path, (seconds, calls) in _stats.timings.items()
+        },
+        'counters': dict(sorted(_stats.counters.items())),
+        'matchers': {},
+    }
+    for (matcher, matched), n in sorted(_stats.matches.items()):
+        entry = report['matchers'].setdefault(matcher, {'matches': 0, 'misses': 0})
+        entry['matches' if matched else 'misses'] += n
+    if profiler is not None:
+        samples = profiler.samples
+        report['profile'] = {
+            'interval': profiler.interval,
+            'samples': samples,
+            'top': [
+                {'function': function, 'samples': n, 'percent': round(n * 100 / samples, 1)}
+                for function, n in profiler.top()
+            ],
+        }
+    return report
+
+
+def print_report(report):
+    """Печатает сводку: этапы с вложенностью, счетчики, совпадения, горячие функции"""
+    print(f"\nПрофиль выполнения ({report['seconds']:.2f} с):")
+    for path, stage in report['stages'].items():
+        depth = path.count('/')
+        name = '  ' * depth + path.rsplit('/', 1)[-1]
+        print(f"  {name:<40} {stage['seconds']:9.3f} с  × {stage['calls']}")
+    if report['counters']:
+        print('Счетчики:')
+        for name, value in report['counters'].items():
+            print(f'  {name:<40} {value:,}')
+    if report['matchers']:
+        print('Совпадения:')
+        for matcher, entry in report['matchers'].items():
+            print(f"  {matcher:<40} найдено {entry['matches']:,}, промахов {entry['misses']:,}")
+    profile = report.get('profile')
+    if profile:
+        print(f"Горячие функции ({profile['samples']} выборок по {profile['interval'] * 1000:.0f} мс):")
+        for entry in profile['top']:
+            print(f"  {entry['function']:<50} {entry['percent']:5.1f}%")
+
+
+def finish_run(run, report_path=None, profiler=None, collapsed_path=None):
+    """Останавливает профилировщик, печатает сводку и записывает отчет"""
+    if profiler is not None:
+        profiler.stop()
+        if collapsed_path:
+            profiler.write_collapsed(collapsed_path)
+    report = build_report(run, profiler)
+    print_report(report)
+    if report_path is not None:
+        # data_io сам использует счетчики этого модуля - импортируем при выходе
+        from data_io import write_data
+        write_data(report_path, report)
+        print(f'Отчет о выполнении записан в {report_path}')
+    if collapsed_path:
+        print(f'Стеки профилировщика записаны в {collapsed_path}')
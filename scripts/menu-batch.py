@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Пакетная сборка меню нескольких заведений в пуле процессов.
+
+Каждое заведение описывается JSON-файлом в директории конфигураций
+(пути - относительно файла конфигурации):
+
+    {
+      "name": "sapiens",                      (по умолчанию - имя файла)
+      "zip": "sapiens/photo.zip",             архив с фотографиями
+      "html_zip": "sapiens/export.zip",       HTML-экспорт техкарт
+      "txt": "sapiens/spec.txt",              текстовая техкарта
+      "pdf": "sapiens/menu.pdf",              PDF с ценами
+      "output": "../build/sapiens",           куда писать menu.json (и public/menu-data/)
+      "menu_dir": "../build/sapiens/images",  изображения (по умолчанию output/images)
+      "builtin_prices": true                  встроенный список цен, если в PDF нет текста
+    }
+
+Директория результата заведения устроена как корень проекта:
+
+    output/menu.json                 меню
+    output/public/menu-data/         индекс, шарды и поисковый индекс
+                                     (menu_shards.shards_dir_for)
+    output/images/                   изображения, если не задан menu_dir
+    output/menu-build.log            вывод сборки
+    output/.menu-*.json              состояние сборки и кеши
+
+Необязательные источники можно не указывать - соответствующий этап
+пропускается. Встроенный список цен - цены Sapiens, поэтому по умолчанию
+он отключен: если в PDF заведения нет текстового слоя, сборка заведения
+завершается ошибкой. Сборка каждого заведения - та же, что в menu-build.py
+(с состоянием сборки и пропуском неизмененных этапов), вывод пишется в
+output/menu-build.log. Ошибка одного заведения не останавливает
+остальные; в конце печатается сводка по времени.
+
+    python3 scripts/menu-batch.py venues/ [--jobs 8] [--only sapiens]
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import sys
+import time
+import traceback
+from argparse import Namespace
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from data_io import add_format_argument
+from image_dedup import add_dedup_arguments
+from instrumentation import add_profile_arguments, call_with_stats, merge_stats, start_run
+
+SCRIPTS_DIR = Path(__file__).parent
+LOG_FILE_NAME = 'menu-build.log'
+SOURCE_KEYS = ('zip', 'html_zip', 'txt', 'pdf')
+
+
+def load_script(name):
+    """Импортирует скрипт с дефисами в имени как модуль"""
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+build_script = load_script('menu-build')
+
+Venue = namedtuple('Venue', 'name config zip html_zip txt pdf output menu_dir builtin_prices')
+VenueResult = namedtuple('VenueResult', 'name summary error seconds')
+
+
+class VenueConfigError(Exception):
+    """Некорректная конфигурация заведения"""
+
+
+def load_venue(config_path):
+    """Читает конфигурацию заведения; пути приводятся к абсолютным"""
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        raise VenueConfigError(f'не удалось прочитать {config_path.name}: {e}')
+    if not isinstance(config, dict):
+        raise VenueConfigError(f'{config_path.name}: ожидается JSON-объект')
+
+    base_dir = config_path.parent
+
+    def resolve(key):
+        value = config.get(key)
+        return (base_dir / value).resolve() if value else None
+
+    sources = {key: resolve(key) for key in SOURCE_KEYS}
+    for key, path in sources.items():
+        if path is not None and not path.exists():
+            raise VenueConfigError(f'{config_path.name}: файл {key} не найден: {path}')
+    if not any(sources.values()):
+        raise VenueConfigError(f'{config_path.name}: не задан ни один источник ({", ".join(SOURCE_KEYS)})')
+
+    output = resolve('output')
+    if output is None:
+        raise VenueConfigError(f'{config_path.name}: не задан output')
+    builtin_prices = config.get('builtin_prices', False)
+    if not isinstance(builtin_prices, bool):
+        raise VenueConfigError(f'{config_path.name}: builtin_prices должен быть true или false')
+    return Venue(
+        name=config.get('name') or config_path.stem,
+        config=config_path,
+        output=output,
+        menu_dir=resolve('menu_dir') or output / 'images',
+        builtin_prices=builtin_prices,
+        **sources,
+    )
+
+
+def load_venues(config_dir):
+    """Читает все *.json из директории; возвращает (заведения, ошибки конфигураций)"""
+    venues = []
+    errors = []
+    for config_path in sorted(Path(config_dir).glob('*.json')):
+        try:
+            venues.append(load_venue(config_path))
+        except VenueConfigError as e:
+            errors.append(VenueResult(config_path.stem, None, str(e), 0.0))
+    return venues, errors
+
+
+def venue_build_args(venue, options):
+    """Аргументы menu-build.py для заведения"""
+    return Namespace(
+        menu=venue.output / 'menu.json',
+        menu_dir=venue.menu_dir,
+        zip=venue.zip,
+        html_zip=venue.html_zip,
+        txt=venue.txt,
+        pdf=venue.pdf,
+        builtin_prices=venue.builtin_prices,
+        jobs=options.venue_jobs,
+        no_cache=options.no_cache,
+        force=options.force,
+        dedup=options.dedup,
+        dedup_threshold=options.dedup_threshold,
+        format=options.format,
+    )
+
+
+def build_venue(venue, options):
+    """Собирает меню одного заведения (в процессе пула); вывод - в лог заведения"""
+    start = time.perf_counter()
+    try:
+        venue.output.mkdir(parents=True, exist_ok=True)
+        with open(venue.output / LOG_FILE_NAME, 'w', encoding='utf-8') as log:
+            with contextlib.redirect_stdout(log):
+                try:
+                    summary = build_script.build(venue_build_args(venue, options))
+                except Exception:
+                    traceback.print_exc(file=log)
+                    raise
+        return VenueResult(venue.name, summary, None, time.perf_counter() - start)
+    except Exception as e:
+        return VenueResult(venue.name, None, f'{type(e).__name__}: {e}', time.perf_counter() - start)
+
+
+def print_result(result):
+    if result.error:
+        print(f'✗ {result.name}: {result.error}')
+    else:
+        summary = result.summary
+        state = f"изменений {summary['changes']}" if summary['saved'] else 'без изменений'
+        print(f"✓ {result.name}: {summary['items']} блюд, {state} ({result.seconds:.2f} с)")
+
+
+def print_summary(results, wall_seconds):
+    """Сводка по заведениям и общее время"""
+    failed = [result for result in results if result.error]
+    print()
+    print('=' * 60)
+    print(f'Заведений: {len(results)}, успешно: {len(results) - len(failed)}, с ошибками: {len(failed)}')
+    print(f"  {'Заведение':<24} {'Время':>9} {'Блюд':>7} {'Изменений':>10}")
+    for result in sorted(results, key=lambda result: -result.seconds):
+        if result.error:
+            print(f'  {result.name:<24} {result.seconds:8.2f}с {"ошибка":>7}')
+        else:
+            print(f"  {result.name:<24} {result.seconds:8.2f}с {result.summary['items']:>7} "
+                  f"{result.summary['changes']:>10}")
+    total = sum(result.seconds for result in results)
+    speedup = f', ускорение ×{total / wall_seconds:.1f}' if wall_seconds > 0 and total > 0 else ''
+    print(f'Время: {wall_seconds:.2f} с (сумма по заведениям {total:.2f} с{speedup})')
+    for result in failed:
+        print(f'  ✗ {result.name}: {result.error}')
+    print('=' * 60)
+
+
+def parse_args():
+    """Разбирает аргументы командной строки"""
+    parser = argparse.ArgumentParser(description='Пакетная сборка menu.json нескольких заведений')
+    parser.add_argument('config_dir', type=Path, help='директория с JSON-конфигурациями заведений')
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help='число заведений, собираемых параллельно (0 - по числу ядер)')
+    parser.add_argument('--venue-jobs', type=int, default=1,
+                        help='число процессов внутри сборки одного заведения (PDF, изображения)')
+    parser.add_argument('--only', nargs='+', metavar='NAME', help='собрать только указанные заведения')
+    parser.add_argument('--no-cache', action='store_true', help='не использовать кеш страниц PDF')
+    parser.add_argument('--force', action='store_true', help='выполнить все этапы, даже неизмененные')
+    add_dedup_arguments(parser)
+    add_format_argument(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    if args.jobs <= 0:
+        args.jobs = os.cpu_count() or 1
+    return args
+
+
+def main():
+    args = parse_args()
+    start_run(args)
+    if not args.config_dir.is_dir():
+        print(f'Ошибка: директория {args.config_dir} не найдена')
+        sys.exit(1)
+
+    venues, results = load_venues(args.config_dir)
+    if args.only:
+        venues = [venue for venue in venues if venue.name in args.only]
+        results = [result for result in results if result.name in args.only]
+    for result in results:
+        print_result(result)
+    if not venues and not results:
+        print(f'В {args.config_dir} нет конфигураций заведений')
+        sys.exit(1)
+
+    print(f'Сборка {len(venues)} заведений в {min(args.jobs, len(venues) or 1)} процессах...')
+    start = time.perf_counter()
+    if args.jobs <= 1 or len(venues) < 2:
+        for venue in venues:
+            result = build_venue(venue, args)
+            print_result(result)
+            results.append(result)
+    else:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(venues))) as executor:
+            futures = {
+                executor.submit(call_with_stats, build_venue, venue, args): venue
+                for venue in venues
+            }
+            for future in as_completed(futures):
+                try:
+                    result, stats = future.result()
+                    merge_stats(stats)
+                except Exception as e:
+                    # Процесс сборки аварийно завершился (например, нехватка памяти)
+                    result = VenueResult(futures[future].name, None, f'{type(e).__name__}: {e}', 0.0)
+                print_result(result)
+                results.append(result)
+
+    print_summary(results, time.perf_counter() - start)
+    if any(result.error for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
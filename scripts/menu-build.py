@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Сборка menu.json за один запуск: фото из архива, описания из HTML и txt,
+цены из PDF.
+
+Этапы выполняются по очереди над одним меню в памяти (те же функции, что
+и в отдельных скриптах parse-menu-from-zip.py, update-menu-from-html.py,
+update-menu-from-txt.py и update-prices-from-pdf.py), а menu.json
+читается один раз в начале и атомарно записывается один раз в конце.
+
+Отпечатки источников (CRC файлов в архивах, SHA-1 остальных файлов) и
+хеш записанного menu.json сохраняются в .menu-build-state.json. Этап
+пропускается, если его источник не изменился, menu.json не правили
+вручную и предыдущие этапы ничего не поменяли.
+
+С --watch после сборки скрипт продолжает работать: опрашивает время
+изменения и размер источников, после серии изменений (--debounce)
+сверяет их отпечатки и перевыполняет только этапы с изменившимися
+источниками над меню в памяти, сразу атомарно записывая menu.json.
+Новые блюда из архива нужны остальным этапам, поэтому после изменений
+этапа zip выполняются и следующие за ним.
+
+    python3 scripts/menu-build.py [--force] [--jobs N] [--watch]
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import signal
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from atomic_io import atomic_open
+from data_io import add_format_argument, loads
+from image_dedup import add_dedup_arguments, dedup_options
+from image_placeholders import file_hash
+from instrumentation import add_profile_arguments, count, start_run, timer
+from menu_core import dishes_from_items
+from menu_io import SCHEMA_VERSION, empty_menu, format_size_change, menu_output_path, save_menu, upgrade_menu
+from pdf_text import CACHE_FILE_NAME as PDF_CACHE_FILE_NAME
+from zip_index import ZipIndexError, cached_zip_index
+
+SCRIPTS_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPTS_DIR.parent
+STATE_FILE_NAME = '.menu-build-state.json'
+STATE_VERSION = 1
+WATCH_POLL_INTERVAL = 0.2
+WATCH_DEBOUNCE = 0.3
+
+
+def load_script(name):
+    """Импортирует скрипт с дефисами в имени как модуль"""
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+zip_script = load_script('parse-menu-from-zip')
+html_script = load_script('update-menu-from-html')
+txt_script = load_script('update-menu-from-txt')
+prices_script = load_script('update-prices-from-pdf')
+
+
+# Отпечатки источников
+
+def zip_fingerprint(zip_path):
+    """Отпечаток архива по центральному каталогу: имена, CRC и размеры файлов"""
+    digest = hashlib.sha1()
+    for entry in sorted(cached_zip_index(zip_path), key=lambda entry: entry.raw_name):
+        digest.update(entry.raw_name)
+        digest.update(b'\0%d\0%d\n' % (entry.crc, entry.file_size))
+    return digest.hexdigest()
+
+
+@timer('fingerprint')
+def source_fingerprint(path):
+    """Отпечаток источника; None, если файла нет"""
+    if not path.exists():
+        return None
+    if path.suffix.lower() == '.zip':
+        try:
+            return zip_fingerprint(path)
+        except ZipIndexError:
+            pass
+    return file_hash(path)
+
+
+# Этапы: каждый меняет меню в памяти и возвращает число изменений
+
+def run_zip_stage(menu, args):
+    dedup = dedup_options(args, args.menu.parent, args.jobs or None)
+    new_dishes = zip_script.add_dishes_from_zip(menu, args.zip, args.menu_dir, dedup)
+    renamed = zip_script.prepare_images(menu, args.menu_dir, args.menu.parent, jobs=args.jobs or None)
+    return len(new_dishes) + renamed
+
+
+def run_html_stage(menu, args):
+    dishes = html_script.extract_dish_info_from_zip(args.html_zip)
+    print(f'Найдено {len(dishes)} блюд с описаниями в HTML')
+    updated, retagged = html_script.apply_dishes(menu, dishes)
+    print(f'Обновлено блюд: {updated}, маски тегов изменились у {retagged} блюд')
+    return updated + retagged
+
+
+def run_txt_stage(menu, args):
+    dishes = txt_script.parse_txt_file(args.txt)
+    print(f'Найдено {len(dishes)} блюд в txt файле')
+    updated, retagged = txt_script.apply_dishes(menu, dishes)
+    print(f'Обновлено блюд: {updated}, маски тегов изменились у {retagged} блюд')
+    return updated + retagged
+
+
+def run_prices_stage(menu, args):
+    cache_path = None if args.no_cache else args.menu.parent / PDF_CACHE_FILE_NAME
+    prices = prices_script.load_prices(args.pdf, jobs=args.jobs or None, cache_path=cache_path,
+                                       fallback=args.builtin_prices)
+    print(f'Найдено {len(prices)} цен')
+    return prices_script.apply_prices(menu, prices)
+
+
+Stage = namedtuple('Stage', 'name title source run required')
+
+# required=False: этап выполняется и без файла источника (цены берутся из встроенного списка,
+# если он не отключен --no-builtin-prices).
+# Источник None - этап не задан (например, у заведения нет техкарты) и пропускается.
+STAGES = [
+    Stage('zip', 'Фото из архива', lambda args: args.zip, run_zip_stage, True),
+    Stage('html', 'Описания из HTML', lambda args: args.html_zip, run_html_stage, True),
+    Stage('txt', 'Описания из txt', lambda args: args.txt, run_txt_stage, True),
+    Stage('prices', 'Цены из PDF', lambda args: args.pdf, run_prices_stage, False),
+]
+
+
+# Состояние сборки
+
+def load_state(state_path):
+    """Читает состояние прошлой сборки; пустое, если его нет или оно повреждено"""
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('version') == STATE_VERSION:
+            return state
+    except (OSError, ValueError):
+        pass
+    return {'version': STATE_VERSION, 'menu': None, 'stages': {}}
+
+
+def save_state(state_path, state):
+    with atomic_open(state_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+
+@timer('menu.load')
+def read_menu(menu_json_path):
+    """Читает menu.json один раз; возвращает (меню v2, SHA-1 содержимого, нужна ли запись)
+
+    Запись нужна, если файла нет или он в старой схеме.
+    """
+    if not menu_json_path.exists():
+        return empty_menu(), None, True
+    data = menu_json_path.read_bytes()
+    count('bytes_read', len(data))
+    raw = loads(data)
+    menu = upgrade_menu(raw)
+    dishes_from_items(menu['all_items'])
+    return menu, hashlib.sha1(data).hexdigest(), raw.get('schema_version') != SCHEMA_VERSION
+
+
+def parse_args(argv=None):
+    """Разбирает аргументы командной строки"""
+    parser = argparse.ArgumentParser(description='Сборка menu.json из всех источников за один запуск')
+    parser.add_argument('--menu', type=Path, default=PROJECT_ROOT / 'menu.json', help='путь к menu.json')
+    parser.add_argument('--menu-dir', type=Path, default=zip_script.MENU_DIR, help='директория изображений')
+    parser.add_argument('--zip', type=Path, default=zip_script.ZIP_FILE, help='архив с фотографиями')
+    parser.add_argument('--html-zip', type=Path, default=PROJECT_ROOT / 'Копия Sapiens Kitchen.zip',
+                        help='архив с HTML-экспортом техкарт')
+    parser.add_argument('--txt', type=Path, default=PROJECT_ROOT / 'Копия Sapiens Kitchen.txt',
+                        help='текстовая техкарта')
+    parser.add_argument('--pdf', type=Path, default=prices_script.PDF_FILE, help='PDF с меню')
+    parser.add_argument('--no-builtin-prices', dest='builtin_prices', action='store_false',
+                        help='не брать встроенный список цен, если в PDF нет текста (этап завершится ошибкой)')
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help='число процессов для разбора PDF (0 - по числу ядер)')
+    parser.add_argument('--no-cache', action='store_true', help='не использовать кеш страниц PDF')
+    parser.add_argument('--force', action='store_true', help='выполнить все этапы, даже неизмененные')
+    parser.add_argument('--watch', action='store_true',
+                        help='после сборки следить за источниками и перевыполнять измененные этапы')
+    parser.add_argument('--poll-interval', type=float, default=WATCH_POLL_INTERVAL,
+                        help='период опроса источников в режиме --watch, с')
+    parser.add_argument('--debounce', type=float, default=WATCH_DEBOUNCE,
+                        help='сколько секунд источники должны не меняться перед перевыполнением этапов')
+    add_dedup_arguments(parser)
+    add_format_argument(parser)
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def run_stage(stage, menu, args):
+    """Выполняет этап над меню в памяти; возвращает число изменений"""
+    start = time.perf_counter()
+    with timer(stage.name):
+        stage_changes = stage.run(menu, args)
+    print(f'  Изменений: {stage_changes} ({time.perf_counter() - start:.2f} с)')
+    return stage_changes
+
+
+def save_result(args, menu, state_path, menu_hash, stage_fingerprints, write):
+    """Записывает меню (если write) и состояние сборки; возвращает (записано ли, хеш menu.json)"""
+    if args.format == 'msgpack':
+        # Бинарный снимок пишется рядом, menu.json остается прежним - состояние не обновляем
+        sizes = save_menu(args.menu, menu, format=args.format)
+        print(f'\n{menu_output_path(args.menu, args.format).name} сохранен: {format_size_change(*sizes)}')
+        return True, menu_hash
+
+    if write:
+        sizes = save_menu(args.menu, menu, format=args.format)
+        print(f'\nmenu.json сохранен: {format_size_change(*sizes)}')
+        menu_hash = file_hash(args.menu)
+    else:
+        print('\nmenu.json не изменился')
+    save_state(state_path, {'version': STATE_VERSION, 'menu': menu_hash, 'stages': stage_fingerprints})
+    return write, menu_hash
+
+
+def _build(args):
+    """Сборка; возвращает (меню, хеш menu.json, отпечатки источников, сводка)"""
+    state_path = args.menu.with_name(STATE_FILE_NAME)
+    state = load_state(state_path)
+
+    menu, menu_hash, needs_write = read_menu(args.menu)
+    # menu.json изменен не этой сборкой - результатам прошлых этапов верить нельзя
+    dirty = args.force or menu_hash is None or menu_hash != state['menu']
+    if not args.force and menu_hash is not None and state['menu'] is not None and dirty:
+        print('menu.json изменен после прошлой сборки, выполняю все этапы')
+
+    stage_fingerprints = {}
+    changes = 0
+    for stage in STAGES:
+        source = stage.source(args)
+        if source is None:
+            print(f'\n== {stage.title}: источник не задан, этап пропущен')
+            continue
+        fingerprint = source_fingerprint(source)
+        stage_fingerprints[stage.name] = fingerprint
+        print(f'\n== {stage.title} ({source.name})')
+
+        if fingerprint is None and stage.required:
+            print(f'  ⚠ Файл {source} не найден, этап пропущен')
+            continue
+        if not dirty and state['stages'].get(stage.name) == fingerprint:
+            print('  Источник не изменился, этап пропущен')
+            continue
+
+        stage_changes = run_stage(stage, menu, args)
+        if stage_changes:
+            changes += stage_changes
+            # Следующие этапы должны увидеть новые блюда и поля
+            dirty = True
+
+    saved, menu_hash = save_result(args, menu, state_path, menu_hash, stage_fingerprints,
+                                   bool(changes or needs_write))
+
+    print(f"Готово! Блюд: {menu['statistics']['total_items']}, "
+          f"категорий: {menu['statistics']['categories_count']}")
+    summary = {
+        'changes': changes,
+        'saved': saved,
+        'items': menu['statistics']['total_items'],
+        'categories': menu['statistics']['categories_count'],
+    }
+    return menu, menu_hash, stage_fingerprints, summary
+
+
+def build(args):
+    """Собирает menu.json по аргументам сборки; возвращает сводку
+
+    Сводка: {'changes': число изменений, 'saved': записан ли файл,
+    'items': блюд, 'categories': категорий}.
+    """
+    return _build(args)[3]
+
+
+# Режим наблюдения
+
+def file_signature(path):
+    """(время изменения, размер) для быстрой проверки; None, если файла нет"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def run_changed_stages(menu, args, names, stage_fingerprints):
+    """Перевыполняет этапы names, у которых изменилось содержимое источника
+
+    Возвращает число изменений меню; stage_fingerprints обновляется.
+    """
+    changes = 0
+    rerun_rest = False
+    for stage in STAGES:
+        source = stage.source(args)
+        if source is None or (stage.name not in names and not rerun_rest):
+            continue
+        fingerprint = source_fingerprint(source)
+        if not rerun_rest and fingerprint == stage_fingerprints.get(stage.name):
+            print(f'\n== {stage.title}: содержимое {source.name} не изменилось')
+            continue
+        stage_fingerprints[stage.name] = fingerprint
+        print(f'\n== {stage.title} ({source.name})')
+        if fingerprint is None and stage.required:
+            print(f'  ⚠ Файл {source} не найден, этап пропущен')
+            continue
+
+        stage_changes = run_stage(stage, menu, args)
+        changes += stage_changes
+        if stage.name == 'zip' and stage_changes:
+            rerun_rest = True
+    return changes
+
+
+def _stop_watching(signum, frame):
+    raise KeyboardInterrupt
+
+
+def watch(args):
+    """Собирает меню и перевыполняет этапы при изменении их источников (до Ctrl+C)"""
+    # Остановка сервисом (SIGTERM) - как Ctrl+C: отчет --profile-report будет записан
+    signal.signal(signal.SIGTERM, _stop_watching)
+    menu, menu_hash, stage_fingerprints, _ = _build(args)
+    state_path = args.menu.with_name(STATE_FILE_NAME)
+    watched = [stage for stage in STAGES if stage.source(args) is not None]
+    signatures = {stage.name: file_signature(stage.source(args)) for stage in watched}
+    menu_signature = file_signature(args.menu)
+
+    print(f'\nСлежу за источниками (опрос каждые {args.poll_interval} с, Ctrl+C - выход):')
+    for stage in watched:
+        print(f'  {stage.title}: {stage.source(args)}')
+
+    pending = {}  # этап -> когда замечено первое изменение
+    last_change = 0.0
+    try:
+        while True:
+            time.sleep(args.poll_interval)
+            now = time.monotonic()
+            for stage in watched:
+                signature = file_signature(stage.source(args))
+                if signature != signatures[stage.name]:
+                    signatures[stage.name] = signature
+                    pending.setdefault(stage.name, now)
+                    last_change = now
+
+            signature = file_signature(args.menu)
+            if signature != menu_signature:
+                # menu.json правили вручную: перечитываем и выполняем все этапы, как при сборке
+                menu_signature = signature
+                print('\nmenu.json изменен извне, перечитываю и выполняю все этапы')
+                menu, menu_hash, _ = read_menu(args.menu)
+                stage_fingerprints = {}
+                for stage in watched:
+                    pending.setdefault(stage.name, now)
+                last_change = now
+
+            # Ждем, пока серия изменений утихнет (архив может дописываться несколько секунд)
+            if not pending or now - last_change < args.debounce:
+                continue
+            first_change = min(pending.values())
+            changes = run_changed_stages(menu, args, set(pending), stage_fingerprints)
+            pending.clear()
+            _, menu_hash = save_result(args, menu, state_path, menu_hash, stage_fingerprints, changes > 0)
+            menu_signature = file_signature(args.menu)
+            print(f'Обновлено за {time.monotonic() - first_change:.2f} с после изменения')
+    except KeyboardInterrupt:
+        print('\nНаблюдение остановлено')
+
+
+def main():
+    args = parse_args()
+    start_run(args)
+    if args.watch:
+        watch(args)
+    else:
+        build(args)
+
+
+if __name__ == '__main__':
+    main()
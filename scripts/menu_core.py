@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Общее ядро скриптов меню: нормализация названий блюд и индекс меню.
+
+normalize_name - единственный нормализатор названий для всех скриптов
+(раньше у каждого был свой, и только разбор PDF заменял "ё" на "е").
+Регулярные выражения скомпилированы заранее, результаты запоминаются:
+одни и те же названия нормализуются на каждом этапе сборки.
+
+MenuIndex один раз строит словари id -> блюдо и нормализованное
+название -> блюда, чтобы скрипты обновления находили блюда поиском в
+словаре, а не проходом по all_items.
+
+Dish - компактное представление блюда для больших каталогов (сотни
+тысяч блюд из всех заведений): __slots__ вместо dict и общие
+(интернированные) строки категорий, аллергенов и форматов. Dish.from_dict
+и Dish.to_dict преобразуют блюдо в форму menu.json и обратно без потерь.
+menu_io.load_menu переводит all_items в Dish (dishes_from_items),
+save_menu пишет их обратно через dishes_to_items; скрипты работают с
+блюдом как с dict (get, [], in, keys, items).
+"""
+
+import re
+import sys
+from functools import lru_cache
+
+from instrumentation import record_match
+
+NORMALIZE_CACHE_SIZE = 1 << 17
+
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+_SPACES_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_name(name):
+    """Нормализует имя блюда для сравнения
+
+    Нижний регистр, "ё" -> "е", без знаков препинания, пробелы схлопнуты:
+    "Свёкла с уткой, мёдом" -> "свекла с уткой медом".
+    """
+    name = name.lower().replace('ё', 'е')
+    name = _PUNCTUATION_RE.sub('', name)
+    return _SPACES_RE.sub(' ', name).strip()
+
+
+class MenuIndex:
+    """Индекс блюд меню по id и по нормализованному названию
+
+    Принимает меню v2 (dict с all_items) или список блюд - Dish из
+    load_menu или dict новых блюд. Индексируются сами объекты блюд,
+    поэтому изменения через индекс видны в меню.
+    """
+
+    def __init__(self, menu_or_items):
+        if isinstance(menu_or_items, dict):
+            menu_or_items = menu_or_items['all_items']
+        self.items = menu_or_items
+        self._by_id = {}
+        self._by_name = {}
+        for item in self.items:
+            self._add(item)
+
+    def _add(self, item):
+        self._by_id.setdefault(item.get('id'), item)
+        self._by_name.setdefault(normalize_name(item.get('name') or ''), []).append(item)
+
+    def add(self, item):
+        """Добавляет блюдо в список и в индекс"""
+        self.items.append(item)
+        self._add(item)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, name):
+        return bool(self.find(name))
+
+    def get(self, item_id, default=None):
+        """Блюдо по id"""
+        return self._by_id.get(item_id, default)
+
+    def find(self, name):
+        """Все блюда с таким названием (с точностью до нормализации)"""
+        return self.find_normalized(normalize_name(name))
+
+    def find_normalized(self, normalized_name):
+        """Все блюда с уже нормализованным названием"""
+        items = self._by_name.get(normalized_name, [])
+        record_match('menu_index', items)
+        return items
+
+    def max_id(self):
+        """Наибольший числовой id (0 для пустого меню)"""
+        return max((item_id for item_id in self._by_id if isinstance(item_id, int)), default=0)
+
+
+# Поля блюда в menu.json в обычном порядке
+DISH_FIELDS = (
+    'id', 'name', 'category', 'image', 'image_format', 'description',
+    'composition', 'allergens', 'price', 'image_variants', 'placeholder',
+    'allergen_mask', 'ingredient_mask',
+)
+# Значения этих полей повторяются у многих блюд и хранятся в одном экземпляре
+INTERNED_FIELDS = frozenset(('category', 'image_format', 'allergens'))
+
+# Нестандартные порядки ключей (общие для всех блюд с таким порядком)
+_key_orders = {}
+_absent = object()
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class Dish:
+    """Блюдо меню на __slots__
+
+    Отсутствующий в исходном dict ключ - незаданный слот, поэтому
+    "нет ключа" и "значение null" различаются. Поля не из DISH_FIELDS
+    хранятся в extra, нестандартный порядок ключей - в общем кортеже.
+    """
+
+    __slots__ = DISH_FIELDS + ('extra', '_order')
+
+    def __init__(self, **fields):
+        self.extra = None
+        self._order = None
+        for key, value in fields.items():
+            self._set(key, value)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Блюдо из dict в форме menu.json"""
+        dish = cls(**data)
+        keys = tuple(data)
+        if keys != tuple(key for key in DISH_FIELDS if key in data) or dish.extra:
+            dish._order = _key_orders.setdefault(keys, keys)
+        return dish
+
+    def to_dict(self):
+        """dict в форме menu.json с исходным порядком ключей"""
+        keys = self._order or self.keys()
+        return {key: self[key] for key in keys}
+
+    def keys(self):
+        """Заданные поля: стандартные по порядку, затем дополнительные"""
+        keys = [key for key in DISH_FIELDS if hasattr(self, key)]
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+
+    def items(self):
+        """Пары (ключ, значение) в порядке to_dict"""
+        return [(key, self[key]) for key in self._order or self.keys()]
+
+    def __iter__(self):
+        return iter(self._order or self.keys())
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __getitem__(self, key):
+        if key in DISH_FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        # Новый ключ, как в dict, встает в конец, а не на место в DISH_FIELDS
+        if self._order is not None:
+            if key not in self._order:
+                keys = self._order + (key,)
+                self._order = _key_orders.setdefault(keys, keys)
+        elif key not in self:
+            keys = tuple(self.keys()) + (key,)
+            self._set(key, value)
+            if tuple(self.keys()) != keys:
+                self._order = _key_orders.setdefault(keys, keys)
+            return
+        self._set(key, value)
+
+    def _set(self, key, value):
+        if key in DISH_FIELDS:
+            setattr(self, key, _intern(value) if key in INTERNED_FIELDS else value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        return self.get(key, _absent) is not _absent
+
+    def __eq__(self, other):
+        if not isinstance(other, Dish):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f'Dish({self.get("id")!r}, {self.get("name")!r})'
+
+
+def dishes_from_items(items):
+    """Переводит all_items меню в Dish на месте и возвращает тот же список
+
+    dict заменяется сразу, поэтому освобождается по ходу, а не после
+    преобразования всего списка. Готовые Dish не меняются.
+    """
+    for i, item in enumerate(items):
+        if not isinstance(item, Dish):
+            items[i] = Dish.from_dict(item)
+    return items
+
+
+def dishes_to_items(dishes):
+    """all_items меню из списка Dish (и dict новых блюд)"""
+    return [dish.to_dict() if isinstance(dish, Dish) else dish for dish in dishes]
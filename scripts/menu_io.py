@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Чтение и запись menu.json.
+
+Схема v2 хранит каждое блюдо один раз - в all_items; категории содержат
+только упорядоченные списки id:
+
+    {
+      "schema_version": 2,
+      "menu": {"categories": [{"name": ..., "item_ids": [...], "count": N}]},
+      "all_items": [...],
+      "statistics": {"total_items": N, "categories_count": M}
+    }
+
+load_menu() принимает и старый формат (v1, где categories[].items
+содержат полные копии блюд) и сразу приводит его к v2.
+
+Файл пишется через data_io.py (атомарно, с fsync) в одном из форматов:
+pretty, min или бинарный снимок msgpack (в menu.msgpack рядом с menu.json).
+
+Запуск как скрипта переводит menu.json в v2 (заодно обновляя шарды для
+ленивой загрузки) и печатает размер до и после:
+
+    python3 scripts/menu_io.py [путь к menu.json] [--format min]
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from data_io import DEFAULT_FORMAT, FORMAT_SUFFIXES, add_format_argument, read_data, write_data
+from instrumentation import add_profile_arguments, start_run, timer
+from menu_core import dishes_from_items, dishes_to_items
+from menu_shards import INDEX_FILE_NAME, shards_dir_for, shards_state_for, write_menu_shards
+
+SCHEMA_VERSION = 2
+MENU_JSON_PATH = Path(__file__).parent.parent / "menu.json"
+
+
+def empty_menu():
+    """Пустое меню в схеме v2"""
+    return {
+        'schema_version': SCHEMA_VERSION,
+        'menu': {'categories': []},
+        'all_items': [],
+        'statistics': {'total_items': 0, 'categories_count': 0}
+    }
+
+
+def upgrade_menu(data):
+    """Приводит данные menu.json любой версии к схеме v2"""
+    if data.get('schema_version') == SCHEMA_VERSION:
+        return data
+
+    items = list(data.get('all_items') or [])
+    by_id = {item.get('id'): item for item in items}
+    categories = []
+
+    for category in (data.get('menu') or {}).get('categories') or []:
+        item_ids = list(category.get('item_ids') or [])
+        for copy in category.get('items') or []:
+            item = by_id.get(copy.get('id'))
+            if item is None:
+                # Блюдо было только в категории - переносим в all_items
+                item = dict(copy)
+                items.append(item)
+                by_id[item.get('id')] = item
+            else:
+                # all_items - основная копия; из копии в категории берем
+                # только поля, которых в ней нет
+                for key, value in copy.items():
+                    if value is not None and item.get(key) is None:
+                        item[key] = value
+            item_ids.append(item.get('id'))
+        categories.append({'name': category['name'], 'item_ids': item_ids})
+
+    menu = {
+        'schema_version': SCHEMA_VERSION,
+        'menu': {'categories': categories},
+        'all_items': items
+    }
+    refresh_categories(menu)
+    return menu
+
+
+@timer('menu.load')
+def load_menu(menu_json_path):
+    """Читает menu.json (v1 или v2, JSON или msgpack) и возвращает меню в схеме v2
+
+    Блюда all_items - Dish (см. menu_core.py).
+    """
+    menu = upgrade_menu(read_data(menu_json_path))
+    dishes_from_items(menu['all_items'])
+    return menu
+
+
+def build_menu(dishes, category_order=None):
+    """Строит меню v2 из списка блюд
+
+    Категории идут в порядке category_order (если задан), остальные - в
+    порядке первого появления в dishes; блюда в категории - в порядке dishes.
+    """
+    categories = {name: [] for name in category_order or []}
+    for dish in dishes:
+        categories.setdefault(dish['category'], []).append(dish['id'])
+
+    menu = {
+        'schema_version': SCHEMA_VERSION,
+        'menu': {
+            'categories': [
+                {'name': name, 'item_ids': item_ids}
+                for name, item_ids in categories.items()
+                if item_ids
+            ]
+        },
+        'all_items': list(dishes)
+    }
+    refresh_categories(menu)
+    return menu
+
+
+def add_items(menu, dishes):
+    """Добавляет блюда в all_items и в конец списков их категорий"""
+    categories = {category['name']: category for category in menu['menu']['categories']}
+    for dish in dishes:
+        menu['all_items'].append(dish)
+        category = categories.get(dish['category'])
+        if category is None:
+            category = {'name': dish['category'], 'item_ids': []}
+            menu['menu']['categories'].append(category)
+            categories[dish['category']] = category
+        category['item_ids'].append(dish['id'])
+    refresh_categories(menu)
+
+
+def refresh_categories(menu):
+    """Убирает из категорий несуществующие id и пересчитывает счетчики"""
+    known_ids = {item.get('id') for item in menu['all_items']}
+    categories = []
+    for category in menu['menu']['categories']:
+        item_ids = [item_id for item_id in category['item_ids'] if item_id in known_ids]
+        if item_ids:
+            categories.append({'name': category['name'], 'item_ids': item_ids, 'count': len(item_ids)})
+    menu['menu']['categories'] = categories
+    menu['statistics'] = {
+        'total_items': len(menu['all_items']),
+        'categories_count': len(categories)
+    }
+
+
+def category_items(menu, category_name):
+    """Возвращает блюда категории в порядке item_ids"""
+    by_id = {item.get('id'): item for item in menu['all_items']}
+    for category in menu['menu']['categories']:
+        if category['name'] == category_name:
+            return [by_id[item_id] for item_id in category['item_ids']]
+    return []
+
+
+def menu_output_path(menu_json_path, format=DEFAULT_FORMAT):
+    """Файл, в который пишется меню в формате format (menu.json или menu.msgpack)"""
+    return Path(menu_json_path).with_suffix(FORMAT_SUFFIXES[format])
+
+
+@timer('menu.save')
+def save_menu(menu_json_path, menu, shards=True, format=DEFAULT_FORMAT):
+    """Атомарно записывает меню; возвращает (размер до, размер после) в байтах
+
+    Формат msgpack пишется в menu.msgpack рядом с menu.json (сам menu.json
+    не меняется). Вместе с меню обновляются индекс и шарды категорий для
+    ленивой загрузки (см. menu_shards.py), если shards не отключен.
+    Блюда Dish записываются в форме dict с исходным порядком ключей.
+    """
+    output_path = menu_output_path(menu_json_path, format)
+    try:
+        size_before = os.path.getsize(output_path)
+    except OSError:
+        size_before = None
+    menu = {**menu, 'all_items': dishes_to_items(menu['all_items'])}
+    size_after = write_data(output_path, menu, format)
+    if shards:
+        write_menu_shards(menu, shards_dir_for(menu_json_path), shards_state_for(menu_json_path))
+    return size_before, size_after
+
+
+def format_size_change(size_before, size_after):
+    """Строка вида '94.8 КБ -> 48.1 КБ (-49%)'"""
+    after = f'{size_after / 1024:.1f} КБ'
+    if not size_before:
+        return after
+    change = (size_after - size_before) * 100 / size_before
+    return f'{size_before / 1024:.1f} КБ -> {after} ({change:+.0f}%)'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Приведение menu.json к схеме v2')
+    parser.add_argument('menu_json', nargs='?', type=Path, default=MENU_JSON_PATH, help='путь к menu.json')
+    add_format_argument(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_run(args)
+    menu_json = args.menu_json
+    if not menu_json.exists():
+        print(f"Ошибка: файл {menu_json} не найден")
+        sys.exit(1)
+
+    menu = load_menu(menu_json)
+    sizes = save_menu(menu_json, menu, format=args.format)
+    output_name = menu_output_path(menu_json, args.format).name
+    print(f"{output_name} приведен к схеме v{SCHEMA_VERSION}: {format_size_change(*sizes)}")
+    print(f"  Блюд: {menu['statistics']['total_items']}, "
+          f"категорий: {menu['statistics']['categories_count']}")
+    index_path = shards_dir_for(menu_json) / INDEX_FILE_NAME
+    print(f"  Индекс для ленивой загрузки: {index_path} ({index_path.stat().st_size / 1024:.1f} КБ)")
+
+
+if __name__ == '__main__':
+    main()
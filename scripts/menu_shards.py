@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Разбиение меню на индекс и шарды по категориям для ленивой загрузки.
+
+В public/menu-data/ рядом с menu.json (shards_dir_for) записываются:
+
+- menu-index.json - категории, id, названия, цены, ссылки на изображения
+  и маски аллергенов и ингредиентов со словарями (menu_tags.py) - все,
+  что нужно для первой отрисовки сетки и фильтров;
+- details-<хеш>.json - по одному файлу на категорию с тяжелыми текстовыми
+  полями (описание, состав, аллергены). Хеш содержимого в имени позволяет
+  отдавать шарды с бессрочным кешированием;
+- search-<хеш>.json - поисковый индекс по текстам блюд (search_index.py),
+  имя записывается в поле search индекса.
+
+Приложение загружает индекс при старте, шард - когда гость открывает
+категорию, поисковый индекс - при первом поиске. Файлы, на которые индекс
+больше не ссылается, удаляются не сразу, а через GC_GRACE_PERIOD:
+клиенты со старым индексом еще успевают их загрузить. Время, с которого
+файл не нужен, хранится в .menu-shards-state.json рядом с menu.json - вне
+публикуемой директории.
+"""
+
+import hashlib
+import time
+from pathlib import Path
+
+from atomic_io import atomic_open
+from data_io import dumps, read_data, write_data
+from instrumentation import count, timer
+from search_index import build_search_index
+
+SHARDS_DIR = Path('public') / 'menu-data'
+INDEX_FILE_NAME = 'menu-index.json'
+STATE_FILE_NAME = '.menu-shards-state.json'
+SHARD_PREFIX = 'details-'
+SEARCH_PREFIX = 'search-'
+SHARD_HASH_LENGTH = 10
+# Сколько секунд хранится файл, на который индекс больше не ссылается
+GC_GRACE_PERIOD = 7 * 24 * 3600
+
+# Поля, которые уходят в шарды категорий
+DETAIL_FIELDS = ('description', 'composition', 'allergens')
+
+
+def shards_dir_for(menu_json_path):
+    """Директория шардов для menu.json: всегда public/menu-data/ рядом с ним
+
+    Для menu.json в корне проекта это public/menu-data/ приложения, для
+    menu.json заведения в пакетной сборке - <output>/public/menu-data/.
+    """
+    return Path(menu_json_path).parent / SHARDS_DIR
+
+
+def shards_state_for(menu_json_path):
+    """Состояние сборщика мусора шардов для menu.json"""
+    return Path(menu_json_path).with_name(STATE_FILE_NAME)
+
+
+def _load_orphans(state_path):
+    """Ненужные файлы -> время, с которого они не нужны; пусто, если состояния нет"""
+    try:
+        orphans = read_data(state_path).get('orphans')
+        if isinstance(orphans, dict):
+            return orphans
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {}
+
+
+def _dump(data):
+    """Компактный JSON в байтах"""
+    return dumps(data, 'min')
+
+
+def _hashed_name(prefix, content):
+    return f'{prefix}{hashlib.sha256(content).hexdigest()[:SHARD_HASH_LENGTH]}.json'
+
+
+def split_menu(menu):
+    """Делит меню v2 на индекс, шарды и поисковый индекс
+
+    Возвращает (индекс, {имя файла: байты}) - шарды и поисковый индекс.
+    """
+    by_id = {item['id']: item for item in menu['all_items']}
+    shard_files = {}
+    categories = []
+
+    for category in menu['menu']['categories']:
+        details = {}
+        for item_id in category['item_ids']:
+            item = by_id[item_id]
+            fields = {field: item[field] for field in DETAIL_FIELDS if item.get(field)}
+            if fields:
+                details[str(item_id)] = fields
+        entry = {'name': category['name'], 'item_ids': category['item_ids'], 'count': category['count']}
+        if details:
+            content = _dump({'category': category['name'], 'items': details})
+            entry['shard'] = _hashed_name(SHARD_PREFIX, content)
+            shard_files[entry['shard']] = content
+        categories.append(entry)
+
+    search_content = _dump(build_search_index(menu['all_items']))
+    search_file = _hashed_name(SEARCH_PREFIX, search_content)
+    shard_files[search_file] = search_content
+
+    index = {
+        'schema_version': menu.get('schema_version'),
+        'search': search_file,
+        'tags': menu.get('tags'),
+        'categories': categories,
+        'items': [
+            {key: value for key, value in item.items() if key not in DETAIL_FIELDS}
+            for item in menu['all_items']
+        ]
+    }
+    return index, shard_files
+
+
+@timer('menu.shards')
+def write_menu_shards(menu, shards_dir, state_path, grace_period=GC_GRACE_PERIOD, now=None):
+    """Записывает индекс и шарды; возвращает (размер индекса, {шард: размер})
+
+    Файлы, на которые индекс не ссылается дольше grace_period секунд,
+    удаляются; state_path - состояние сборщика мусора (см. shards_state_for).
+    """
+    shards_dir = Path(shards_dir)
+    shards_dir.mkdir(parents=True, exist_ok=True)
+    index, shard_files = split_menu(menu)
+
+    for name, content in shard_files.items():
+        path = shards_dir / name
+        # Имя содержит хеш содержимого: существующий файл уже актуален
+        if not path.exists():
+            with atomic_open(path, 'wb') as f:
+                f.write(content)
+
+    index_content = _dump(index)
+    with atomic_open(shards_dir / INDEX_FILE_NAME, 'wb') as f:
+        f.write(index_content)
+
+    # Шарды и поисковые индексы, на которые индекс больше не ссылается,
+    # удаляем после grace_period
+    now = time.time() if now is None else now
+    previous = _load_orphans(state_path)
+    orphans = {}
+    removed = 0
+    for prefix in (SHARD_PREFIX, SEARCH_PREFIX):
+        for path in shards_dir.glob(f'{prefix}*.json'):
+            if path.name in shard_files:
+                continue
+            since = previous.get(path.name, now)
+            if now - since >= grace_period:
+                path.unlink()
+                removed += 1
+            else:
+                orphans[path.name] = since
+    count('shards.gc_removed', removed)
+    if orphans != previous:
+        write_data(state_path, {'orphans': orphans})
+
+    return len(index_content), {name: len(content) for name, content in shard_files.items()}
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Аллергены и ингредиенты блюд - битовые маски для фильтров.
+
+Аллергены и состав в menu.json - свободный текст ("орехи (кедровые
+орехи), цитрусы ( лимон )", списки "* ..."), и фильтр "без орехов и
+рыбы" раньше означал поиск подстрок в тексте каждого блюда. tag_menu
+разбирает название, описание, состав и аллергены блюда по словарям
+ALLERGENS и INGREDIENTS и записывает блюду allergen_mask и
+ingredient_mask: бит i установлен, если в тексте нашелся i-й элемент
+словаря. Словари (ключи и названия) записываются в menu.json в поле
+tags, так что клиент (src/utils/menuTags.ts) знает значение каждого бита.
+
+Фильтр - одна побитовая операция над маской блюда:
+
+- без аллергенов: allergen_mask & исключенные == 0;
+- с ингредиентами: ingredient_mask & нужные == нужные.
+
+Номер бита - позиция элемента в словаре, поэтому новые элементы
+добавляются только в конец. В словаре не больше MAX_TAGS элементов:
+маски остаются в пределах 32-битных побитовых операций JavaScript.
+Нулевая маска значит "ничего не нашлось", а не "аллергенов нет" -
+у блюда может не быть текстов.
+
+    python3 scripts/menu_tags.py --without nuts fish --with shrimp
+    python3 scripts/menu_tags.py --write   # разметить существующий menu.json
+"""
+
+import argparse
+import re
+from pathlib import Path
+
+from data_io import add_format_argument
+from instrumentation import add_profile_arguments, count, start_run, timer
+
+MAX_TAGS = 31
+
+# Поля блюда, по которым ищутся аллергены и ингредиенты
+TAG_FIELDS = ('name', 'description', 'composition', 'allergens')
+
+# (ключ, название, начала слов); начало слова - регулярное выражение,
+# \b в конце - только целое слово. Порядок - номера битов, новые - в конец
+ALLERGENS = (
+    ('gluten', 'глютен', (r'глютен', r'пшени', r'полб', r'ржан', r'ячмен', r'перлов', r'булгур', r'кускус',
+                          r'панировочн', r'бриош', r'хлеб', r'сухар', r'мук(?:а|и|у|ой)\b', r'тест(?:о|а|ом)\b')),
+    ('milk', 'молоко', (r'молок', r'молоч', r'лактоз', r'сливк', r'сливочн', r'сыр(?:а|у|ом|ы|ов)?\b', r'сырн',
+                        r'творо', r'сметан', r'йогурт', r'кефир', r'маскарпоне', r'моцарелл', r'пармезан',
+                        r'рикотт', r'буррат', r'креметте', r'сгущ', r'пломбир', r'морожен')),
+    ('eggs', 'яйца', (r'яйц', r'яиц', r'желток', r'желтк', r'омлет', r'меренг', r'майонез', r'айоли')),
+    ('fish', 'рыба', (r'рыб', r'лосос', r'семг', r'форел', r'тун(?:ец|ц)', r'треск', r'судак', r'щук',
+                      r'угор', r'угр(?:я|ем|и)\b', r'сибас', r'дорадо', r'анчоус', r'сельд(?:ь|и|ью)\b',
+                      r'скумбри', r'икр', r'тобико')),
+    ('seafood', 'морепродукты', (r'морепродукт', r'кревет', r'краб', r'лобстер', r'омар', r'лангуст', r'гребеш',
+                                 r'миди', r'устриц', r'осьминог', r'кальмар', r'каракатиц', r'вонголе')),
+    ('nuts', 'орехи', (r'орех', r'миндал', r'фисташ', r'фундук', r'кешью', r'пекан', r'макадами')),
+    ('peanuts', 'арахис', (r'арахис',)),
+    ('soy', 'соя', (r'со(?:я|и|ю|ей)\b', r'соев', r'тофу', r'мисо', r'эдамаме')),
+    ('sesame', 'кунжут', (r'кунжут', r'тахин')),
+    ('celery', 'сельдерей', (r'сельдер',)),
+    ('mustard', 'горчица', (r'горчиц', r'горчичн')),
+    ('citrus', 'цитрусы', (r'цитрус', r'лимон', r'лайм', r'апельсин', r'мандарин', r'грейпфрут', r'юдзу',
+                           r'помело')),
+    ('honey', 'мед', (r'мед(?:а|у|ом)?\b', r'медов')),
+)
+
+INGREDIENTS = (
+    ('beef', 'говядина', (r'говяд', r'говяж', r'брискет', r'шатобриан', r'рибай', r'стейк', r'бастурм')),
+    ('pork', 'свинина', (r'свин', r'бекон', r'ветчин', r'прошутто', r'хамон')),
+    ('lamb', 'баранина', (r'баран', r'ягнят', r'ягнен')),
+    # Куриные яйца и желтки - аллерген eggs, а не курица
+    ('chicken', 'курица', (r'куриц', r'(?<!желток )(?<!яйцо )курин(?!\w*\s+(?:яй|желт))', r'цыпл')),
+    ('duck', 'утка', (r'утк', r'утин')),
+    ('salmon', 'лосось', (r'лосос', r'семг')),
+    ('tuna', 'тунец', (r'тун(?:ец|ц)',)),
+    ('shrimp', 'креветки', (r'кревет',)),
+    ('crab', 'краб', (r'краб',)),
+    ('scallop', 'гребешок', (r'гребеш',)),
+    ('octopus', 'осьминог', (r'осьминог',)),
+    ('squid', 'кальмар', (r'кальмар',)),
+    ('caviar', 'икра', (r'икр', r'тобико')),
+    ('mushrooms', 'грибы', (r'гриб', r'шампиньон', r'вешенк', r'лисичк', r'шиитаке')),
+    ('truffle', 'трюфель', (r'трюфел',)),
+    ('cheese', 'сыр', (r'сыр(?:а|у|ом|ы|ов)?\b', r'сырн', r'маскарпоне', r'моцарелл', r'пармезан', r'рикотт',
+                       r'буррат', r'креметте', r'фета', r'брынз')),
+    ('avocado', 'авокадо', (r'авокадо',)),
+    ('tomato', 'томаты', (r'томат', r'помидор', r'черри')),
+    ('cucumber', 'огурцы', (r'огур',)),
+    ('eggplant', 'баклажан', (r'баклажан',)),
+    ('pumpkin', 'тыква', (r'тыкв',)),
+    ('potato', 'картофель', (r'картоф', r'картошк')),
+    ('rice', 'рис', (r'рис(?:а|у|ом)?\b', r'рисов', r'ризотто')),
+    ('pasta', 'паста', (r'(?<!мисо )паст(?:а|ы|у|ой)\b', r'спагетти', r'казаречче', r'равиоли', r'феттучин',
+                        r'тальятел', r'пенне', r'лапш')),
+    ('garlic', 'чеснок', (r'чеснок', r'чесноч')),
+    ('onion', 'лук', (r'лук(?:а|у|ом)?\b', r'луков')),
+    ('chili', 'острый перец', (r'чили', r'халапеньо', r'кайенск', r'шрирач', r'остр(?:ый|ого|ым) пер')),
+    ('cilantro', 'кинза', (r'кинз',)),
+    ('chocolate', 'шоколад', (r'шоколад',)),
+    ('berries', 'ягоды', (r'ягод', r'клубник', r'малин', r'черник', r'голубик', r'смородин', r'вишн',
+                          r'брусник')),
+    ('beet', 'свекла', (r'свекл',)),
+)
+
+# Куски текста, которые не должны давать совпадений: отрицание ("без
+# глютена"), мускатный орех - не орех, лемонграсс - не цитрус
+_IGNORE_RE = re.compile(r'\bбез\s+\w+|\bмускатн\w*\s+орех\w*|\bлемонграсс\w*|\bлимонник\w*')
+
+
+def _vocabulary_re(vocabulary):
+    """Одно регулярное выражение на словарь: группа t<номер бита> на элемент"""
+    if len(vocabulary) > MAX_TAGS:
+        raise ValueError(f'в словаре больше {MAX_TAGS} элементов: маска не поместится в 32 бита')
+    groups = (f'(?P<t{bit}>{"|".join(stems)})' for bit, (_, _, stems) in enumerate(vocabulary))
+    return re.compile(r'\b(?:' + '|'.join(groups) + ')')
+
+
+_ALLERGENS_RE = _vocabulary_re(ALLERGENS)
+_INGREDIENTS_RE = _vocabulary_re(INGREDIENTS)
+
+
+def text_mask(pattern, text):
+    """Маска элементов словаря, найденных в тексте"""
+    mask = 0
+    for match in pattern.finditer(text):
+        mask |= 1 << int(match.lastgroup[1:])
+    return mask
+
+
+def item_masks(item):
+    """(allergen_mask, ingredient_mask) блюда по его текстам"""
+    text = ' \n'.join(item.get(field) or '' for field in TAG_FIELDS).lower().replace('ё', 'е')
+    text = _IGNORE_RE.sub(' ', text)
+    return text_mask(_ALLERGENS_RE, text), text_mask(_INGREDIENTS_RE, text)
+
+
+def vocabulary_tags(vocabulary):
+    """Словарь в форме menu.json: [{"key": ..., "name": ...}] по номерам битов"""
+    return [{'key': key, 'name': name} for key, name, _ in vocabulary]
+
+
+@timer('tags.apply')
+def tag_menu(menu):
+    """Пересчитывает маски всех блюд меню и записывает словари в tags
+
+    Возвращает число блюд, у которых изменилась хотя бы одна маска.
+    """
+    changed = 0
+    for item in menu['all_items']:
+        allergen_mask, ingredient_mask = item_masks(item)
+        if item.get('allergen_mask') != allergen_mask or item.get('ingredient_mask') != ingredient_mask:
+            item['allergen_mask'] = allergen_mask
+            item['ingredient_mask'] = ingredient_mask
+            changed += 1
+    menu['tags'] = {'allergens': vocabulary_tags(ALLERGENS), 'ingredients': vocabulary_tags(INGREDIENTS)}
+    count('tags.changed', changed)
+    return changed
+
+
+def tag_mask(tags, keys):
+    """Маска из ключей словаря tags (список из menu.json); неизвестный ключ - ValueError"""
+    bits = {tag['key']: bit for bit, tag in enumerate(tags)}
+    mask = 0
+    for key in keys:
+        if key not in bits:
+            raise ValueError(f"неизвестный тег {key!r}, есть: {', '.join(bits)}")
+        mask |= 1 << bits[key]
+    return mask
+
+
+def filter_items(menu, without_allergens=(), without_ingredients=(), with_ingredients=()):
+    """Блюда меню без указанных аллергенов и ингредиентов и со всеми нужными ингредиентами
+
+    Ключи - из menu['tags'] (например, 'nuts', 'fish', 'shrimp'). Блюда
+    без масок (меню собрано до появления тегов) ничего не исключают.
+    """
+    tags = menu.get('tags') or {'allergens': [], 'ingredients': []}
+    excluded_allergens = tag_mask(tags['allergens'], without_allergens)
+    excluded_ingredients = tag_mask(tags['ingredients'], without_ingredients)
+    required = tag_mask(tags['ingredients'], with_ingredients)
+    return [
+        item for item in menu['all_items']
+        if not item.get('allergen_mask', 0) & excluded_allergens
+        and not item.get('ingredient_mask', 0) & excluded_ingredients
+        and item.get('ingredient_mask', 0) & required == required
+    ]
+
+
+def main():
+    # menu_io импортирует menu_shards - загружаем при запуске
+    from menu_io import MENU_JSON_PATH, format_size_change, load_menu, save_menu
+
+    all_keys = ', '.join(key for key, _, _ in ALLERGENS + INGREDIENTS)
+    parser = argparse.ArgumentParser(description='Блюда меню с фильтром по аллергенам и ингредиентам',
+                                     epilog=f'Ключи: {all_keys}')
+    parser.add_argument('--menu', type=Path, default=MENU_JSON_PATH, help='путь к menu.json')
+    parser.add_argument('--without', nargs='+', default=[], metavar='KEY',
+                        help='исключить блюда с аллергенами или ингредиентами')
+    parser.add_argument('--with', dest='with_', nargs='+', default=[], metavar='KEY',
+                        help='только блюда со всеми этими ингредиентами')
+    parser.add_argument('--write', action='store_true',
+                        help='пересчитать маски и записать menu.json (с индексом и шардами)')
+    add_format_argument(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_run(args)
+
+    menu = load_menu(args.menu)
+    if args.write:
+        changed = tag_menu(menu)
+        sizes = save_menu(args.menu, menu, format=args.format)
+        print(f'Маски изменились у {changed} блюд, menu.json сохранен: {format_size_change(*sizes)}')
+        if not args.without and not args.with_:
+            return
+    elif 'tags' not in menu:
+        # menu.json собран до появления тегов: размечаем в памяти
+        tag_menu(menu)
+    allergen_keys = {tag['key'] for tag in menu['tags']['allergens']}
+    try:
+        items = filter_items(
+            menu,
+            without_allergens=[key for key in args.without if key in allergen_keys],
+            without_ingredients=[key for key in args.without if key not in allergen_keys],
+            with_ingredients=args.with_,
+        )
+    except ValueError as error:
+        parser.error(str(error))
+    for item in items:
+        print(f"{item['id']:>6}  {item['name']}")
+    print(f'Блюд: {len(items)} из {len(menu["all_items"])}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,198 +1,53 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
 import zipfile
 import os
-import json
-import shutil
 from pathlib import Path
 import re
 
+from category_classifier import detect_category
+from data_io import add_format_argument
+from image_dedup import DEDUP_COLLAPSE, add_dedup_arguments, dedup_options, find_duplicates
+from image_placeholders import CACHE_FILE_NAME, generate_placeholders
+from image_store import IMAGE_MANIFEST_FILE_NAME, hash_existing_images, store_member, update_image_manifest
+from image_variants import generate_variants
+from instrumentation import add_profile_arguments, start_run, timer
+from menu_core import MenuIndex
+from menu_io import add_items, empty_menu, format_size_change, load_menu, save_menu
+from zip_index import cached_zip_index
+
 # Пути
 ZIP_FILE = Path(__file__).parent.parent / "sapiens photo.zip"
-EXTRACT_DIR = Path(__file__).parent.parent / "temp_extracted"
 MENU_DIR = Path(__file__).parent.parent / "src" / "assets" / "menu"
 MENU_JSON_PATH = Path(__file__).parent.parent / "menu.json"
 
-# Категории для автоматической классификации
-CATEGORY_KEYWORDS = {
-    'Десерты': ['десерт', 'пирог', 'торт', 'кекс', 'вафля', 'блинчик', 'сырник', 'чизкейк', 'медовик', 'синнабон', 'крафл', 'орео', 'варенье'],
-    'Закуски': ['закуск', 'оливк', 'маслин', 'артишок', 'карпаччо', 'брускетт'],
-    'Мясные блюда': ['мясн', 'перепелк', 'утк', 'котлет', 'шатобриан', 'брискет', 'бургер', 'бекон', 'окорок', 'омлет', 'яйц'],
-    'Рыба и морепродукты': ['рыб', 'лосос', 'тунец', 'угор', 'креветк', 'гребешок', 'краб', 'икра', 'ролл', 'суши', 'голубец', 'треск', 'щук', 'темпура', 'нори'],
-    'Салаты': ['салат', 'руккола', 'боул', 'коул', 'stefan'],
-    'Супы': ['суп', 'бульон', 'том-ям', 'вонтон'],
-    'Суши и роллы': ['ролл', 'суши', 'калифорни', 'филадельфи', 'радуга'],
-    'Завтраки': ['завтрак', 'вафля', 'бриошь', 'драник', 'скрэмбл', 'птитим', 'киноа', 'овсян', 'сырник'],
-    'Прочее': []
-}
-
-def detect_category(dish_name):
-    """Определяет категорию блюда по названию"""
-    lower_name = dish_name.lower()
-    
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        for keyword in keywords:
-            if keyword in lower_name:
-                return category
-    
-    return 'Прочее'
-
 def normalize_filename(file_name):
     """Нормализует имя файла (удаляет расширение)"""
     # Удаляем расширение
     name = re.sub(r'\.(jpg|jpeg|png|JPG|JPEG|PNG)$', '', file_name, flags=re.IGNORECASE)
     return name.strip()
 
-def get_raw_filename_bytes(zip_path, member_name):
-    """Получает сырые байты имени файла из ZIP архива"""
-    import struct
-    with open(zip_path, 'rb') as f:
-        data = f.read()
-    
-    pos = 0
-    while True:
-        pos = data.find(b'PK\x01\x02', pos)
-        if pos == -1:
-            break
-        
-        try:
-            name_len = struct.unpack('<H', data[pos + 28:pos + 30])[0]
-            filename_start = pos + 46
-            filename_bytes = data[filename_start:filename_start + name_len]
-            
-            # Проверяем, соответствует ли это нашему файлу
-            # Сравниваем с оригинальным именем
-            test_decoded = filename_bytes.decode('cp437', errors='ignore')
-            if member_name in test_decoded or test_decoded[:30] in member_name[:50]:
-                return filename_bytes
-        except:
-            pass
-        
-        pos += 1
-        if pos >= len(data) - 100:
-            break
-    
-    return None
+def get_relative_path(fixed_name):
+    """Возвращает путь файла внутри архива без директории 'sapiens photo/'"""
+    if 'sapiens photo/' in fixed_name:
+        return fixed_name.replace('sapiens photo/', '')
+    return os.path.basename(fixed_name)
 
-def fix_filename_encoding(filename, zip_path=None):
-    """Исправляет кодировку имени файла из ZIP архива"""
-    # Если передан путь к ZIP, пытаемся получить сырые байты
-    if zip_path:
-        raw_bytes = get_raw_filename_bytes(zip_path, filename)
-        if raw_bytes:
-            # Пробуем декодировать через cp866 (правильная кодировка для русских имен в ZIP)
-            try:
-                decoded = raw_bytes.decode('cp866', errors='ignore')
-                return decoded
-            except:
-                pass
-    
-    # Fallback: пробуем исправить уже декодированное имя
-    try:
-        if isinstance(filename, str):
-            # Пытаемся представить как байты и передекодировать
-            # Если имя уже неправильно декодировано, это сложнее исправить
-            pass
-    except Exception as e:
-        pass
-    
-    return filename
+def is_image_file(file_name):
+    """Проверяет, является ли файл изображением"""
+    return any(file_name.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png'])
 
-def extract_zip_with_encoding(zip_path, extract_dir):
-    """Извлекает zip-архив с правильной обработкой кодировки имен файлов"""
-    import struct
-    
-    if extract_dir.exists():
-        shutil.rmtree(extract_dir)
-    extract_dir.mkdir(parents=True, exist_ok=True)
-    
-    images_info = []
-    
-    # Сначала читаем ZIP файл как бинарный, чтобы получить правильные имена
-    filename_map = {}  # маппинг неправильного имени -> правильного
-    
-    with open(zip_path, 'rb') as f:
-        data = f.read()
-    
-    pos = 0
-    while True:
-        pos = data.find(b'PK\x01\x02', pos)
-        if pos == -1:
-            break
-        
-        try:
-            name_len = struct.unpack('<H', data[pos + 28:pos + 30])[0]
-            filename_start = pos + 46
-            filename_bytes = data[filename_start:filename_start + name_len]
-            
-            # Декодируем через cp866 (правильная кодировка)
-            correct_name = filename_bytes.decode('cp866', errors='ignore')
-            # Также получаем имя, как его видит zipfile (через cp437)
-            incorrect_name = filename_bytes.decode('cp437', errors='ignore')
-            
-            if correct_name != incorrect_name:
-                filename_map[incorrect_name] = correct_name
-        except:
-            pass
-        
-        pos += 1
-        if pos >= len(data) - 100:
-            break
-    
-    # Теперь извлекаем файлы
-    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        for member in zip_ref.namelist():
-            if member.endswith('/'):
-                continue
-            
-            # Получаем правильное имя
-            fixed_name = filename_map.get(member, member)
-            
-            # Извлекаем файл
-            try:
-                # Извлекаем с оригинальным именем (member)
-                zip_ref.extract(member, extract_dir)
-                
-                # Получаем путь без директории "sapiens photo/"
-                if 'sapiens photo/' in fixed_name:
-                    relative_path = fixed_name.replace('sapiens photo/', '')
-                else:
-                    relative_path = os.path.basename(fixed_name)
-                
-                old_path = extract_dir / member
-                new_path = extract_dir / relative_path
-                
-                # Создаем директорию для нового пути, если нужно
-                new_path.parent.mkdir(parents=True, exist_ok=True)
-                
-                if old_path.exists():
-                    # Удаляем файл, если он уже существует
-                    if new_path.exists() and old_path != new_path:
-                        new_path.unlink()
-                    # Переименовываем файл
-                    if old_path != new_path:
-                        old_path.rename(new_path)
-                        print(f"✓ {relative_path[:60]}...")
-                    
-                    # Сохраняем информацию об изображении
-                    if any(relative_path.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png']):
-                        images_info.append((new_path, relative_path))
-            except Exception as e:
-                print(f"✗ Ошибка при извлечении {member}: {e}")
-    
-    return images_info
-
-def find_images(directory):
-    """Рекурсивно находит все изображения в директории"""
-    image_extensions = ['.jpg', '.jpeg', '.png']
+def list_zip_images(zip_path):
+    """Возвращает список (имя в архиве, правильное имя) для изображений из zip-архива"""
     images = []
-    
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if any(file.lower().endswith(ext) for ext in image_extensions):
-                images.append(Path(root) / file)
-    
+    for entry in cached_zip_index(zip_path):
+        if entry.name.endswith('/'):
+            continue
+        relative_path = get_relative_path(entry.fixed_name)
+        if is_image_file(relative_path):
+            images.append((entry.name, relative_path))
     return images
 
 def create_safe_filename(name, extension):
@@ -202,63 +57,30 @@ def create_safe_filename(name, extension):
     safe_name = re.sub(r'[-\s]+', '_', safe_name)
     return f"{safe_name}{extension}"
 
-def main():
-    print('Начинаю парсинг меню из zip-архива...')
-    
-    # Извлекаем zip-архив
-    print('Извлекаю файлы из zip-архива...')
-    extracted_images = extract_zip_with_encoding(ZIP_FILE, EXTRACT_DIR)
-    
-    # Если функция вернула список изображений, используем его
-    if extracted_images:
-        images = extracted_images
-        print(f'Найдено {len(images)} изображений')
-    else:
-        # Иначе ищем все изображения рекурсивно
-        print('Ищу изображения...')
-        images = find_images(EXTRACT_DIR)
-        print(f'Найдено {len(images)} изображений')
-    
-    # Читаем существующий menu.json
-    existing_menu = {
-        'menu': {'categories': []},
-        'all_items': [],
-        'statistics': {'total_items': 0, 'categories_count': 0}
-    }
-    max_id = 0
-    
-    if MENU_JSON_PATH.exists():
-        try:
-            with open(MENU_JSON_PATH, 'r', encoding='utf-8') as f:
-                existing_menu = json.load(f)
-            # Находим максимальный ID
-            if existing_menu.get('all_items'):
-                max_id = max([item.get('id', 0) for item in existing_menu['all_items']], default=0)
-        except Exception as e:
-            print(f'Не удалось прочитать существующий menu.json: {e}, создаю новый')
-    
-    # Создаем карту существующих блюд
-    existing_dishes = {}
-    if existing_menu.get('all_items'):
-        for item in existing_menu['all_items']:
-            existing_dishes[item.get('name', '').lower()] = item
+@timer('zip.add_dishes')
+def add_dishes_from_zip(menu, zip_path=ZIP_FILE, menu_dir=MENU_DIR, dedup=None):
+    """Добавляет в меню блюда для новых фотографий из архива; возвращает новые блюда
+
+    dedup - DedupOptions (image_dedup.py): почти одинаковые фото ищутся среди
+    новых фото и изображений меню до распаковки, в режиме collapse повторы
+    не добавляются.
+    """
+    # Читаем список изображений из центрального каталога архива
+    images = list_zip_images(zip_path)
+    print(f'Найдено {len(images)} изображений')
+    
+    # Существующие блюда: максимальный ID и названия без учета регистра.
+    # Совпадение точное, без normalize_name: "Цезарь (с креветками)" и
+    # "Цезарь с креветками" - разные фото и разные блюда
+    max_id = MenuIndex(menu).max_id()
+    existing_names = {(item.get('name') or '').lower() for item in menu['all_items']}
     
     # Убеждаемся, что директория menu существует
-    MENU_DIR.mkdir(parents=True, exist_ok=True)
+    menu_dir.mkdir(parents=True, exist_ok=True)
     
-    # Обрабатываем каждое изображение
-    new_dishes = []
-    category_map = {}
-    
-    for item in images:
-        # images теперь содержит кортежи (путь, правильное имя)
-        if isinstance(item, tuple):
-            image_path, correct_filename = item
-            file_name = correct_filename
-        else:
-            image_path = item
-            file_name = image_path.name
-        
+    # Отбираем фото новых блюд
+    candidates = []
+    for member, file_name in images:
         dish_name = normalize_filename(file_name)
         
         # Пропускаем, если имя пустое или слишком короткое
@@ -267,96 +89,130 @@ def main():
             continue
         
         # Проверяем, не существует ли уже такое блюдо
-        if dish_name.lower() in existing_dishes:
+        if dish_name.lower() in existing_names:
             print(f'Блюдо "{dish_name}" уже существует, пропускаю')
             continue
-        
-        # Определяем расширение
-        ext = image_path.suffix.lower()
-        image_format = ext[1:]  # убираем точку
-        
-        # Создаем безопасное имя файла
-        safe_file_name = create_safe_filename(dish_name, ext)
-        target_image_path = MENU_DIR / safe_file_name
-        
-        # Копируем изображение
-        shutil.copy2(image_path, target_image_path)
-        print(f'Скопировано: {file_name} -> {safe_file_name}')
-        
-        # Определяем категорию
-        category = detect_category(dish_name)
-        
-        # Создаем объект блюда
-        max_id += 1
-        dish = {
-            'id': max_id,
-            'name': dish_name,
-            'category': category,
-            'image': f'images/{safe_file_name}',
-            'image_format': image_format,
-            'description': None,
-            'composition': None,
-            'allergens': None
-        }
-        
-        new_dishes.append(dish)
-        
-        # Добавляем в карту категорий
-        if category not in category_map:
-            category_map[category] = []
-        category_map[category].append(dish)
+        candidates.append((member, file_name, dish_name))
+    
+    # Ищем почти одинаковые фото до записи файлов в menu_dir
+    existing_images = []
+    for item in menu['all_items']:
+        if item.get('image'):
+            path = menu_dir / item['image'].split('/', 1)[-1]
+            if path.exists():
+                existing_images.append(path)
+    duplicates = find_duplicates(zip_path, [member for member, _, _ in candidates], dedup, existing_images)
+    if dedup is not None and dedup.mode == DEDUP_COLLAPSE:
+        candidates = [candidate for candidate in candidates if candidate[0] not in duplicates]
     
+    # Обрабатываем каждое изображение
+    new_dishes = []
+    category_map = {}
+    
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        for member, file_name, dish_name in candidates:
+            # Определяем расширение
+            ext = Path(file_name).suffix.lower()
+            image_format = ext[1:]  # убираем точку
+            
+            # Распаковываем изображение сразу в menu_dir под именем с хешем содержимого
+            try:
+                safe_file_name = store_member(zip_ref, member, menu_dir, create_safe_filename(dish_name, ''), ext)
+            except Exception as e:
+                print(f'✗ Ошибка при извлечении {file_name}: {e}')
+                continue
+            print(f'Скопировано: {file_name} -> {safe_file_name}')
+            
+            # Определяем категорию
+            category = detect_category(dish_name)
+            
+            # Создаем объект блюда
+            max_id += 1
+            dish = {
+                'id': max_id,
+                'name': dish_name,
+                'category': category,
+                'image': f'images/{safe_file_name}',
+                'image_format': image_format,
+                'description': None,
+                'composition': None,
+                'allergens': None
+            }
+            
+            new_dishes.append(dish)
+            
+            # Добавляем в карту категорий
+            if category not in category_map:
+                category_map[category] = []
+            category_map[category].append(dish)
+        
     print(f'\nОбработано {len(new_dishes)} новых блюд')
     print(f'Категории: {", ".join(category_map.keys())}')
     
-    # Объединяем существующие и новые блюда
-    all_dishes = (existing_menu.get('all_items') or []) + new_dishes
-    
-    # Группируем по категориям
-    categories_map = {}
+    # Добавляем новые блюда в all_items и в списки id их категорий
+    add_items(menu, new_dishes)
+    return new_dishes
+
+def prepare_images(menu, menu_dir=MENU_DIR, cache_dir=MENU_JSON_PATH.parent, jobs=None):
+    """Создает адаптивные версии и заглушки изображений для всех блюд меню
+
+    Изображения со старыми именами переводятся на имена с хешем содержимого,
+    в конце обновляется манифест изображений и удаляются давно ненужные
+    файлы. Возвращает число блюд с новым путем к изображению.
+    jobs - число процессов для обработки изображений (None - по числу ядер).
+    """
+    all_dishes = menu['all_items']
+    
+    renamed = hash_existing_images(menu_dir, all_dishes)
+    if renamed:
+        print(f'Изображения {renamed} блюд переименованы по хешу содержимого')
+    
+    # Создаем адаптивные версии изображений (актуальные пропускаются)
+    print('Создаю адаптивные версии изображений...')
+    count = generate_variants(menu_dir, all_dishes, jobs=jobs)
+    print(f'Версии изображений готовы для {count} блюд')
+    
+    # Считаем заглушки для мгновенной отрисовки сетки (кеш по хешу изображения)
+    print('Создаю заглушки изображений...')
+    count, computed = generate_placeholders(menu_dir, all_dishes, cache_dir / CACHE_FILE_NAME, jobs=jobs)
+    print(f'Заглушки готовы для {count} блюд (посчитано заново: {computed})')
+    
+    removed, pending = update_image_manifest(menu_dir, all_dishes, cache_dir / IMAGE_MANIFEST_FILE_NAME)
+    print(f'Удалено неиспользуемых изображений: {len(removed)} (ожидают удаления: {pending})')
+    return renamed
+
+def parse_args():
+    """Разбирает аргументы командной строки"""
+    parser = argparse.ArgumentParser(description='Добавление в menu.json блюд для новых фото из zip-архива')
+    add_dedup_arguments(parser)
+    add_format_argument(parser)
+    add_profile_arguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    start_run(args)
+    print('Начинаю парсинг меню из zip-архива...')
     
-    # Сначала добавляем существующие категории
-    if existing_menu.get('menu') and existing_menu['menu'].get('categories'):
-        for cat in existing_menu['menu']['categories']:
-            categories_map[cat['name']] = cat.get('items', [])
+    # Читаем существующий menu.json
+    existing_menu = empty_menu()
     
-    # Добавляем новые блюда к категориям
-    for dish in new_dishes:
-        if dish['category'] not in categories_map:
-            categories_map[dish['category']] = []
-        categories_map[dish['category']].append(dish)
+    if MENU_JSON_PATH.exists():
+        try:
+            existing_menu = load_menu(MENU_JSON_PATH)
+        except Exception as e:
+            print(f'Не удалось прочитать существующий menu.json: {e}, создаю новый')
     
-    # Формируем структуру меню
-    menu_structure = {
-        'menu': {
-            'categories': [
-                {
-                    'name': category_name,
-                    'items': items,
-                    'count': len(items)
-                }
-                for category_name, items in categories_map.items()
-            ]
-        },
-        'all_items': all_dishes,
-        'statistics': {
-            'total_items': len(all_dishes),
-            'categories_count': len(categories_map)
-        }
-    }
+    add_dishes_from_zip(existing_menu, dedup=dedup_options(args, MENU_JSON_PATH.parent))
+    prepare_images(existing_menu)
     
     # Сохраняем menu.json
-    with open(MENU_JSON_PATH, 'w', encoding='utf-8') as f:
-        json.dump(menu_structure, f, ensure_ascii=False, indent=2)
+    sizes = save_menu(MENU_JSON_PATH, existing_menu, format=args.format)
     
-    print(f'\nmenu.json обновлен: {len(all_dishes)} блюд в {len(categories_map)} категориях')
-    
-    # Очищаем временную директорию
-    if EXTRACT_DIR.exists():
-        shutil.rmtree(EXTRACT_DIR)
+    print(f'\nmenu.json обновлен: {len(existing_menu["all_items"])} блюд в '
+          f"{existing_menu['statistics']['categories_count']} категориях ({format_size_change(*sizes)})")
     
     print('\nГотово!')
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,1013 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Извлечение текстовых строк из PDF без сторонних библиотек.
+
+Модуль разбирает таблицу ссылок (классическую и xref-потоки, включая
+объектные потоки), обходит дерево страниц, распаковывает потоки
+содержимого (FlateDecode) и интерпретирует текстовые операторы
+(Tf, Td, TD, Tm, T*, Tj, TJ, ', "). Коды символов переводятся в Unicode
+через ToUnicode CMap шрифта или его кодировку (WinAnsi, MacRoman,
+Differences). Фрагменты текста с одной базовой линией склеиваются в
+строки сверху вниз.
+
+Страницы обрабатываются параллельно в пуле процессов, а результат каждой
+страницы кешируется по SHA-1 ее потоков (содержимое, шрифты, формы),
+поэтому повторный запуск на неизмененном PDF почти мгновенный.
+
+Текст, переведенный в кривые, извлечь нельзя: на таких страницах нет
+текстовых операторов, и для них возвращается пустой список строк.
+"""
+
+import hashlib
+import json
+import math
+import mmap
+import os
+import re
+import zlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from atomic_io import atomic_open
+from instrumentation import count, map_with_stats, timer
+
+CACHE_FILE_NAME = '.menu-pdf-cache.json'
+CACHE_VERSION = 1
+
+# Отрицательный сдвиг в TJ (в тысячных долях кегля), который считаем пробелом
+TJ_SPACE_THRESHOLD = 200
+# Разрыв между фрагментами (в долях кегля), который считаем пробелом
+RUN_GAP_SPACE = 0.2
+# Допуск по вертикали (в долях кегля) для фрагментов одной строки
+LINE_TOLERANCE = 0.4
+# Глубина вложенности форм (Form XObject)
+MAX_FORM_DEPTH = 8
+
+Ref = namedtuple('Ref', ['num', 'gen'])
+
+
+class PdfError(Exception):
+    """Файл поврежден или не является PDF"""
+
+
+class Name(str):
+    """Имя PDF (/Name)"""
+
+
+class Keyword(str):
+    """Ключевое слово или оператор PDF"""
+
+
+class PdfStream:
+    """Поток PDF: словарь и сырые (не распакованные) данные"""
+
+    def __init__(self, attrs, raw):
+        self.attrs = attrs
+        self.raw = raw
+
+    def get(self, key, default=None):
+        return self.attrs.get(key, default)
+
+
+# --- Лексический разбор ---------------------------------------------------
+
+_DELIMS = rb'\x00\t\n\x0c\r ()<>\[\]{}/%'
+_TOKEN_RE = re.compile(rb'''
+    (?P<ws>(?:[\x00\t\n\x0c\r ]+|%[^\r\n]*)+)
+  | (?P<dopen><<) | (?P<dclose>>>)
+  | (?P<aopen>\[) | (?P<aclose>\])
+  | (?P<hex><[0-9A-Fa-f\x00\t\n\x0c\r ]*>)
+  | (?P<name>/[^''' + _DELIMS + rb''']*)
+  | (?P<num>[+-]?(?:\d+\.?\d*|\.\d+)(?![^''' + _DELIMS + rb''']))
+  | (?P<lstr>\()
+  | (?P<kw>[^''' + _DELIMS + rb''']+)
+  | (?P<brace>[{}])
+''', re.X)
+_STRING_SPECIAL_RE = re.compile(rb'[()\\]')
+_NAME_ESCAPE_RE = re.compile(rb'#([0-9A-Fa-f]{2})')
+_WS_RE = re.compile(rb'[\x00\t\n\x0c\r ]+')
+_ESCAPES = {ord('n'): b'\n', ord('r'): b'\r', ord('t'): b'\t', ord('b'): b'\b',
+            ord('f'): b'\f', ord('('): b'(', ord(')'): b')', ord('\\'): b'\\'}
+
+_END = object()
+_DICT_CLOSE = object()
+_ARRAY_CLOSE = object()
+
+
+class _Lexer:
+    """Читает объекты PDF из буфера начиная с заданной позиции"""
+
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos
+
+    def _literal_string(self):
+        data = self.data
+        out = bytearray()
+        depth = 1
+        pos = self.pos
+        while True:
+            match = _STRING_SPECIAL_RE.search(data, pos)
+            if match is None:
+                raise PdfError('Незакрытая строка')
+            out += data[pos:match.start()]
+            char = data[match.start()]
+            pos = match.end()
+            if char == 0x5C:  # обратная косая черта
+                nxt = data[pos:pos + 1]
+                if not nxt:
+                    break
+                code = nxt[0]
+                if code in _ESCAPES:
+                    out += _ESCAPES[code]
+                    pos += 1
+                elif 0x30 <= code <= 0x37:
+                    octal = re.match(rb'[0-7]{1,3}', data[pos:pos + 3]).group()
+                    out.append(int(octal, 8) & 0xFF)
+                    pos += len(octal)
+                elif nxt == b'\r':
+                    pos += 2 if data[pos + 1:pos + 2] == b'\n' else 1
+                elif nxt == b'\n':
+                    pos += 1
+                else:
+                    out += nxt
+                    pos += 1
+            elif char == 0x28:  # (
+                depth += 1
+                out.append(char)
+            else:  # )
+                depth -= 1
+                if depth == 0:
+                    break
+                out.append(char)
+        self.pos = pos
+        return bytes(out)
+
+    def token(self):
+        """Следующий простой токен или маркер начала/конца контейнера"""
+        while True:
+            match = _TOKEN_RE.match(self.data, self.pos)
+            if match is None:
+                if self.pos >= len(self.data):
+                    return _END
+                raise PdfError(f'Неожиданный байт по смещению {self.pos}')
+            self.pos = match.end()
+            kind = match.lastgroup
+            if kind == 'ws':
+                continue
+            text = match.group()
+            if kind == 'num':
+                return float(text) if b'.' in text else int(text)
+            if kind == 'name':
+                return Name(_NAME_ESCAPE_RE.sub(
+                    lambda m: bytes([int(m.group(1), 16)]), text[1:]).decode('latin-1'))
+            if kind == 'lstr':
+                return self._literal_string()
+            if kind == 'hex':
+                digits = _WS_RE.sub(b'', text[1:-1])
+                if len(digits) % 2:
+                    digits += b'0'
+                return bytes.fromhex(digits.decode('ascii'))
+            if kind == 'dopen':
+                return '<<'
+            if kind == 'dclose':
+                return _DICT_CLOSE
+            if kind == 'aopen':
+                return '['
+            if kind == 'aclose':
+                return _ARRAY_CLOSE
+            if kind == 'brace':
+                continue
+            word = text.decode('latin-1')
+            if word == 'true':
+                return True
+            if word == 'false':
+                return False
+            if word == 'null':
+                return None
+            return Keyword(word)
+
+    def read(self, refs=True):
+        """Читает один объект (массивы и словари - целиком)"""
+        token = self.token()
+        return self._complete(token, refs)
+
+    def _complete(self, token, refs):
+        if token == '[' and not isinstance(token, Keyword):
+            items = []
+            while True:
+                item = self.token()
+                if item is _ARRAY_CLOSE or item is _END:
+                    return items
+                items.append(self._complete(item, refs))
+        if token == '<<' and not isinstance(token, Keyword):
+            attrs = {}
+            while True:
+                key = self.token()
+                if key is _DICT_CLOSE or key is _END:
+                    return attrs
+                attrs[key] = self._complete(self.token(), refs)
+        if refs and isinstance(token, int) and not isinstance(token, bool):
+            # "n g R" - ссылка на объект
+            saved = self.pos
+            gen = self.token()
+            if isinstance(gen, int) and not isinstance(gen, bool):
+                keyword = self.token()
+                if keyword == 'R' and isinstance(keyword, Keyword):
+                    return Ref(token, gen)
+            self.pos = saved
+        return token
+
+
+# --- Фильтры ----------------------------------------------------------------
+
+def _png_unpredict(data, columns, colors=1, bits=8):
+    """Снимает PNG-предиктор (Predictor >= 10)"""
+    bpp = max(1, colors * bits // 8)
+    row_len = (columns * colors * bits + 7) // 8
+    out = bytearray()
+    prev = bytearray(row_len)
+    for start in range(0, len(data), row_len + 1):
+        kind = data[start]
+        row = bytearray(data[start + 1:start + 1 + row_len])
+        for i in range(len(row)):
+            left = row[i - bpp] if i >= bpp else 0
+            up = prev[i]
+            if kind == 1:
+                row[i] = (row[i] + left) & 0xFF
+            elif kind == 2:
+                row[i] = (row[i] + up) & 0xFF
+            elif kind == 3:
+                row[i] = (row[i] + (left + up) // 2) & 0xFF
+            elif kind == 4:
+                up_left = prev[i - bpp] if i >= bpp else 0
+                p = left + up - up_left
+                pa, pb, pc = abs(p - left), abs(p - up), abs(p - up_left)
+                predictor = left if pa <= pb and pa <= pc else (up if pb <= pc else up_left)
+                row[i] = (row[i] + predictor) & 0xFF
+        out += row
+        prev = row
+    return bytes(out)
+
+
+def decode_stream(stream, resolve=lambda obj: obj):
+    """Распаковывает данные потока (FlateDecode, ASCIIHexDecode)"""
+    filters = resolve(stream.get('Filter'))
+    params = resolve(stream.get('DecodeParms'))
+    if filters is None:
+        return stream.raw
+    if not isinstance(filters, list):
+        filters, params = [filters], [params]
+    elif not isinstance(params, list):
+        params = [params] * len(filters)
+
+    data = stream.raw
+    for name, param in zip(filters, params):
+        param = resolve(param) or {}
+        if name in ('FlateDecode', 'Fl'):
+            decompressor = zlib.decompressobj()
+            # Допускаем обрезанный хвост: берем то, что удалось распаковать
+            data = decompressor.decompress(data) + decompressor.flush()
+            predictor = param.get('Predictor', 1)
+            if predictor >= 10:
+                data = _png_unpredict(data, param.get('Columns', 1),
+                                      param.get('Colors', 1), param.get('BitsPerComponent', 8))
+        elif name in ('ASCIIHexDecode', 'AHx'):
+            digits = _WS_RE.sub(b'', data).rstrip(b'>')
+            if len(digits) % 2:
+                digits += b'0'
+            data = bytes.fromhex(digits.decode('ascii'))
+        else:
+            raise PdfError(f'Фильтр {name} не поддерживается')
+    return data
+
+
+# --- Документ --------------------------------------------------------------
+
+_OBJ_HEADER_RE = re.compile(rb'(\d+)\s+(\d+)\s+obj\b')
+
+
+class PdfDocument:
+    """PDF файл, отображенный в память"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise PdfError(f'Пустой файл: {path}')
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # номер объекта -> ('offset', смещение) или ('objstm', номер потока, индекс)
+        self.xref = {}
+        self.trailer = {}
+        self._cache = {}
+        self._objstm_cache = {}
+        try:
+            self._read_xref()
+        except (PdfError, ValueError, zlib.error):
+            self._scan_objects()
+
+    def close(self):
+        self.data.close()
+
+    # Таблица ссылок
+
+    def _read_xref(self):
+        tail = self.data[max(0, len(self.data) - 2048):]
+        pos = tail.rfind(b'startxref')
+        if pos < 0:
+            raise PdfError('Не найден startxref')
+        offset = int(tail[pos + 9:].split()[0])
+        seen = set()
+        while offset is not None and offset not in seen:
+            seen.add(offset)
+            if self.data[offset:offset + 4] == b'xref':
+                trailer = self._read_xref_table(offset)
+            else:
+                trailer = self._read_xref_stream(offset)
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+            if 'XRefStm' in trailer:
+                self._read_xref_stream(trailer['XRefStm'])
+            offset = trailer.get('Prev')
+        if 'Root' not in self.trailer:
+            raise PdfError('В trailer нет Root')
+
+    def _read_xref_table(self, offset):
+        lexer = _Lexer(self.data, offset + 4)
+        while True:
+            start = lexer.token()
+            if start == 'trailer' and isinstance(start, Keyword):
+                return lexer.read()
+            count = lexer.token()
+            for num in range(start, start + count):
+                entry_offset, gen, kind = lexer.token(), lexer.token(), lexer.token()
+                if kind == 'n' and entry_offset:
+                    self.xref.setdefault(num, ('offset', entry_offset))
+
+    def _read_xref_stream(self, offset):
+        _, stream = self._read_object_at(offset)
+        if not isinstance(stream, PdfStream) or stream.get('Type') != 'XRef':
+            raise PdfError('Ожидался xref-поток')
+        data = decode_stream(stream)
+        widths = stream.get('W')
+        index = stream.get('Index', [0, stream.get('Size')])
+        row_len = sum(widths)
+        pos = 0
+        for start, count in zip(index[::2], index[1::2]):
+            for num in range(start, start + count):
+                fields = []
+                for width in widths:
+                    fields.append(int.from_bytes(data[pos:pos + width], 'big') if width else None)
+                    pos += width
+                kind = 1 if fields[0] is None else fields[0]
+                if kind == 1:
+                    self.xref.setdefault(num, ('offset', fields[1]))
+                elif kind == 2:
+                    self.xref.setdefault(num, ('objstm', fields[1], fields[2] or 0))
+                if pos + row_len > len(data):
+                    break
+        return stream.attrs
+
+    def _scan_objects(self):
+        """Запасной путь для поврежденной таблицы ссылок: ищем "n g obj" по файлу"""
+        self.xref = {}
+        for match in _OBJ_HEADER_RE.finditer(self.data):
+            self.xref[int(match.group(1))] = ('offset', match.start())
+        for match in re.finditer(rb'trailer\s*<<', self.data):
+            self.trailer.update(_Lexer(self.data, match.end() - 2).read())
+        if 'Root' not in self.trailer:
+            for num in self.xref:
+                obj = self.get(num)
+                if isinstance(obj, dict) and obj.get('Type') == 'Catalog':
+                    self.trailer['Root'] = Ref(num, 0)
+                    break
+        if 'Root' not in self.trailer:
+            raise PdfError('Не найден каталог документа')
+
+    # Объекты
+
+    def _read_object_at(self, offset):
+        match = _OBJ_HEADER_RE.match(self.data, offset)
+        if match is None:
+            raise PdfError(f'Нет объекта по смещению {offset}')
+        lexer = _Lexer(self.data, match.end())
+        obj = lexer.read()
+        if isinstance(obj, dict):
+            saved = lexer.pos
+            keyword = lexer.token()
+            if keyword == 'stream' and isinstance(keyword, Keyword):
+                start = lexer.pos
+                if self.data[start:start + 2] == b'\r\n':
+                    start += 2
+                elif self.data[start:start + 1] in (b'\n', b'\r'):
+                    start += 1
+                length = self.resolve(obj.get('Length'))
+                if not isinstance(length, int) or self.data[start + length:start + length + 20].find(b'endstream') < 0:
+                    length = self.data.find(b'endstream', start) - start
+                    while length > 0 and self.data[start + length - 1:start + length] in (b'\n', b'\r'):
+                        length -= 1
+                return int(match.group(1)), PdfStream(obj, self.data[start:start + length])
+            lexer.pos = saved
+        return int(match.group(1)), obj
+
+    def _object_from_stream(self, stream_num, index):
+        objects = self._objstm_cache.get(stream_num)
+        if objects is None:
+            stream = self.get(stream_num)
+            data = decode_stream(stream, self.resolve)
+            count, first = stream.get('N'), stream.get('First')
+            header = _Lexer(data)
+            offsets = [(header.token(), header.token()) for _ in range(count)]
+            objects = [_Lexer(data, first + obj_offset).read() for _, obj_offset in offsets]
+            self._objstm_cache[stream_num] = objects
+        return objects[index]
+
+    def get(self, num):
+        """Объект по номеру"""
+        if num in self._cache:
+            return self._cache[num]
+        entry = self.xref.get(num)
+        obj = None
+        if entry is not None:
+            if entry[0] == 'offset':
+                obj = self._read_object_at(entry[1])[1]
+            else:
+                obj = self._object_from_stream(entry[1], entry[2])
+        self._cache[num] = obj
+        return obj
+
+    def resolve(self, obj):
+        """Разыменовывает ссылку (рекурсивно, пока это ссылка)"""
+        seen = 0
+        while isinstance(obj, Ref) and seen < 32:
+            obj = self.get(obj.num)
+            seen += 1
+        return obj
+
+    # Страницы
+
+    def pages(self):
+        """Список словарей страниц с унаследованными ресурсами"""
+        root = self.resolve(self.trailer['Root'])
+        result = []
+        stack = [(self.resolve(root.get('Pages')), {})]
+        visited = set()
+        while stack:
+            node, inherited = stack.pop()
+            if not isinstance(node, dict) or id(node) in visited:
+                continue
+            visited.add(id(node))
+            attrs = dict(inherited)
+            for key in ('Resources', 'MediaBox', 'CropBox', 'Rotate'):
+                if key in node:
+                    attrs[key] = node[key]
+            if node.get('Type') == 'Pages' or 'Kids' in node:
+                kids = self.resolve(node.get('Kids')) or []
+                for kid in reversed(kids):
+                    stack.append((self.resolve(kid), attrs))
+            else:
+                page = dict(node)
+                page.update({key: value for key, value in attrs.items() if key not in node})
+                result.append(page)
+        return result
+
+    def page_content(self, page):
+        """Распакованное содержимое страницы (все потоки Contents подряд)"""
+        contents = self.resolve(page.get('Contents'))
+        if contents is None:
+            return b''
+        if not isinstance(contents, list):
+            contents = [contents]
+        parts = []
+        for item in contents:
+            stream = self.resolve(item)
+            if isinstance(stream, PdfStream):
+                parts.append(decode_stream(stream, self.resolve))
+        return b'\n'.join(parts)
+
+    def page_fingerprint(self, page):
+        """SHA-1 всех потоков, от которых зависит текст страницы"""
+        digest = hashlib.sha1()
+        digest.update(f'v{CACHE_VERSION}'.encode())
+        contents = self.resolve(page.get('Contents'))
+        for item in contents if isinstance(contents, list) else [contents]:
+            stream = self.resolve(item)
+            if isinstance(stream, PdfStream):
+                digest.update(stream.raw)
+        self._fingerprint_resources(self.resolve(page.get('Resources')), digest, 0)
+        return digest.hexdigest()
+
+    def _fingerprint_resources(self, resources, digest, depth):
+        if not isinstance(resources, dict) or depth > MAX_FORM_DEPTH:
+            return
+        fonts = self.resolve(resources.get('Font')) or {}
+        for name in sorted(fonts):
+            font = self.resolve(fonts[name])
+            digest.update(repr(sorted((k, repr(v)) for k, v in font.items())).encode())
+            for key in ('ToUnicode', 'DescendantFonts', 'Encoding', 'Widths'):
+                value = self.resolve(font.get(key))
+                if isinstance(value, PdfStream):
+                    digest.update(value.raw)
+                elif isinstance(value, list):
+                    for item in value:
+                        item = self.resolve(item)
+                        digest.update(repr(item.attrs if isinstance(item, PdfStream) else item).encode())
+                elif isinstance(value, dict):
+                    digest.update(repr(sorted((k, repr(v)) for k, v in value.items())).encode())
+        xobjects = self.resolve(resources.get('XObject')) or {}
+        for name in sorted(xobjects):
+            xobject = self.resolve(xobjects[name])
+            if isinstance(xobject, PdfStream) and xobject.get('Subtype') == 'Form':
+                digest.update(xobject.raw)
+                self._fingerprint_resources(self.resolve(xobject.get('Resources')), digest, depth + 1)
+
+
+# --- Шрифты ------------------------------------------------------------------
+
+# Кириллица в именах глифов Adobe (afii10017..afii10049, afii10065..afii10097)
+_AFII_UPPER = 'АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ'
+_AFII_LOWER = _AFII_UPPER.lower()
+_GLYPH_NAMES = {
+    'space': ' ', 'period': '.', 'comma': ',', 'hyphen': '-', 'slash': '/',
+    'colon': ':', 'parenleft': '(', 'parenright': ')', 'quotesingle': "'",
+    'quotedbl': '"', 'ampersand': '&', 'percent': '%', 'endash': '–', 'emdash': '—',
+    'guillemotleft': '«', 'guillemotright': '»', 'numero': '№', 'afii61352': '№',
+}
+for _i, _char in enumerate(_AFII_UPPER):
+    _GLYPH_NAMES[f'afii{10017 + _i}'] = _char
+for _i, _char in enumerate(_AFII_LOWER):
+    _GLYPH_NAMES[f'afii{10065 + _i}'] = _char
+for _i in range(10):
+    _GLYPH_NAMES[('zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine')[_i]] = str(_i)
+
+
+def _glyph_to_unicode(name):
+    if name in _GLYPH_NAMES:
+        return _GLYPH_NAMES[name]
+    if len(name) == 1:
+        return name
+    match = re.fullmatch(r'uni([0-9A-Fa-f]{4})+', name)
+    if match:
+        return ''.join(chr(int(name[i:i + 4], 16)) for i in range(3, len(name), 4))
+    match = re.fullmatch(r'u([0-9A-Fa-f]{4,6})', name)
+    if match:
+        return chr(int(match.group(1), 16))
+    return ''
+
+
+def _utf16(data):
+    return data.decode('utf-16-be', errors='ignore')
+
+
+def parse_cmap(data):
+    """Разбирает ToUnicode CMap: (длины кодов, {код: строка})"""
+    lexer = _Lexer(data)
+    code_lengths = set()
+    mapping = {}
+    operands = []
+    while True:
+        token = lexer.read(refs=False)
+        if token is _END:
+            break
+        if not isinstance(token, Keyword):
+            operands.append(token)
+            continue
+        if token == 'endcodespacerange':
+            for low in operands[::2]:
+                if isinstance(low, bytes):
+                    code_lengths.add(len(low))
+        elif token == 'endbfchar':
+            for src, dst in zip(operands[::2], operands[1::2]):
+                if isinstance(src, bytes) and isinstance(dst, bytes):
+                    mapping[src] = _utf16(dst)
+        elif token == 'endbfrange':
+            for low, high, dst in zip(operands[::3], operands[1::3], operands[2::3]):
+                if not (isinstance(low, bytes) and isinstance(high, bytes)):
+                    continue
+                size = len(low)
+                start, end = int.from_bytes(low, 'big'), int.from_bytes(high, 'big')
+                for i, code in enumerate(range(start, min(end, start + 0xFFFF) + 1)):
+                    key = code.to_bytes(size, 'big')
+                    if isinstance(dst, list):
+                        if i < len(dst) and isinstance(dst[i], bytes):
+                            mapping[key] = _utf16(dst[i])
+                    elif isinstance(dst, bytes) and dst:
+                        value = int.from_bytes(dst, 'big') + i
+                        mapping[key] = _utf16(value.to_bytes(len(dst), 'big'))
+        operands = []
+    if not code_lengths:
+        code_lengths = {len(key) for key in mapping} or {1}
+    return sorted(code_lengths), mapping
+
+
+class FontInfo:
+    """Все, что нужно для декодирования текста шрифтом (передается в процессы)"""
+
+    def __init__(self, code_lengths, mapping, widths, default_width, single_byte):
+        self.code_lengths = code_lengths    # возможные длины кода в байтах
+        self.mapping = mapping              # код (bytes) -> строка
+        self.widths = widths                # код (int) -> ширина в 1/1000 кегля
+        self.default_width = default_width
+        self.single_byte = single_byte
+
+    def decode(self, data):
+        """Возвращает [(строка, ширина в 1/1000, это пробел)] для каждого кода"""
+        result = []
+        pos = 0
+        lengths = self.code_lengths
+        while pos < len(data):
+            for length in lengths:
+                code = data[pos:pos + length]
+                if code in self.mapping or length == lengths[-1]:
+                    break
+            pos += len(code)
+            number = int.from_bytes(code, 'big')
+            text = self.mapping.get(code)
+            if text is None:
+                text = chr(number) if self.single_byte and number >= 0x20 else ''
+            width = self.widths.get(number, self.default_width)
+            result.append((text, width, self.single_byte and number == 32))
+        return result
+
+
+_SIMPLE_ENCODINGS = {
+    'WinAnsiEncoding': 'cp1252',
+    'MacRomanEncoding': 'mac_roman',
+    'StandardEncoding': 'latin-1',
+    'PDFDocEncoding': 'latin-1',
+}
+
+
+def load_font(doc, font):
+    """Строит FontInfo по словарю шрифта"""
+    font = doc.resolve(font) or {}
+    subtype = font.get('Subtype')
+    to_unicode = doc.resolve(font.get('ToUnicode'))
+
+    if subtype == 'Type0':
+        descendant = doc.resolve((doc.resolve(font.get('DescendantFonts')) or [None])[0]) or {}
+        default_width = descendant.get('DW', 1000)
+        widths = {}
+        w_array = doc.resolve(descendant.get('W')) or []
+        i = 0
+        while i < len(w_array):
+            first = doc.resolve(w_array[i])
+            second = doc.resolve(w_array[i + 1]) if i + 1 < len(w_array) else None
+            if isinstance(second, list):
+                for j, width in enumerate(second):
+                    widths[first + j] = doc.resolve(width)
+                i += 2
+            else:
+                width = doc.resolve(w_array[i + 2]) if i + 2 < len(w_array) else default_width
+                for code in range(first, (second or first) + 1):
+                    widths[code] = width
+                i += 3
+        code_lengths, mapping = [2], {}
+        if isinstance(to_unicode, PdfStream):
+            code_lengths, mapping = parse_cmap(decode_stream(to_unicode, doc.resolve))
+        return FontInfo(code_lengths, mapping, widths, default_width, single_byte=False)
+
+    # Простые шрифты: однобайтовые коды
+    mapping = {}
+    encoding = doc.resolve(font.get('Encoding'))
+    base = encoding.get('BaseEncoding') if isinstance(encoding, dict) else encoding
+    codec = _SIMPLE_ENCODINGS.get(base, 'cp1252')
+    for code in range(32, 256):
+        char = bytes([code]).decode(codec, errors='ignore')
+        if char:
+            mapping[bytes([code])] = char
+    if isinstance(encoding, dict):
+        code = 0
+        for item in doc.resolve(encoding.get('Differences')) or []:
+            if isinstance(item, int):
+                code = item
+            else:
+                mapping[bytes([code & 0xFF])] = _glyph_to_unicode(str(item))
+                code += 1
+    if isinstance(to_unicode, PdfStream):
+        mapping.update(parse_cmap(decode_stream(to_unicode, doc.resolve))[1])
+
+    first_char = font.get('FirstChar', 0)
+    widths = {first_char + i: doc.resolve(width)
+              for i, width in enumerate(doc.resolve(font.get('Widths')) or [])}
+    descriptor = doc.resolve(font.get('FontDescriptor')) or {}
+    return FontInfo([1], mapping, widths, descriptor.get('MissingWidth', 500), single_byte=True)
+
+
+def load_fonts(doc, resources):
+    """Шрифты ресурсов: имя -> FontInfo"""
+    fonts = doc.resolve((resources or {}).get('Font')) or {}
+    return {name: load_font(doc, font) for name, font in fonts.items()}
+
+
+# --- Интерпретация содержимого ----------------------------------------------
+
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+
+def _mult(m1, m2):
+    """Произведение матриц преобразования PDF (m1 x m2)"""
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+    return (a1 * a2 + b1 * c2, a1 * b2 + b1 * d2,
+            c1 * a2 + d1 * c2, c1 * b2 + d1 * d2,
+            e1 * a2 + f1 * c2 + e2, e1 * b2 + f1 * d2 + f2)
+
+
+def iter_operations(data):
+    """Перебирает операторы содержимого: (оператор, операнды)"""
+    lexer = _Lexer(data)
+    operands = []
+    while True:
+        token = lexer.read(refs=False)
+        if token is _END:
+            return
+        if not isinstance(token, Keyword):
+            operands.append(token)
+            continue
+        if token == 'BI':
+            # Встроенное изображение: пропускаем двоичные данные до EI
+            end = re.compile(rb'\sEI(?=[\s]|$)').search(data, lexer.pos)
+            lexer.pos = end.end() if end else len(data)
+            operands = []
+            continue
+        yield str(token), operands
+        operands = []
+
+
+TextRun = namedtuple('TextRun', ['x', 'y', 'end_x', 'size', 'text'])
+
+
+class _TextState:
+    def __init__(self):
+        self.char_spacing = 0.0
+        self.word_spacing = 0.0
+        self.scale = 1.0
+        self.leading = 0.0
+        self.rise = 0.0
+        self.font = None
+        self.size = 0.0
+
+    def copy(self):
+        state = _TextState()
+        state.__dict__.update(self.__dict__)
+        return state
+
+
+def extract_runs(data, fonts, forms=None, ctm=IDENTITY, depth=0):
+    """Интерпретирует содержимое и возвращает фрагменты текста
+
+    forms - формы ресурсов: имя -> (содержимое, шрифты, формы, матрица).
+    """
+    runs = []
+    state = _TextState()
+    stack = []
+    tm = tlm = IDENTITY
+
+    def show(string):
+        nonlocal tm
+        font = state.font
+        if font is None or not isinstance(string, bytes):
+            return
+        render = _mult(tm, ctm)
+        x, y = render[4], render[5]
+        size = abs(state.size * math.hypot(render[2], render[3])) or abs(state.size)
+        chars = []
+        advance = 0.0
+        for text, width, is_space in font.decode(string):
+            chars.append(text)
+            advance += (width / 1000.0 * state.size + state.char_spacing
+                        + (state.word_spacing if is_space else 0.0)) * state.scale
+        tm = _mult((1.0, 0.0, 0.0, 1.0, advance, 0.0), tm)
+        end = _mult(tm, ctm)
+        text = ''.join(chars)
+        if text:
+            runs.append(TextRun(x, y, end[4], size, text))
+
+    def next_line():
+        nonlocal tm, tlm
+        tlm = _mult((1.0, 0.0, 0.0, 1.0, 0.0, -state.leading), tlm)
+        tm = tlm
+
+    for op, args in iter_operations(data):
+        try:
+            if op == 'q':
+                stack.append((ctm, state.copy()))
+            elif op == 'Q':
+                if stack:
+                    ctm, state = stack.pop()
+            elif op == 'cm':
+                ctm = _mult(tuple(float(v) for v in args[-6:]), ctm)
+            elif op == 'BT':
+                tm = tlm = IDENTITY
+            elif op == 'Tf':
+                state.font = fonts.get(args[-2])
+                state.size = float(args[-1])
+            elif op == 'Tc':
+                state.char_spacing = float(args[-1])
+            elif op == 'Tw':
+                state.word_spacing = float(args[-1])
+            elif op == 'Tz':
+                state.scale = float(args[-1]) / 100.0
+            elif op == 'TL':
+                state.leading = float(args[-1])
+            elif op == 'Ts':
+                state.rise = float(args[-1])
+            elif op in ('Td', 'TD'):
+                tx, ty = float(args[-2]), float(args[-1])
+                if op == 'TD':
+                    state.leading = -ty
+                tlm = _mult((1.0, 0.0, 0.0, 1.0, tx, ty), tlm)
+                tm = tlm
+            elif op == 'Tm':
+                tm = tlm = tuple(float(v) for v in args[-6:])
+            elif op == 'T*':
+                next_line()
+            elif op == 'Tj':
+                show(args[-1])
+            elif op == "'":
+                next_line()
+                show(args[-1])
+            elif op == '"':
+                state.word_spacing, state.char_spacing = float(args[-3]), float(args[-2])
+                next_line()
+                show(args[-1])
+            elif op == 'TJ':
+                for item in args[-1]:
+                    if isinstance(item, bytes):
+                        show(item)
+                    elif isinstance(item, (int, float)):
+                        shift = -float(item) / 1000.0 * state.size * state.scale
+                        tm = _mult((1.0, 0.0, 0.0, 1.0, shift, 0.0), tm)
+                        if item <= -TJ_SPACE_THRESHOLD and runs:
+                            runs.append(runs[-1]._replace(x=runs[-1].end_x, text=' '))
+            elif op == 'Do' and forms and depth < MAX_FORM_DEPTH:
+                form = forms.get(args[-1])
+                if form is not None:
+                    form_data, form_fonts, form_forms, matrix = form
+                    runs.extend(extract_runs(form_data, form_fonts or fonts, form_forms,
+                                             _mult(matrix, ctm), depth + 1))
+        except (IndexError, TypeError, ValueError):
+            # Некорректные операнды пропускаем, как это делают просмотрщики
+            continue
+    return runs
+
+
+def runs_to_lines(runs):
+    """Склеивает фрагменты в строки сверху вниз, слева направо"""
+    lines = []
+    for run in sorted(runs, key=lambda r: -r.y):
+        tolerance = max(run.size, 1.0) * LINE_TOLERANCE
+        if lines and abs(lines[-1][0] - run.y) <= tolerance:
+            lines[-1][1].append(run)
+        else:
+            lines.append([run.y, [run]])
+
+    result = []
+    for _, line_runs in lines:
+        line_runs.sort(key=lambda r: r.x)
+        parts = []
+        prev = None
+        for run in line_runs:
+            if prev is not None and run.x - prev.end_x > max(prev.size, 1.0) * RUN_GAP_SPACE:
+                parts.append(' ')
+            parts.append(run.text)
+            prev = run
+        text = re.sub(r'\s+', ' ', ''.join(parts)).strip()
+        if text:
+            result.append(text)
+    return result
+
+
+def _load_forms(doc, resources, depth=0):
+    """Формы ресурсов в виде, пригодном для передачи в процесс"""
+    forms = {}
+    if depth > MAX_FORM_DEPTH:
+        return forms
+    xobjects = doc.resolve((resources or {}).get('XObject')) or {}
+    for name, ref in xobjects.items():
+        xobject = doc.resolve(ref)
+        if isinstance(xobject, PdfStream) and xobject.get('Subtype') == 'Form':
+            form_resources = doc.resolve(xobject.get('Resources'))
+            forms[name] = (
+                decode_stream(xobject, doc.resolve),
+                load_fonts(doc, form_resources) if form_resources else None,
+                _load_forms(doc, form_resources, depth + 1),
+                tuple(float(v) for v in doc.resolve(xobject.get('Matrix')) or IDENTITY),
+            )
+    return forms
+
+
+def page_lines(doc, page):
+    """Строки текста одной страницы"""
+    resources = doc.resolve(page.get('Resources')) or {}
+    runs = extract_runs(doc.page_content(page), load_fonts(doc, resources),
+                        _load_forms(doc, resources))
+    return runs_to_lines(runs)
+
+
+# --- Параллельная обработка и кеш -------------------------------------------
+
+# Документы, открытые процессом пула: путь -> ((время изменения, размер), документ)
+_worker_docs = {}
+
+
+def _page_lines_result(doc, page_number):
+    """(строки страницы, None) или (None, текст ошибки)"""
+    try:
+        lines = page_lines(doc, doc.pages()[page_number])
+        count('pdf.pages_parsed')
+        return lines, None
+    except Exception as e:
+        return None, str(e)
+
+
+def _worker_doc(pdf_path):
+    """Документ процесса; замененный файл (другие время изменения или размер) открывается заново"""
+    stat = os.stat(pdf_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _worker_docs.get(pdf_path)
+    if cached is not None:
+        if cached[0] == signature:
+            return cached[1]
+        cached[1].close()
+        del _worker_docs[pdf_path]
+    doc = PdfDocument(pdf_path)
+    _worker_docs[pdf_path] = (signature, doc)
+    return doc
+
+
+def _page_lines_worker(pdf_path, page_number):
+    """Выполняется в отдельном процессе: документ открывается один раз на процесс"""
+    try:
+        doc = _worker_doc(pdf_path)
+    except Exception as e:
+        return None, str(e)
+    return _page_lines_result(doc, page_number)
+
+
+def load_cache(cache_path):
+    """Читает кеш хеш страницы -> строки"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache_path, cache):
+    """Атомарно сохраняет кеш"""
+    with atomic_open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+
+
+@timer('pdf.extract')
+def extract_pdf_lines(pdf_path, jobs=None, cache_path=None):
+    """Извлекает строки текста всех страниц PDF
+
+    Возвращает (список строк по страницам, статистика). Страницы без
+    изменений берутся из кеша, остальные разбираются в пуле процессов.
+    Без пула страницы разбираются по тому же открытому документу, по
+    которому считались отпечатки, - строки всегда от текущего файла.
+    """
+    pdf_path = str(pdf_path)
+    cache = load_cache(cache_path) if cache_path else {}
+    jobs = jobs or os.cpu_count() or 1
+
+    doc = PdfDocument(pdf_path)
+    try:
+        pages = doc.pages()
+        fingerprints = [doc.page_fingerprint(page) for page in pages]
+        missing = [i for i, fingerprint in enumerate(fingerprints) if fingerprint not in cache]
+        parallel = jobs > 1 and len(missing) >= 2
+        if not parallel:
+            results = [_page_lines_result(doc, i) for i in missing]
+    finally:
+        doc.close()
+
+    if parallel:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(missing))) as executor:
+            results = map_with_stats(executor, _page_lines_worker, [pdf_path] * len(missing), missing)
+
+    errors = []
+    for page_number, (lines, error) in zip(missing, results):
+        if error:
+            errors.append(f'страница {page_number + 1}: {error}')
+            continue
+        cache[fingerprints[page_number]] = lines
+
+    if cache_path:
+        used = set(fingerprints)
+        save_cache(cache_path, {key: value for key, value in cache.items() if key in used})
+
+    count('bytes_read', os.path.getsize(pdf_path))
+    count('pdf.pages', len(pages))
+    count('pdf.pages_cached', len(pages) - len(missing))
+    stats = {
+        'pages': len(pages),
+        'parsed': len(missing) - len(errors),
+        'cached': len(pages) - len(missing),
+        'errors': errors,
+    }
+    return [cache.get(fingerprint, []) for fingerprint in fingerprints], stats
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Индекс для сопоставления блюд с ценами.
+
+Строится один раз по словарю цен (нормализованное имя -> {'name', 'price'})
+и отвечает на запрос без перебора всего прайса в цикле Python. Правила те
+же, что и у прежнего перебора, и в том же порядке:
+
+1. точное совпадение нормализованного имени;
+2. первая по порядку запись, у которой первые 15 символов имени являются
+   началом названия блюда или наоборот;
+3. запись с наибольшим числом общих слов (не меньше 2), при равенстве -
+   первая по порядку.
+
+Для правила 2 используются словари префиксов длиной до 15 символов, для
+правила 3 - инвертированный индекс слово -> битовая маска записей. Число
+общих слов для всех записей сразу считается побитовым сложением масок слов
+блюда (поразрядные счетчики на целых числах Python), поэтому частые слова
+вроде "с" и "и" не требуют перебора тысяч записей.
+"""
+
+from instrumentation import count, record_match
+
+PREFIX_LENGTH = 15
+MIN_COMMON_WORDS = 2
+# Маски частых слов строятся заранее, редких - при запросе из списка записей
+PRECOMPUTED_MASK_MIN_POSTINGS = 64
+
+
+class PriceIndex:
+    """Индекс словаря цен"""
+
+    def __init__(self, prices_data):
+        self.prices_data = prices_data
+        self.entries = list(prices_data.values())
+        # слово -> номера записей по возрастанию
+        self._postings = {}
+        # слово -> битовая маска записей (только для частых слов)
+        self._masks = {}
+        # начало имени цены (до 15 символов) -> первая запись с таким началом
+        self._short_prefixes = {}
+        # любой префикс начала имени цены -> первая запись с таким префиксом
+        self._long_prefixes = {}
+
+        for number, (name_normalized, price_info) in enumerate(prices_data.items()):
+            for word in set(name_normalized.split()):
+                self._postings.setdefault(word, []).append(number)
+
+            price_name_clean = price_info['name'].lower()
+            self._short_prefixes.setdefault(price_name_clean[:PREFIX_LENGTH], number)
+            for length in range(min(len(price_name_clean), PREFIX_LENGTH) + 1):
+                self._long_prefixes.setdefault(price_name_clean[:length], number)
+
+        for word, posting in self._postings.items():
+            if len(posting) >= PRECOMPUTED_MASK_MIN_POSTINGS:
+                self._masks[word] = self._build_mask(posting)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def exact(self, name_normalized):
+        """Запись с точно таким нормализованным именем"""
+        return self.prices_data.get(name_normalized)
+
+    def prefix_match(self, name):
+        """Первая запись, совпадающая с названием по первым 15 символам"""
+        name_clean = name.lower()
+        candidates = []
+
+        # Название блюда начинается с начала имени цены
+        for length in range(min(len(name_clean), PREFIX_LENGTH) + 1):
+            number = self._short_prefixes.get(name_clean[:length])
+            if number is not None:
+                candidates.append(number)
+
+        # Имя цены начинается с начала названия блюда
+        number = self._long_prefixes.get(name_clean[:PREFIX_LENGTH])
+        if number is not None:
+            candidates.append(number)
+
+        return self.entries[min(candidates)] if candidates else None
+
+    @staticmethod
+    def _build_mask(posting):
+        """Битовая маска записей: бит i установлен для записи номер i"""
+        mask = 0
+        for number in posting:
+            mask |= 1 << number
+        return mask
+
+    def _word_mask(self, word):
+        mask = self._masks.get(word)
+        if mask is None:
+            mask = self._build_mask(self._postings[word])
+        return mask
+
+    def best_word_match(self, name_normalized, min_common=MIN_COMMON_WORDS):
+        """Запись с наибольшим числом общих слов (не меньше min_common)"""
+        words = [word for word in set(name_normalized.split()) if word in self._postings]
+        if len(words) < min_common:
+            return None
+
+        # Поразрядный счетчик общих слов сразу для всех записей:
+        # planes[k] - маска записей, у которых установлен k-й бит счетчика
+        planes = []
+        for word in words:
+            carry = self._word_mask(word)
+            for k, plane in enumerate(planes):
+                planes[k] = plane ^ carry
+                carry &= plane
+                if not carry:
+                    break
+            if carry:
+                planes.append(carry)
+
+        # Спускаемся от старшего разряда, оставляя записи с максимальным счетчиком
+        best = 0
+        for plane in planes:
+            best |= plane
+        best_score = 0
+        for k in range(len(planes) - 1, -1, -1):
+            narrowed = best & planes[k]
+            if narrowed:
+                best = narrowed
+                best_score |= 1 << k
+        if best_score < min_common:
+            return None
+
+        # При равенстве - первая по порядку запись (младший бит)
+        return self.entries[(best & -best).bit_length() - 1]
+
+    def match(self, name, name_normalized):
+        """Находит цену для блюда по всем правилам; возвращает (запись, правило)"""
+        price_info, rule = self._match(name, name_normalized)
+        record_match('price_index', price_info is not None)
+        if rule is not None:
+            count(f'price_index.{rule}')
+        return price_info, rule
+
+    def _match(self, name, name_normalized):
+        price_info = self.exact(name_normalized)
+        if price_info is not None:
+            return price_info, 'exact'
+        price_info = self.prefix_match(name)
+        if price_info is not None:
+            return price_info, 'prefix'
+        price_info = self.best_word_match(name_normalized)
+        if price_info is not None:
+            return price_info, 'words'
+        return None, None
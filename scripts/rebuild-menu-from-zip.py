@@ -2,297 +2,433 @@
 # -*- coding: utf-8 -*-
 
 """
-Скрипт для полной перегенерации menu.json из zip-архива с фотографиями блюд.
-Этот скрипт очищает существующие данные и создает новый menu.json с нуля.
+Скрипт для перегенерации menu.json из zip-архива с фотографиями блюд.
+
+Рядом с menu.json хранится манифест (menu.manifest.json): CRC и размер
+каждого файла архива из центрального каталога -> выходной файл и id блюда.
+Повторный запуск распаковывает только добавленные и измененные файлы
+и сохраняет id остальных. С флагом --full (или без манифеста) скрипт
+создает menu.json с нуля.
+
+Изображения называются по хешу содержимого (image_store.py), файлы
+исчезнувших и переснятых фото удаляются через GC_GRACE_PERIOD.
 """
 
+import argparse
 import zipfile
 import os
 import json
-import shutil
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import re
 
+from atomic_io import atomic_open
+from category_classifier import classify_many
+from data_io import add_format_argument
+from image_dedup import DEDUP_COLLAPSE, add_dedup_arguments, dedup_options, find_duplicates
+from image_placeholders import CACHE_FILE_NAME, generate_placeholders
+from image_store import IMAGE_MANIFEST_FILE_NAME, is_hashed_name, store_member, update_image_manifest
+from image_variants import generate_variants
+from instrumentation import add_profile_arguments, call_with_stats, merge_stats, start_run, timer
+from menu_io import build_menu, format_size_change, load_menu, save_menu
+from zip_index import cached_zip_index
+
 # Пути
 ZIP_FILE = Path(__file__).parent.parent / "sapiens photo.zip"
-EXTRACT_DIR = Path(__file__).parent.parent / "temp_extracted"
 MENU_DIR = Path(__file__).parent.parent / "src" / "assets" / "menu"
 MENU_JSON_PATH = Path(__file__).parent.parent / "menu.json"
 
-# Категории для автоматической классификации
-CATEGORY_KEYWORDS = {
-    'Десерты': ['десерт', 'пирог', 'торт', 'кекс', 'вафля', 'блинчик', 'сырник', 'чизкейк', 'медовик', 'синнабон', 'крафл', 'орео', 'варенье', 'эклер'],
-    'Закуски': ['закуск', 'оливк', 'маслин', 'артишок', 'карпаччо', 'брускетт'],
-    'Мясные блюда': ['мясн', 'перепелк', 'утк', 'котлет', 'шатобриан', 'брискет', 'бургер', 'бекон', 'окорок', 'омлет', 'яйц', 'ребр'],
-    'Рыба и морепродукты': ['рыб', 'лосос', 'тунец', 'угор', 'креветк', 'гребешок', 'краб', 'икра', 'ролл', 'суши', 'голубец', 'треск', 'щук', 'темпура', 'нори'],
-    'Салаты': ['салат', 'руккола', 'боул', 'коул', 'stefan'],
-    'Супы': ['суп', 'бульон', 'том-ям', 'вонтон'],
-    'Суши и роллы': ['ролл', 'суши', 'калифорни', 'филадельфи', 'радуга'],
-    'Завтраки': ['завтрак', 'вафля', 'бриошь', 'драник', 'скрэмбл', 'птитим', 'киноа', 'овсян', 'сырник'],
-    'Прочее': []
-}
+MANIFEST_VERSION = 1
 
-def detect_category(dish_name):
-    """Определяет категорию блюда по названию"""
-    lower_name = dish_name.lower()
-    
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        for keyword in keywords:
-            if keyword in lower_name:
-                return category
-    
-    return 'Прочее'
+# Задача на обработку одного изображения из архива
+ImageTask = namedtuple('ImageTask', ['member', 'dish_name', 'ext', 'crc', 'file_size', 'compress_size'])
 
 def normalize_filename(file_name):
     """Нормализует имя файла (удаляет расширение)"""
     name = re.sub(r'\.(jpg|jpeg|png|JPG|JPEG|PNG)$', '', file_name, flags=re.IGNORECASE)
     return name.strip()
 
-def get_raw_filename_bytes(zip_path, member_name):
-    """Получает сырые байты имени файла из ZIP архива"""
-    import struct
-    with open(zip_path, 'rb') as f:
-        data = f.read()
-    
-    pos = 0
-    while True:
-        pos = data.find(b'PK\x01\x02', pos)
-        if pos == -1:
-            break
-        
-        try:
-            name_len = struct.unpack('<H', data[pos + 28:pos + 30])[0]
-            filename_start = pos + 46
-            filename_bytes = data[filename_start:filename_start + name_len]
-            
-            # Проверяем, соответствует ли это нашему файлу
-            test_decoded = filename_bytes.decode('cp437', errors='ignore')
-            if member_name in test_decoded or test_decoded[:30] in member_name[:50]:
-                return filename_bytes
-        except:
-            pass
-        
-        pos += 1
-        if pos >= len(data) - 100:
-            break
-    
-    return None
-
-def fix_filename_encoding(filename, zip_path=None):
-    """Исправляет кодировку имени файла из ZIP архива"""
-    if zip_path:
-        raw_bytes = get_raw_filename_bytes(zip_path, filename)
-        if raw_bytes:
-            try:
-                # Правильная кодировка для русских имен в ZIP - cp866
-                decoded = raw_bytes.decode('cp866', errors='ignore')
-                return decoded
-            except:
-                pass
-    return filename
-
 def create_safe_filename(name, extension):
     """Создает безопасное имя файла"""
     safe_name = re.sub(r'[^\w\s-]', '_', name)
     safe_name = re.sub(r'[-\s]+', '_', safe_name)
     return f"{safe_name}{extension}"
 
-def extract_and_process_images():
-    """Извлекает изображения из zip и возвращает список блюд"""
-    import struct
-    
-    if EXTRACT_DIR.exists():
-        shutil.rmtree(EXTRACT_DIR)
-    EXTRACT_DIR.mkdir(parents=True, exist_ok=True)
-    
-    dishes = []
-    
-    # Сначала создаем маппинг неправильных имен -> правильных
-    filename_map = {}
-    
-    with open(ZIP_FILE, 'rb') as f:
-        data = f.read()
+@timer('zip.plan')
+def plan_image_members(zip_path):
+    """Возвращает список задач ImageTask для изображений в порядке архива"""
+    tasks = []
     
-    pos = 0
-    while True:
-        pos = data.find(b'PK\x01\x02', pos)
-        if pos == -1:
-            break
+    # Имена, CRC и размеры берем из центрального каталога, не распаковывая архив
+    for entry in cached_zip_index(zip_path):
+        member = entry.name
+        if member.endswith('/'):
+            continue
         
-        try:
-            name_len = struct.unpack('<H', data[pos + 28:pos + 30])[0]
-            filename_start = pos + 46
-            filename_bytes = data[filename_start:filename_start + name_len]
-            
-            # Декодируем через cp866 (правильная кодировка)
-            correct_name = filename_bytes.decode('cp866', errors='ignore')
-            # Также получаем имя, как его видит zipfile (через cp437)
-            incorrect_name = filename_bytes.decode('cp437', errors='ignore')
-            
-            if correct_name != incorrect_name:
-                filename_map[incorrect_name] = correct_name
-        except:
-            pass
+        # Пропускаем файлы, которые не являются изображениями
+        if not any(member.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png']):
+            continue
         
-        pos += 1
-        if pos >= len(data) - 100:
-            break
+        # Получаем имя файла без пути (в правильной кодировке)
+        fixed_name = entry.fixed_name
+        if 'sapiens photo/' in fixed_name:
+            relative_path = fixed_name.replace('sapiens photo/', '')
+        else:
+            relative_path = os.path.basename(fixed_name)
+        
+        # Нормализуем имя (убираем расширение)
+        dish_name = normalize_filename(relative_path)
+        
+        if not dish_name or len(dish_name) < 3:
+            continue
+        
+        ext = Path(relative_path).suffix.lower()
+        tasks.append(ImageTask(member, dish_name, ext, entry.crc, entry.file_size, entry.compress_size))
     
-    # Теперь извлекаем файлы
-    with zipfile.ZipFile(ZIP_FILE, 'r') as zip_ref:
-        for member in zip_ref.namelist():
-            if member.endswith('/'):
-                continue
-            
-            # Пропускаем файлы, которые не являются изображениями
-            if not any(member.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png']):
-                continue
-            
-            # Получаем правильное имя
-            fixed_name = filename_map.get(member, member)
-            
-            # Получаем имя файла без пути
-            if 'sapiens photo/' in fixed_name:
-                relative_path = fixed_name.replace('sapiens photo/', '')
-            else:
-                relative_path = os.path.basename(fixed_name)
-            
-            # Нормализуем имя (убираем расширение)
-            dish_name = normalize_filename(relative_path)
-            
-            if not dish_name or len(dish_name) < 3:
-                continue
-            
-            # Извлекаем файл
+    return tasks
+
+def skip_duplicate_tasks(zip_path, tasks, dedup):
+    """Ищет почти одинаковые фото архива; в режиме collapse убирает повторы из задач"""
+    duplicates = find_duplicates(zip_path, [task.member for task in tasks], dedup)
+    if dedup is None or dedup.mode != DEDUP_COLLAPSE:
+        return tasks
+    return [task for task in tasks if task.member not in duplicates]
+
+def process_image_members(zip_path, menu_dir, tasks):
+    """Распаковывает часть изображений архива
+    
+    Выполняется в отдельном процессе при --jobs > 1: каждый процесс
+    открывает архив самостоятельно. Возвращает список (порядковый номер,
+    блюдо без id и категории или None, ошибка или None).
+    """
+    results = []
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        for order, task in tasks:
             try:
-                zip_ref.extract(member, EXTRACT_DIR)
-                old_path = EXTRACT_DIR / member
-                new_path = EXTRACT_DIR / relative_path
+                # Распаковываем изображение блоками под именем с хешем содержимого
+                safe_file_name = store_member(
+                    zip_ref, task.member, menu_dir, create_safe_filename(task.dish_name, ''), task.ext)
                 
-                if old_path.exists():
-                    new_path.parent.mkdir(parents=True, exist_ok=True)
-                    if new_path.exists():
-                        new_path.unlink()
-                    if old_path != new_path:
-                        old_path.rename(new_path)
-                    
-                    # Получаем расширение
-                    ext = new_path.suffix.lower()
-                    image_format = ext[1:]
-                    
-                    # Создаем безопасное имя для сохранения
-                    safe_file_name = create_safe_filename(dish_name, ext)
-                    target_image_path = MENU_DIR / safe_file_name
-                    
-                    # Копируем изображение
-                    shutil.copy2(new_path, target_image_path)
-                    
-                    # Определяем категорию
-                    category = detect_category(dish_name)
-                    
-                    # Создаем объект блюда
-                    dish = {
-                        'id': len(dishes) + 1,  # Простая нумерация с 1
-                        'name': dish_name,
-                        'category': category,
-                        'image': f'images/{safe_file_name}',
-                        'image_format': image_format,
-                        'description': None,
-                        'composition': None,
-                        'allergens': None
-                    }
-                    
-                    dishes.append(dish)
-                    print(f"✓ {dish_name[:50]}... -> {category}")
+                dish = {
+                    'name': task.dish_name,
+                    'category': None,  # определяется пакетно в run_image_tasks
+                    'image': f'images/{safe_file_name}',
+                    'image_format': task.ext[1:],
+                    'description': None,
+                    'composition': None,
+                    'allergens': None
+                }
+                results.append((order, dish, None))
             except Exception as e:
-                print(f"✗ Ошибка при обработке {member}: {e}")
+                results.append((order, None, f'{task.member}: {e}'))
+    return results
+
+def split_tasks(tasks, parts):
+    """Делит задачи на части с примерно равным объемом сжатых данных"""
+    buckets = [[] for _ in range(parts)]
+    loads = [0] * parts
+    # Самые большие файлы раздаем первыми, каждый - в наименее загруженную часть
+    for order, task in sorted(enumerate(tasks), key=lambda t: (-t[1].compress_size, t[0])):
+        idx = loads.index(min(loads))
+        buckets[idx].append((order, task))
+        loads[idx] += task.compress_size
+    return [sorted(bucket) for bucket in buckets if bucket]
+
+@timer('zip.extract')
+def run_image_tasks(zip_path, menu_dir, tasks, jobs=1):
+    """Обрабатывает задачи и возвращает блюда без id в порядке tasks (None - ошибка)"""
+    if jobs <= 1 or len(tasks) < 2:
+        results = process_image_members(zip_path, menu_dir, list(enumerate(tasks)))
+    else:
+        results = []
+        chunks = split_tasks(tasks, jobs)
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            futures = [
+                executor.submit(call_with_stats, process_image_members, zip_path, menu_dir, chunk)
+                for chunk in chunks
+            ]
+            for future in futures:
+                chunk_results, stats = future.result()
+                results.extend(chunk_results)
+                merge_stats(stats)
     
-    # Очищаем временную директорию
-    if EXTRACT_DIR.exists():
-        shutil.rmtree(EXTRACT_DIR)
+    # Собираем результаты в порядке архива: id не зависят от числа процессов
+    dishes = [None] * len(tasks)
+    for order, dish, error in sorted(results, key=lambda r: r[0]):
+        if error:
+            print(f"✗ Ошибка при обработке {error}")
+            continue
+        dishes[order] = dish
     
+    # Классифицируем все новые блюда одним пакетом
+    processed = [dish for dish in dishes if dish is not None]
+    for dish, category in zip(processed, classify_many([dish['name'] for dish in processed])):
+        dish['category'] = category
     return dishes
 
-def build_menu_structure(dishes):
-    """Строит структуру меню из списка блюд"""
-    categories_map = {}
+def extract_and_process_images(zip_path=None, menu_dir=None, jobs=1, manifest=None, dedup=None):
+    """Извлекает изображения из zip и возвращает список блюд
+    
+    Если передан словарь manifest, в него записываются записи манифеста
+    для каждого обработанного файла архива. dedup - DedupOptions для
+    поиска почти одинаковых фото (image_dedup.py).
+    """
+    zip_path = zip_path or ZIP_FILE
+    menu_dir = menu_dir or MENU_DIR
+    tasks = skip_duplicate_tasks(zip_path, plan_image_members(zip_path), dedup)
     
-    # Группируем блюда по категориям
-    for dish in dishes:
-        category = dish['category']
-        if category not in categories_map:
-            categories_map[category] = []
-        categories_map[category].append(dish)
+    dishes = []
+    for task, dish in zip(tasks, run_image_tasks(zip_path, menu_dir, tasks, jobs)):
+        if dish is None:
+            continue
+        dish = {'id': len(dishes) + 1, **dish}  # Простая нумерация с 1
+        dishes.append(dish)
+        print(f"✓ {dish['name'][:50]}... -> {dish['category']}")
+        if manifest is not None:
+            manifest[task.member] = manifest_entry(task, dish)
     
-    # Формируем структуру меню
+    return dishes
+
+def manifest_path_for(menu_json_path):
+    """Путь к манифесту рядом с menu.json (menu.json -> menu.manifest.json)"""
+    return menu_json_path.with_name(f'{menu_json_path.stem}.manifest.json')
+
+def manifest_entry(task, dish):
+    """Запись манифеста: CRC/размер файла в архиве -> выходной файл и id блюда"""
     return {
-        'menu': {
-            'categories': [
-                {
-                    'name': category_name,
-                    'items': items,
-                    'count': len(items)
-                }
-                for category_name, items in sorted(categories_map.items())
-            ]
-        },
-        'all_items': dishes,
-        'statistics': {
-            'total_items': len(dishes),
-            'categories_count': len(categories_map)
-        }
+        'crc': task.crc,
+        'size': task.file_size,
+        'file': dish['image'].split('/', 1)[-1],
+        'id': dish['id']
     }
 
-def main():
-    print('=' * 60)
-    print('Полная перегенерация menu.json из zip-архива')
-    print('=' * 60)
-    print()
+def load_manifest(manifest_path):
+    """Читает манифест; None, если его нет или он поврежден"""
+    if not manifest_path.exists():
+        return None
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)['members']
+    except (OSError, ValueError, KeyError) as e:
+        print(f'Не удалось прочитать манифест {manifest_path.name}: {e}, выполняю полную перегенерацию')
+        return None
+
+@timer('manifest.save')
+def save_manifest(manifest_path, zip_path, members):
+    """Атомарно сохраняет манифест"""
+    with atomic_open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': MANIFEST_VERSION,
+            'zip': Path(zip_path).name,
+            'members': members
+        }, f, ensure_ascii=False, indent=2)
+
+@timer('incremental')
+def incremental_rebuild(zip_path, menu_dir, menu_json_path, manifest, jobs=1, dedup=None):
+    """Обновляет только добавленные, измененные и удаленные файлы архива
     
-    # Очищаем старые изображения
-    print('Очищаю старые изображения...')
-    if MENU_DIR.exists():
-        for file in MENU_DIR.glob('*'):
-            if file.is_file():
-                file.unlink()
-                print(f"  Удален: {file.name}")
-    else:
-        MENU_DIR.mkdir(parents=True, exist_ok=True)
+    Возвращает (блюда, новый манифест, статистика). Блюда равны None, если
+    архив не изменился и menu.json перезаписывать не нужно. Повторы,
+    убранные в режиме --dedup collapse, считаются удаленными файлами.
+    """
+    tasks = skip_duplicate_tasks(zip_path, plan_image_members(zip_path), dedup)
+    existing_menu = load_menu(menu_json_path)
+    items_by_id = {item['id']: item for item in existing_menu.get('all_items', [])}
+    next_id = max([*items_by_id, *(entry['id'] for entry in manifest.values())], default=0) + 1
     
+    stats = {'added': 0, 'changed': 0, 'deleted': 0, 'unchanged': 0}
+    task_ids = []
+    pending = []  # индексы задач, которые нужно распаковать заново
+    
+    for i, task in enumerate(tasks):
+        old = manifest.get(task.member)
+        if (old and old['crc'] == task.crc and old['size'] == task.file_size
+                and old['id'] in items_by_id and is_hashed_name(old['file'])
+                and (menu_dir / old['file']).exists()):
+            stats['unchanged'] += 1
+            task_ids.append(old['id'])
+            continue
+        
+        # Измененные файлы сохраняют id, новые получают следующий свободный
+        if old:
+            stats['changed'] += 1
+            task_ids.append(old['id'])
+        else:
+            stats['added'] += 1
+            task_ids.append(next_id)
+            next_id += 1
+        pending.append(i)
+    
+    current_members = {task.member for task in tasks}
+    deleted = [member for member in manifest if member not in current_members]
+    stats['deleted'] = len(deleted)
+    
+    if not pending and not deleted:
+        return None, manifest, stats
+    
+    # Распаковываем только новые и измененные файлы
+    processed = run_image_tasks(zip_path, menu_dir, [tasks[i] for i in pending], jobs)
+    new_manifest = {}
+    failed = set()
+    for i, dish in zip(pending, processed):
+        task = tasks[i]
+        dish_id = task_ids[i]
+        if dish is None:
+            failed.add(i)
+            continue
+        if dish_id in items_by_id:
+            # Фото переснято: обновляем только изображение, остальные поля сохраняем
+            item = items_by_id[dish_id]
+            item['image'] = dish['image']
+            item['image_format'] = dish['image_format']
+        else:
+            item = {'id': dish_id, **dish}
+            items_by_id[dish_id] = item
+        print(f"✓ {item['name'][:50]}... -> {item['category']}")
+    
+    # Собираем блюда в порядке архива
+    dishes = []
+    for i, task in enumerate(tasks):
+        dish_id = task_ids[i]
+        if i in failed:
+            # Если перераспаковка не удалась, оставляем прежнюю запись
+            old = manifest.get(task.member)
+            if old and old['id'] in items_by_id:
+                new_manifest[task.member] = old
+                dishes.append(items_by_id[old['id']])
+            continue
+        item = items_by_id[dish_id]
+        dishes.append(item)
+        new_manifest[task.member] = manifest_entry(task, item)
+    
+    # Файлы удаленных и переснятых фото удаляет сборщик мусора изображений
+    return dishes, new_manifest, stats
+
+@timer('menu.build')
+def build_menu_structure(dishes):
+    """Строит структуру меню (схема v2) с категориями по алфавиту"""
+    return build_menu(dishes, sorted({dish['category'] for dish in dishes}))
+
+def parse_args():
+    """Разбирает аргументы командной строки"""
+    parser = argparse.ArgumentParser(description='Перегенерация menu.json из zip-архива')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='число процессов для распаковки изображений (0 - по числу ядер)')
+    parser.add_argument('--full', action='store_true',
+                        help='игнорировать манифест и перегенерировать все с нуля')
+    parser.add_argument('--no-variants', action='store_true',
+                        help='не создавать адаптивные версии изображений (WebP/JPEG разных ширин)')
+    parser.add_argument('--zip', type=Path, default=ZIP_FILE, help='архив с фотографиями блюд')
+    parser.add_argument('--menu-dir', type=Path, default=MENU_DIR, help='директория для изображений')
+    parser.add_argument('--output', type=Path, default=MENU_JSON_PATH, help='путь к menu.json')
+    add_dedup_arguments(parser)
+    add_format_argument(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    if args.jobs <= 0:
+        args.jobs = os.cpu_count() or 1
+    return args
+
+def print_summary(menu_structure):
+    """Печатает статистику по menu.json"""
+    print('Статистика:')
+    print(f"  Всего блюд: {menu_structure['statistics']['total_items']}")
+    print(f"  Категорий: {menu_structure['statistics']['categories_count']}")
     print()
+    print('Категории:')
+    for cat in menu_structure['menu']['categories']:
+        print(f"  • {cat['name']}: {cat['count']} блюд")
+
+def full_rebuild(args):
+    """Перегенерирует все с нуля; возвращает (блюда, манифест)
+
+    Старые изображения не удаляются сразу: клиенты со старым menu.json еще
+    загружают их, ненужные файлы удаляет сборщик мусора изображений.
+    """
+    menu_dir = args.menu_dir
+    menu_dir.mkdir(parents=True, exist_ok=True)
+    
     print('Извлекаю и обрабатываю изображения из zip-архива...')
     print('-' * 60)
     
     # Извлекаем и обрабатываем изображения
-    dishes = extract_and_process_images()
+    manifest = {}
+    dishes = extract_and_process_images(args.zip, menu_dir, jobs=args.jobs, manifest=manifest,
+                                        dedup=dedup_options(args, args.output.parent, args.jobs))
     
     print()
     print('-' * 60)
     print(f'Обработано {len(dishes)} блюд')
     print()
+    return dishes, manifest
+
+def main():
+    args = parse_args()
+    start_run(args)
+    start = time.perf_counter()
+    manifest_path = manifest_path_for(args.output)
+    
+    print('=' * 60)
+    print('Перегенерация menu.json из zip-архива')
+    print('=' * 60)
+    print()
+    
+    manifest = None
+    if not args.full and args.output.exists():
+        manifest = load_manifest(manifest_path)
+    
+    if manifest is None:
+        dishes, manifest = full_rebuild(args)
+    else:
+        print('Сравниваю архив с манифестом...')
+        args.menu_dir.mkdir(parents=True, exist_ok=True)
+        dishes, manifest, stats = incremental_rebuild(
+            args.zip, args.menu_dir, args.output, manifest, jobs=args.jobs,
+            dedup=dedup_options(args, args.output.parent, args.jobs))
+        print(f"  Новых: {stats['added']}, измененных: {stats['changed']}, "
+              f"удаленных: {stats['deleted']}, без изменений: {stats['unchanged']}")
+        print()
+        if dishes is None:
+            print(f'✓ Изменений нет, menu.json актуален ({time.perf_counter() - start:.2f} с)')
+            return
+    
+    # Создаем адаптивные версии изображений (актуальные пропускаются)
+    if not args.no_variants:
+        print('Создаю адаптивные версии изображений...')
+        count = generate_variants(args.menu_dir, dishes, jobs=args.jobs)
+        print(f'✓ Версии изображений готовы для {count} блюд')
+        print()
+    
+    # Считаем заглушки для мгновенной отрисовки сетки (кеш по хешу изображения)
+    print('Создаю заглушки изображений...')
+    count, computed = generate_placeholders(
+        args.menu_dir, dishes, args.output.parent / CACHE_FILE_NAME, jobs=args.jobs)
+    print(f'✓ Заглушки готовы для {count} блюд (посчитано заново: {computed})')
+    print()
+    
+    # Манифест изображений; файлы, не нужные дольше GC_GRACE_PERIOD, удаляются
+    removed, pending = update_image_manifest(
+        args.menu_dir, dishes, args.output.parent / IMAGE_MANIFEST_FILE_NAME)
+    print(f'✓ Удалено неиспользуемых изображений: {len(removed)} (ожидают удаления: {pending})')
+    print()
     
     # Строим структуру меню
     print('Формирую структуру menu.json...')
     menu_structure = build_menu_structure(dishes)
     
     # Сохраняем menu.json
-    with open(MENU_JSON_PATH, 'w', encoding='utf-8') as f:
-        json.dump(menu_structure, f, ensure_ascii=False, indent=2)
+    sizes = save_menu(args.output, menu_structure, format=args.format)
+    save_manifest(manifest_path, args.zip, manifest)
     
-    print(f'✓ menu.json сохранен')
-    print()
-    print('Статистика:')
-    print(f"  Всего блюд: {menu_structure['statistics']['total_items']}")
-    print(f"  Категорий: {menu_structure['statistics']['categories_count']}")
+    print(f'✓ menu.json сохранен: {format_size_change(*sizes)}')
     print()
-    print('Категории:')
-    for cat in menu_structure['menu']['categories']:
-        print(f"  • {cat['name']}: {cat['count']} блюд")
+    print_summary(menu_structure)
     print()
     print('=' * 60)
-    print('Готово!')
+    print(f'Готово! ({time.perf_counter() - start:.2f} с)')
     print('=' * 60)
 
 if __name__ == '__main__':
     main()
-
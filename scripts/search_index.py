@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Поисковый индекс по текстам блюд для клиента.
+
+Вместе с шардами (menu_shards.py) в public/menu-data/ пишется
+search-<хеш>.json - инвертированный индекс по названию, категории,
+описанию, составу и аллергенам. Приложение загружает его только при
+первом поиске (src/utils/searchIndex.ts), и запрос "что-нибудь с
+креветками" решается поиском в словарях, а не проходом по текстам всех
+блюд.
+
+Анализатор: нижний регистр, "ё" -> "е", слова из букв и цифр, без
+служебных слов; у русских слов отрезается самое длинное окончание из
+ENDINGS, если от слова остается не меньше MIN_STEM_LENGTH букв
+("креветками", "креветки" -> "креветк"). Настройки анализатора
+записываются в сам индекс, поэтому клиент разбирает запрос так же.
+
+Списки (возрастающие номера документов) хранятся разностями соседних
+номеров - короткими числами:
+
+- terms - основа -> документы; номер документа сдвинут на бит, младший
+  бит - основа встречается в названии;
+- prefixes - начала основ длиной PREFIX_LENGTHS -> документы (поиск по
+  мере набора);
+- trigrams - триграммы слов -> документы (другие формы слова, набор
+  длиннее префиксов и опечатки).
+
+Номер документа - позиция id блюда в отсортированном списке docs.
+
+    python3 scripts/search_index.py "что-нибудь с креветками"
+"""
+
+import argparse
+import math
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from data_io import read_data
+from instrumentation import add_profile_arguments, record_match, start_run, timer
+
+SEARCH_INDEX_VERSION = 1
+
+# Поля блюда, по которым ищем; совпадение в названии весит больше
+SEARCH_FIELDS = ('name', 'category', 'description', 'composition', 'allergens')
+MIN_TOKEN_LENGTH = 2
+MIN_STEM_LENGTH = 3
+PREFIX_LENGTHS = (2, 4)
+# Доля триграмм слова запроса, которая должна найтись при нечетком совпадении
+FUZZY_RATIO = 0.6
+
+NAME_WEIGHT = 4
+TEXT_WEIGHT = 2
+PARTIAL_WEIGHT = 1
+
+# Окончания (длинные раньше коротких): легкий стеммер без словаря
+ENDINGS = (
+    'иями', 'ями', 'ами', 'иях', 'ях', 'ах',
+    'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ией',
+    'ой', 'ей', 'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ие', 'ые', 'ую', 'юю', 'их', 'ых',
+    'ам', 'ям', 'ом', 'ем', 'ов', 'ев', 'ью', 'ия', 'ья', 'ье', 'ии',
+    'а', 'я', 'о', 'е', 'у', 'ю', 'ы', 'и', 'ь', 'й',
+)
+
+STOP_WORDS = frozenset((
+    'и', 'в', 'во', 'с', 'со', 'на', 'из', 'по', 'под', 'над', 'для', 'без', 'к', 'ко',
+    'о', 'об', 'от', 'до', 'за', 'или', 'а', 'но', 'не', 'что', 'нибудь', 'то', 'как',
+    'мне', 'нам', 'хочу', 'хотим', 'можно', 'есть', 'какой', 'какая', 'какое', 'какие',
+    'пожалуйста',
+))
+
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def fold(text):
+    """Нижний регистр и "ё" -> "е" """
+    return text.lower().replace('ё', 'е')
+
+
+def stem(token):
+    """Основа слова: русское окончание отрезается, остальные слова не меняются"""
+    if not 'а' <= token[-1] <= 'я':
+        return token
+    for ending in ENDINGS:
+        if token.endswith(ending) and len(token) - len(ending) >= MIN_STEM_LENGTH:
+            return token[:-len(ending)]
+    return token
+
+
+def tokenize(text):
+    """Слова текста после свертки регистра, без служебных и односимвольных"""
+    return [
+        token for token in _TOKEN_RE.findall(fold(text))
+        if len(token) >= MIN_TOKEN_LENGTH and token not in STOP_WORDS
+    ]
+
+
+def trigrams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def delta_encode(values):
+    """Возрастающий список -> первое значение и разности соседних"""
+    encoded = []
+    previous = 0
+    for value in values:
+        encoded.append(value - previous)
+        previous = value
+    return encoded
+
+
+def delta_decode(encoded):
+    values = []
+    value = 0
+    for delta in encoded:
+        value += delta
+        values.append(value)
+    return values
+
+
+@timer('search.build')
+def build_search_index(items):
+    """Строит поисковый индекс по блюдам (all_items меню)"""
+    docs = sorted(item['id'] for item in items)
+    doc_numbers = {item_id: number for number, item_id in enumerate(docs)}
+    terms = defaultdict(dict)  # основа -> {документ: встречается в названии}
+    trigram_docs = defaultdict(set)
+
+    for item in items:
+        doc = doc_numbers[item['id']]
+        for field in SEARCH_FIELDS:
+            text = item.get(field)
+            if not text:
+                continue
+            for token in tokenize(text):
+                postings = terms[stem(token)]
+                postings[doc] = postings.get(doc, False) or field == 'name'
+                for trigram in trigrams(token):
+                    trigram_docs[trigram].add(doc)
+
+    prefix_docs = defaultdict(set)
+    shortest, longest = PREFIX_LENGTHS
+    for term, postings in terms.items():
+        for length in range(shortest, min(longest, len(term)) + 1):
+            prefix_docs[term[:length]].update(postings)
+
+    return {
+        'version': SEARCH_INDEX_VERSION,
+        'analyzer': {
+            'fields': list(SEARCH_FIELDS),
+            'min_token_length': MIN_TOKEN_LENGTH,
+            'min_stem_length': MIN_STEM_LENGTH,
+            'prefix_lengths': list(PREFIX_LENGTHS),
+            'fuzzy_ratio': FUZZY_RATIO,
+            'endings': list(ENDINGS),
+            'stop_words': sorted(STOP_WORDS),
+        },
+        'docs': delta_encode(docs),
+        'terms': {
+            term: delta_encode(sorted(doc << 1 | in_name for doc, in_name in postings.items()))
+            for term, postings in sorted(terms.items())
+        },
+        'prefixes': {prefix: delta_encode(sorted(found)) for prefix, found in sorted(prefix_docs.items())},
+        'trigrams': {trigram: delta_encode(sorted(found)) for trigram, found in sorted(trigram_docs.items())},
+    }
+
+
+class SearchIndex:
+    """Запросы к поисковому индексу (тот же алгоритм, что в searchIndex.ts)
+
+    Списки документов раскодируются при первом обращении и запоминаются.
+    """
+
+    def __init__(self, data):
+        if data.get('version') != SEARCH_INDEX_VERSION:
+            raise ValueError(f"неподдерживаемая версия поискового индекса: {data.get('version')}")
+        self.data = data
+        self.docs = delta_decode(data['docs'])
+        self._decoded = {}
+        self._sets = {}
+
+    @classmethod
+    def load(cls, path):
+        return cls(read_data(path))
+
+    def _postings(self, table, key):
+        cache_key = (table, key)
+        postings = self._decoded.get(cache_key)
+        if postings is None:
+            postings = delta_decode(self.data[table].get(key, ()))
+            self._decoded[cache_key] = postings
+        return postings
+
+    def _posting_set(self, table, key):
+        cache_key = (table, key)
+        docs = self._sets.get(cache_key)
+        if docs is None:
+            docs = self._sets[cache_key] = set(self._postings(table, key))
+        return docs
+
+    def match_term(self, token):
+        """Документы для слова запроса: {документ: вес}"""
+        term = stem(token)
+        scores = {}
+        for value in self._postings('terms', term):
+            scores[value >> 1] = NAME_WEIGHT if value & 1 else TEXT_WEIGHT
+
+        # Начало слова, пока гость набирает запрос
+        shortest, longest = PREFIX_LENGTHS
+        if len(term) <= longest:
+            for doc in self._postings('prefixes', term):
+                scores.setdefault(doc, PARTIAL_WEIGHT)
+
+        # Длинные слова в другой форме ("креветок"), недонабранные и с
+        # опечатками: большая часть триграмм слова при том же начале
+        if len(token) > longest:
+            token_trigrams = trigrams(token)
+            needed = math.ceil(len(token_trigrams) * FUZZY_RATIO)
+            hits = Counter()
+            for trigram in token_trigrams:
+                hits.update(self._postings('trigrams', trigram))
+            same_start = self._posting_set('prefixes', token[:shortest])
+            for doc, n in hits.items():
+                if n >= needed and doc in same_start:
+                    scores.setdefault(doc, PARTIAL_WEIGHT)
+        return scores
+
+    def search(self, query, limit=None):
+        """id блюд по запросу, лучшие первыми
+
+        Сначала блюда, где нашлись все слова запроса; если таких нет -
+        блюда с наибольшим числом найденных слов. При равенстве выше
+        совпадения в названии, затем меньший id.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        matched = Counter()
+        scores = Counter()
+        for token in tokens:
+            for doc, score in self.match_term(token).items():
+                matched[doc] += 1
+                scores[doc] += score
+        ranked = sorted(matched, key=lambda doc: (-matched[doc], -scores[doc], doc))
+        if ranked and matched[ranked[0]] == len(tokens):
+            ranked = [doc for doc in ranked if matched[doc] == len(tokens)]
+        record_match('search_index', bool(ranked))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self.docs[doc] for doc in ranked]
+
+
+def main():
+    # menu_shards импортирует этот модуль - пути берем при запуске
+    from menu_shards import INDEX_FILE_NAME, shards_dir_for
+
+    parser = argparse.ArgumentParser(description='Поиск блюд по поисковому индексу меню')
+    parser.add_argument('query', help='запрос, например "что-нибудь с креветками"')
+    parser.add_argument('--menu', type=Path, default=Path(__file__).parent.parent / 'menu.json',
+                        help='menu.json, рядом с которым записан индекс')
+    parser.add_argument('--limit', type=int, default=10, help='сколько блюд показать')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_run(args)
+
+    shards_dir = shards_dir_for(args.menu)
+    menu_index = read_data(shards_dir / INDEX_FILE_NAME)
+    if not menu_index.get('search'):
+        print('В menu-index.json нет поискового индекса: пересоберите меню')
+        raise SystemExit(1)
+    index = SearchIndex.load(shards_dir / menu_index['search'])
+    names = {item['id']: item['name'] for item in menu_index['items']}
+    results = index.search(args.query, args.limit)
+    for item_id in results:
+        print(f'{item_id:>6}  {names.get(item_id, "?")}')
+    if not results:
+        print('Ничего не найдено')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Байты форматов data_io.py не зависят от установленных библиотек
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from data_io import dumps, loads
+
+DATA = {'all_items': [{'id': 1, 'name': 'Щи', 'price': 450.5, 'tags': [], 'extra': {}}], 'empty': None}
+
+PRETTY = '''{
+  "all_items": [
+    {
+      "id": 1,
+      "name": "Щи",
+      "price": 450.5,
+      "tags": [],
+      "extra": {}
+    }
+  ],
+  "empty": null
+}'''.encode('utf-8')
+
+
+class DumpsTest(unittest.TestCase):
+
+    def test_pretty_bytes(self):
+        """pretty - тот же вывод, что json.dumps(ensure_ascii=False, indent=2), и с orjson"""
+        self.assertEqual(dumps(DATA, 'pretty'), PRETTY)
+
+    def test_formats_round_trip(self):
+        for format in ('pretty', 'min', 'msgpack'):
+            with self.subTest(format=format):
+                self.assertEqual(loads(dumps(DATA, format)), DATA)
+
+
+if __name__ == '__main__':
+    unittest.main()
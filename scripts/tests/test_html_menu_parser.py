@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Потоковый разбор HTML-экспорта против прежнего разбора целого документа
+
+fixtures/docs-export.html - экспорт Google Docs в формате SapiensKitchen.html
+(сгенерированные блюда и блоки с особыми случаями: сущности, куски текста в
+нескольких span, заголовки без id и со ссылкой, "Подача", "аллерген:").
+fixtures/docs-export.expected.json - блюда, которые из него извлекал
+прежний extract_dish_info_from_html.
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import importlib.util
+import io
+import json
+import sys
+import unittest
+import zipfile
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent.parent
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from html_menu_parser import iter_dishes, iter_text_chunks
+
+
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+html_script = load_script('update-menu-from-html')
+
+
+class HtmlParserTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.html = (FIXTURES_DIR / 'docs-export.html').read_text(encoding='utf-8')
+        with open(FIXTURES_DIR / 'docs-export.expected.json', 'r', encoding='utf-8') as f:
+            cls.expected = json.load(f)
+
+    def test_matches_previous_parser(self):
+        dishes = html_script.extract_dish_info_from_html(self.html)
+        self.assertEqual(list(dishes.values()), self.expected)
+
+    def test_chunk_boundaries(self):
+        # Куски рвут теги, сущности и текст абзацев в любом месте
+        expected = list(iter_dishes([self.html]))
+        for size in (1, 7, 64, 1000):
+            with self.subTest(size=size):
+                chunks = (self.html[i:i + size] for i in range(0, len(self.html), size))
+                self.assertEqual(list(iter_dishes(chunks)), expected)
+
+    def test_binary_chunks_keep_multibyte_characters(self):
+        data = self.html.encode('utf-8')
+        for size in (1, 3, 100):
+            with self.subTest(size=size):
+                chunks = list(iter_text_chunks(io.BytesIO(data), chunk_size=size))
+                self.assertEqual(''.join(chunks), self.html)
+
+    def test_zip_member(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(html_script.HTML_MEMBER, self.html)
+        buffer.seek(0)
+        dishes = html_script.extract_dish_info_from_zip(buffer)
+        self.assertEqual(list(dishes.values()), self.expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Поиск почти одинаковых фото: индекс хешей против перебора пар, режимы
+report и collapse на небольшом архиве
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import contextlib
+import importlib.util
+import io
+import random
+import sys
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+sys.path.insert(0, str(SCRIPTS_DIR / 'benchmarks'))
+
+from bench_dedup import all_pairs_groups, synthetic_hashes
+from image_dedup import (DEDUP_COLLAPSE, DEDUP_OFF, DEDUP_REPORT, HASH_BITS, DedupOptions, HashIndex, Image,
+                         duplicate_groups, find_duplicates, save_cache)
+from image_store import hashed_file_name
+from menu_io import empty_menu
+from synthetic import CP866ZipInfo
+
+# Фото архива: имя, содержимое, dHash, пиксели.
+# Ролл в .png и .jpg различается на 3 бита, у .png больше разрешение.
+PHOTOS = [
+    ('Ролл Филадельфия.jpg', b'jpeg roll', 0x0f0f_3c3c_5a5a_9999, 640 * 480),
+    ('Борщ.jpg', b'jpeg borscht', 0xf0f0_c3c3_a5a5_6666, 640 * 480),
+    ('Филадельфия ролл.png', b'png roll', 0x0f0f_3c3c_5a5a_9999 ^ 0b1011, 1280 * 960),
+    ('Цезарь с курицей.jpg', b'jpeg caesar', 0x1234_5678_9abc_def0, 640 * 480),
+]
+# Изображение меню, которое почти совпадает с Цезарем из архива
+MENU_IMAGE = (hashed_file_name('Цезарь', '0' * 64, '.jpg'), 0x1234_5678_9abc_def0 ^ (1 << 40), 800 * 600)
+
+
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def brute_force_find(hashes, value, threshold):
+    """Все (расстояние, ключ) перебором"""
+    found = []
+    for key, other in hashes:
+        distance = (other ^ value).bit_count()
+        if distance <= threshold:
+            found.append((distance, key))
+    return sorted(found)
+
+
+def photo_archive(photos):
+    """zip в памяти с cp866-именами в 'sapiens photo/' (как выгрузка с фото)"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data, *_ in photos:
+            zf.writestr(CP866ZipInfo(f'sapiens photo/{name}'), data)
+    return buffer.getvalue()
+
+
+class HashIndexTest(unittest.TestCase):
+
+    def test_find_matches_all_pairs(self):
+        # Порог от 0 до 12 проверяет все радиусы перебора в блоке (_block_flips: 0-3)
+        for threshold in range(13):
+            with self.subTest(threshold=threshold):
+                hashes = synthetic_hashes(300, max_bits=threshold + 3, seed=threshold)
+                index = HashIndex(threshold)
+                for key, value in hashes:
+                    index.add(value, key)
+                self.assertEqual(len(index), len(hashes))
+
+                rng = random.Random(threshold)
+                queries = [value for _, value in hashes]
+                # Запросы, отличающиеся от хешей индекса ровно на порог и на бит больше
+                for _, value in rng.sample(hashes, 50):
+                    for bits in (threshold, threshold + 1):
+                        query = value
+                        for bit in rng.sample(range(HASH_BITS), bits):
+                            query ^= 1 << bit
+                        queries.append(query)
+                for query in queries:
+                    self.assertEqual(sorted(index.find(query)), brute_force_find(hashes, query, threshold))
+
+    def test_duplicate_groups_match_all_pairs(self):
+        for threshold in (0, 3, 6, 10):
+            with self.subTest(threshold=threshold):
+                hashes = synthetic_hashes(500, max_bits=threshold + 2, seed=threshold)
+                self.assertEqual(duplicate_groups(hashes, threshold), all_pairs_groups(hashes, threshold))
+
+    def test_groups_are_transitive(self):
+        # a~b и b~c на расстоянии 4, a и c - на расстоянии 8
+        hashes = [('a', 0), ('b', 0b1111), ('c', 0xff), ('d', 0xffff << 48)]
+        self.assertEqual(duplicate_groups(hashes, threshold=4), [['a', 'b', 'c']])
+
+
+class FindDuplicatesTest(unittest.TestCase):
+    """Хеши берутся из заранее записанного кеша: Pillow не нужен"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        work_dir = Path(self.tmp.name)
+        self.zip_path = work_dir / 'photos.zip'
+        self.zip_path.write_bytes(photo_archive(PHOTOS))
+        self.menu_dir = work_dir / 'menu'
+        self.menu_dir.mkdir()
+        self.cache_path = work_dir / 'phash-cache.json'
+
+        cache = {}
+        with zipfile.ZipFile(self.zip_path) as zf:
+            self.members = zf.namelist()
+            for info, (_, _, value, pixels) in zip(zf.infolist(), PHOTOS):
+                cache[f'zip:{info.CRC:08x}:{info.file_size}'] = [f'{value:016x}', pixels]
+        name, value, pixels = MENU_IMAGE
+        cache[f'file:{name}'] = [f'{value:016x}', pixels]
+        save_cache(self.cache_path, cache)
+        self.menu_image = self.menu_dir / name
+        self.menu_image.write_bytes(b'menu caesar')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def options(self, mode, threshold=6):
+        return DedupOptions(mode, threshold, self.cache_path, 1)
+
+    def find(self, mode, existing_images=(), threshold=6):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return find_duplicates(self.zip_path, self.members, self.options(mode, threshold), existing_images)
+
+    def test_keeps_largest_photo(self):
+        roll_jpg, _, roll_png, _ = self.members
+        self.assertEqual(self.find(DEDUP_REPORT), {roll_jpg: roll_png})
+        self.assertEqual(self.find(DEDUP_REPORT, threshold=2), {})
+
+    def test_keeps_menu_image(self):
+        caesar = self.members[3]
+        duplicates = self.find(DEDUP_REPORT, [self.menu_image])
+        self.assertEqual(duplicates[caesar], self.menu_image)
+        self.assertEqual(len(duplicates), 2)
+
+    def test_off(self):
+        self.assertEqual(self.find(DEDUP_OFF, [self.menu_image]), {})
+
+    def test_collapse_and_report_in_zip_script(self):
+        zip_script = load_script('parse-menu-from-zip')
+        added = {}
+        for mode in (DEDUP_REPORT, DEDUP_COLLAPSE):
+            menu_dir = self.menu_dir / mode
+            menu_dir.mkdir()
+            with contextlib.redirect_stdout(io.StringIO()):
+                new_dishes = zip_script.add_dishes_from_zip(empty_menu(), self.zip_path, menu_dir,
+                                                            self.options(mode))
+            added[mode] = [dish['name'] for dish in new_dishes]
+            self.assertEqual(len(list(menu_dir.iterdir())), len(new_dishes))
+
+        self.assertEqual(added[DEDUP_REPORT], ['Ролл Филадельфия', 'Борщ', 'Филадельфия ролл', 'Цезарь с курицей'])
+        self.assertEqual(added[DEDUP_COLLAPSE], ['Борщ', 'Филадельфия ролл', 'Цезарь с курицей'])
+
+
+@unittest.skipUnless(Image, 'нужен Pillow')
+class ImageHashTest(unittest.TestCase):
+    """Настоящие изображения: пересжатый уменьшенный снимок - повтор, отраженный - нет"""
+
+    @staticmethod
+    def image_bytes(size, image_format, mirror=False):
+        image = Image.new('RGB', (64, 48))
+        image.putdata([(x * 4, y * 5, (x * y) % 256) for y in range(48) for x in range(64)])
+        if mirror:
+            image = image.transpose(Image.FLIP_LEFT_RIGHT)
+        buffer = io.BytesIO()
+        image.resize(size).save(buffer, image_format)
+        return buffer.getvalue()
+
+    def test_recompressed_photo_is_duplicate(self):
+        photos = [
+            ('Ролл.png', self.image_bytes((640, 480), 'PNG')),
+            ('Ролл копия.jpg', self.image_bytes((320, 240), 'JPEG')),
+            ('Суп.png', self.image_bytes((640, 480), 'PNG', mirror=True)),
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            zip_path = Path(tmp) / 'photos.zip'
+            zip_path.write_bytes(photo_archive(photos))
+            with zipfile.ZipFile(zip_path) as zf:
+                members = zf.namelist()
+            options = DedupOptions(DEDUP_REPORT, 6, Path(tmp) / 'cache.json', 1)
+            with contextlib.redirect_stdout(io.StringIO()):
+                duplicates = find_duplicates(zip_path, members, options)
+        self.assertEqual(duplicates, {members[1]: members[0]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Этапы menu-build.py: повторное выполнение в одном процессе, как в --watch
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+SCRIPTS_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+sys.path.insert(0, str(SCRIPTS_DIR / 'benchmarks'))
+
+from menu_io import build_menu
+from synthetic import kitchen_spec_text, write_price_pdf
+
+
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+menu_build = load_script('menu-build')
+
+PRICE_ENTRIES = [(f'Блюдо {i}', 100 + i) for i in range(100)]
+
+
+class BuildTest(unittest.TestCase):
+    """Сборка целиком: одна запись menu.json, неизмененные этапы пропускаются"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.menu_json = root / 'menu.json'
+        self.txt = root / 'kitchen.txt'
+        self.txt.write_text(kitchen_spec_text(20000), encoding='utf-8')
+        missing = root / 'missing'
+        self.argv = [
+            'menu-build.py', '--menu', str(self.menu_json), '--menu-dir', str(root / 'images'),
+            '--zip', str(missing), '--html-zip', str(missing), '--txt', str(self.txt),
+            '--pdf', str(missing), '--jobs', '1',
+        ]
+        self.dishes = list(menu_build.txt_script.parse_txt_file(self.txt).values())[:5]
+        menu = build_menu([
+            {'id': i, 'name': dish['name'], 'category': 'Кухня', 'image': f'images/{i}.jpg'}
+            for i, dish in enumerate(self.dishes, 1)
+        ])
+        self.menu_json.write_text(json.dumps(menu, ensure_ascii=False), encoding='utf-8')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self):
+        output = io.StringIO()
+        with mock.patch.object(sys, 'argv', self.argv), contextlib.redirect_stdout(output), \
+                contextlib.redirect_stderr(io.StringIO()):
+            menu_build.main()
+        return output.getvalue()
+
+    def test_build_then_skip_unchanged(self):
+        output = self.build()
+        self.assertIn('menu.json сохранен', output)
+        menu = json.loads(self.menu_json.read_text(encoding='utf-8'))
+        for item, dish in zip(menu['all_items'], self.dishes):
+            for field in ('description', 'composition', 'allergens'):
+                self.assertEqual(item.get(field), dish[field] or None)
+        self.assertTrue(self.menu_json.with_name(menu_build.STATE_FILE_NAME).exists())
+
+        data = self.menu_json.read_bytes()
+        output = self.build()
+        self.assertIn('Источник не изменился, этап пропущен', output)
+        self.assertIn('menu.json не изменился', output)
+        self.assertEqual(self.menu_json.read_bytes(), data)
+
+        # Правка txt: этап txt выполняется снова
+        self.txt.write_text(self.txt.read_text(encoding='utf-8') + '\n', encoding='utf-8')
+        output = self.build()
+        self.assertIn('Изменений: 0', output)
+
+
+class StagesTest(unittest.TestCase):
+    """Этапы по отдельности, как их перевыполняет --watch"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.pdf = root / 'menu.pdf'
+        self.txt = root / 'kitchen.txt'
+        missing = root / 'missing'
+        self.args = menu_build.parse_args([
+            '--menu', str(root / 'menu.json'), '--menu-dir', str(root / 'images'),
+            '--zip', str(missing), '--html-zip', str(missing),
+            '--txt', str(self.txt), '--pdf', str(self.pdf), '--jobs', '1',
+        ])
+        # Этапы печатают ход работы - в тестах он не нужен
+        for quiet in (contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO())):
+            quiet.__enter__()
+            self.addCleanup(quiet.__exit__, None, None, None)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_prices_stage_sees_edited_pdf_page(self):
+        """--watch: этап цен после правки PDF видит новое содержимое, а не прошлый разбор"""
+        write_price_pdf(self.pdf, PRICE_ENTRIES, per_page=50)
+        menu = build_menu([{'id': 1, 'name': 'Шатобриан', 'category': 'Мясо', 'image': 'images/1.jpg'}])
+        fingerprints = {}
+        menu_build.run_changed_stages(menu, self.args, {'prices'}, fingerprints)
+        self.assertNotIn('price', menu['all_items'][0])
+
+        # Блюдо появляется на второй странице; первая не меняется и берется из кеша
+        entries = list(PRICE_ENTRIES)
+        entries[60] = ('Шатобриан', 2900)
+        os.unlink(self.pdf)
+        write_price_pdf(self.pdf, entries, per_page=50)
+        changes = menu_build.run_changed_stages(menu, self.args, {'prices'}, fingerprints)
+        self.assertEqual(changes, 1)
+        self.assertEqual(menu['all_items'][0]['price'], 2900)
+
+    def test_txt_stage_reports_only_real_changes(self):
+        """Повторный перенос того же txt - не изменение, menu.json не перезаписывается"""
+        self.txt.write_text(kitchen_spec_text(20000), encoding='utf-8')
+        dishes = menu_build.txt_script.parse_txt_file(self.txt)
+        menu = build_menu([
+            {'id': i, 'name': dish['name'], 'category': 'Кухня', 'image': f'images/{i}.jpg'}
+            for i, dish in enumerate(dishes.values(), 1)
+        ])
+        self.assertGreater(menu_build.run_txt_stage(menu, self.args), 0)
+        self.assertEqual(menu_build.run_txt_stage(menu, self.args), 0)
+
+    def test_prices_stage_fails_without_builtin_prices(self):
+        """Пакетная сборка: без текста в PDF и без builtin_prices этап завершается ошибкой"""
+        menu = build_menu([{'id': 1, 'name': 'Шатобриан', 'category': 'Мясо', 'image': 'images/1.jpg'}])
+        self.args.builtin_prices = False
+        with self.assertRaises(menu_build.prices_script.NoPricesError):
+            menu_build.run_prices_stage(menu, self.args)
+        self.assertNotIn('price', menu['all_items'][0])
+
+        self.args.builtin_prices = True
+        self.assertGreaterEqual(menu_build.run_prices_stage(menu, self.args), 0)
+
+
+
+class ZipDishNamesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.zip = root / 'photos.zip'
+        self.menu_dir = root / 'images'
+        quiet = contextlib.redirect_stdout(io.StringIO())
+        quiet.__enter__()
+        self.addCleanup(quiet.__exit__, None, None, None)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_existing_name_matches_exactly_ignoring_case(self):
+        """Фото уже известного блюда пропускается, похожее название - новое блюдо"""
+        with zipfile.ZipFile(self.zip, 'w') as archive:
+            archive.writestr('цезарь с креветками.jpg', b'photo 1')
+            archive.writestr('Цезарь (с креветками).jpg', b'photo 2')
+        menu = build_menu([{'id': 1, 'name': 'Цезарь с креветками', 'category': 'Салаты', 'image': None}])
+        new_dishes = menu_build.zip_script.add_dishes_from_zip(menu, self.zip, self.menu_dir)
+        self.assertEqual([dish['name'] for dish in new_dishes], ['Цезарь (с креветками)'])
+        self.assertEqual(new_dishes[0]['id'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
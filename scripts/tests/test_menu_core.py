@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Общий normalize_name против прежних нормализаторов скриптов; MenuIndex
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import json
+import re
+import sys
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent.parent
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from menu_core import MenuIndex, normalize_name
+from menu_io import load_menu
+
+
+def old_normalize_name(name):
+    """Прежний нормализатор HTML и txt скриптов (в PDF - то же и "ё" -> "е")"""
+    name = re.sub(r'\s+', ' ', name.strip().lower())
+    return re.sub(r'[^\w\s]', '', name)
+
+
+# Пары, которые прежние нормализаторы различали, а normalize_name - нет
+NOW_MATCHING = [
+    ('Свёкла с вяленой уткой', 'Свекла с вяленой уткой'),       # "ё" -> "е" и в HTML и txt
+    ('Тартар из говядины & желток', 'Тартар из говядины желток'),  # знак между пробелами
+    ('Крафл – гибрид круассана', 'Крафл гибрид круассана'),
+    ('Устрицы ..', 'Устрицы'),                                     # хвост точек из прайса
+    ('⚠ Аллергены:', 'Аллергены'),                                 # знак в начале
+    ('Соус ( сливки, желток )', 'Соус сливки желток'),
+]
+# Пары, которые по-прежнему различаются
+STILL_DIFFERENT = [
+    ('Цезарь (с креветками)', 'Цезарь с курицей'),
+    ('Какао-порошок', 'Какао порошок'),  # дефис внутри слова убирается без пробела
+]
+
+
+def real_names():
+    names = [item['name'] for item in load_menu(SCRIPTS_DIR.parent / 'menu.json')['all_items']]
+    for fixture in ('kitchen-spec.expected.json', 'docs-export.expected.json'):
+        with open(FIXTURES_DIR / fixture, 'r', encoding='utf-8') as f:
+            names += [dish['name'] for dish in json.load(f)]
+    return names
+
+
+class NormalizeNameTest(unittest.TestCase):
+
+    def test_examples(self):
+        self.assertEqual(normalize_name('Свёкла с уткой, мёдом'), 'свекла с уткой медом')
+        self.assertEqual(normalize_name('  Том  ям -  суп! '), 'том ям суп')
+        self.assertEqual(normalize_name('Какао-порошок'), 'какаопорошок')
+
+    def test_now_matching_pairs(self):
+        for a, b in NOW_MATCHING:
+            with self.subTest(a=a, b=b):
+                self.assertNotEqual(old_normalize_name(a), old_normalize_name(b))
+                self.assertEqual(normalize_name(a), normalize_name(b))
+
+    def test_still_different_pairs(self):
+        for a, b in STILL_DIFFERENT:
+            with self.subTest(a=a, b=b):
+                self.assertNotEqual(normalize_name(a), normalize_name(b))
+
+    def test_differs_from_old_only_in_yo_and_spaces(self):
+        # Для реальных названий: прежний результат с "ё" -> "е" и схлопнутыми пробелами
+        for name in real_names():
+            with self.subTest(name=name):
+                self.assertEqual(normalize_name(name), ' '.join(old_normalize_name(name).replace('ё', 'е').split()))
+
+
+class MenuIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.items = [
+            {'id': 3, 'name': 'Свёкла с уткой', 'category': 'Салаты'},
+            {'id': 7, 'name': 'Борщ', 'category': 'Супы'},
+            {'id': 'x', 'name': 'борщ!', 'category': 'Супы'},
+        ]
+        self.index = MenuIndex({'all_items': self.items})
+
+    def test_lookup(self):
+        self.assertIs(self.index.get(7), self.items[1])
+        self.assertIsNone(self.index.get(8))
+        self.assertEqual(self.index.find('Свекла с уткой'), [self.items[0]])
+        self.assertEqual(self.index.find_normalized('борщ'), self.items[1:])
+        self.assertIn('БОРЩ', self.index)
+        self.assertNotIn('Щи', self.index)
+        self.assertEqual(self.index.max_id(), 7)
+
+    def test_add(self):
+        dish = {'id': 8, 'name': 'Щи', 'category': 'Супы'}
+        self.index.add(dish)
+        self.assertIs(self.items[-1], dish)
+        self.assertEqual(self.index.find('щи'), [dish])
+        self.assertEqual(self.index.max_id(), 8)
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(MenuIndex([]).max_id(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Схема menu.json v2: перевод из v1, категории из id; чтение и запись через Dish
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from menu_core import Dish, MenuIndex
+from menu_io import (SCHEMA_VERSION, add_items, build_menu, category_items, empty_menu, load_menu, save_menu,
+                     upgrade_menu)
+
+DISHES = [
+    {'id': 1, 'name': 'Цезарь с курицей', 'category': 'Салаты', 'image': 'a.jpg'},
+    {'name': 'Борщ', 'id': 2, 'category': 'Супы', 'image': 'b.jpg', 'spicy': True},
+]
+
+# menu.json v1: блюдо и в all_items, и копией в категории; копии расходятся
+MENU_V1 = {
+    'menu': {'categories': [
+        {'name': 'Салаты', 'items': [{'id': 1, 'name': 'Цезарь с курицей', 'category': 'Салаты', 'price': 450}]},
+        {'name': 'Супы', 'items': [
+            {'id': 2, 'name': 'Борщ', 'category': 'Супы', 'price': None},
+            {'id': 5, 'name': 'Щи', 'category': 'Супы'},
+        ]},
+        {'name': 'Напитки', 'items': []},
+    ]},
+    'all_items': [
+        {'id': 1, 'name': 'Цезарь с курицей', 'category': 'Салаты', 'price': None, 'image': 'a.jpg'},
+        {'id': 2, 'name': 'Борщ', 'category': 'Супы', 'price': 390},
+    ],
+    'statistics': {'total_items': 2, 'categories_count': 3},
+}
+
+
+class SchemaTest(unittest.TestCase):
+
+    def test_upgrade_v1(self):
+        menu = upgrade_menu(json.loads(json.dumps(MENU_V1)))
+        self.assertEqual(menu['schema_version'], SCHEMA_VERSION)
+        self.assertEqual(menu['menu']['categories'], [
+            {'name': 'Салаты', 'item_ids': [1], 'count': 1},
+            {'name': 'Супы', 'item_ids': [2, 5], 'count': 2},
+        ])
+        # all_items - основная копия, из категории берутся только недостающие поля
+        items = {item['id']: item for item in menu['all_items']}
+        self.assertEqual(items[1]['price'], 450)
+        self.assertEqual(items[2]['price'], 390)
+        self.assertEqual(items[5]['name'], 'Щи')
+        self.assertEqual(menu['statistics'], {'total_items': 3, 'categories_count': 2})
+        self.assertIs(upgrade_menu(menu), menu)
+
+    def test_load_v1_and_save_v2(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'menu.json'
+            path.write_text(json.dumps(MENU_V1, ensure_ascii=False), encoding='utf-8')
+            save_menu(path, load_menu(path), shards=False)
+            saved = json.loads(path.read_text(encoding='utf-8'))
+        self.assertEqual(saved['schema_version'], SCHEMA_VERSION)
+        self.assertNotIn('items', saved['menu']['categories'][0])
+        self.assertEqual([item['id'] for item in saved['all_items']], [1, 2, 5])
+
+    def test_add_items_and_category_items(self):
+        menu = empty_menu()
+        add_items(menu, [dict(dish) for dish in DISHES])
+        add_items(menu, [{'id': 3, 'name': 'Греческий', 'category': 'Салаты'}])
+        self.assertEqual([category['name'] for category in menu['menu']['categories']], ['Салаты', 'Супы'])
+        self.assertEqual([item['id'] for item in category_items(menu, 'Салаты')], [1, 3])
+        self.assertEqual(category_items(menu, 'Десерты'), [])
+        self.assertEqual(menu['statistics'], {'total_items': 3, 'categories_count': 2})
+        self.assertEqual(build_menu(menu['all_items'], ['Супы'])['menu']['categories'][0]['name'], 'Супы')
+
+
+class LoadSaveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / 'menu.json'
+        save_menu(self.path, build_menu(DISHES), shards=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_keeps_bytes(self):
+        original = self.path.read_bytes()
+        menu = load_menu(self.path)
+        self.assertTrue(all(isinstance(item, Dish) for item in menu['all_items']))
+        save_menu(self.path, menu, shards=False)
+        self.assertEqual(self.path.read_bytes(), original)
+
+    def test_new_key_goes_last_like_dict(self):
+        menu = load_menu(self.path)
+        MenuIndex(menu).get(1)['price'] = 450
+        menu['all_items'].append({'id': 3, 'name': 'Морс', 'category': 'Напитки'})
+        save_menu(self.path, menu, shards=False)
+        items = load_menu(self.path)['all_items']
+        self.assertEqual(list(items[0]), ['id', 'name', 'category', 'image', 'price'])
+        self.assertEqual(items[1].to_dict(), DISHES[1])
+        self.assertEqual(items[2]['name'], 'Морс')
+
+
+if __name__ == '__main__':
+    unittest.main()
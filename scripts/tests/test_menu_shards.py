@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Шарды меню: директория рядом с menu.json; сборщик мусора - старые файлы
+живут GC_GRACE_PERIOD
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from menu_io import build_menu, save_menu
+from menu_shards import GC_GRACE_PERIOD, INDEX_FILE_NAME, shards_dir_for, split_menu, write_menu_shards
+
+DISHES = [
+    {'id': 1, 'name': 'Цезарь с курицей', 'category': 'Салаты', 'description': 'Классический'},
+    {'id': 2, 'name': 'Борщ', 'category': 'Супы', 'description': 'Со сметаной'},
+]
+
+
+class ShardsDirTest(unittest.TestCase):
+
+    def test_next_to_menu_json(self):
+        # Для заведения пакетной сборки - <output>/public/menu-data
+        self.assertEqual(shards_dir_for(Path('build/sapiens/menu.json')), Path('build/sapiens/public/menu-data'))
+
+    def test_save_menu_writes_shards_next_to_menu(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / 'sapiens'
+            output.mkdir()
+            save_menu(output / 'menu.json', build_menu(DISHES))
+            self.assertTrue((output / 'public' / 'menu-data' / INDEX_FILE_NAME).exists())
+
+
+class ShardsGcTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.shards_dir = Path(self.tmp.name) / 'menu-data'
+        self.state = Path(self.tmp.name) / 'state.json'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, description, now):
+        menu = build_menu([dict(DISHES[0], description=description), DISHES[1]])
+        write_menu_shards(menu, self.shards_dir, self.state, now=now)
+        return set(split_menu(menu)[1])
+
+    def files(self):
+        return {path.name for path in self.shards_dir.iterdir()} - {INDEX_FILE_NAME}
+
+    def test_old_generation_outlives_grace_period_only(self):
+        first = self.write('Классический', now=1000)
+        second = self.write('С анчоусами', now=2000)
+        self.assertEqual(self.files(), first | second)
+
+        # Через GC_GRACE_PERIOD после замены остаются только нужные файлы
+        self.write('С анчоусами', now=2000 + GC_GRACE_PERIOD)
+        self.assertEqual(self.files(), second)
+
+    def test_referenced_again_is_not_an_orphan(self):
+        first = self.write('Классический', now=1000)
+        self.write('С анчоусами', now=2000)
+        self.write('Классический', now=3000)
+        third = self.write('Классический', now=3000 + GC_GRACE_PERIOD)
+        self.assertEqual(third, first)
+        self.assertTrue(first <= self.files())
+
+
+if __name__ == '__main__':
+    unittest.main()
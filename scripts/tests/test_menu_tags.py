@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Маски аллергенов и ингредиентов: исключения из словарей и фильтр блюд
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from menu_io import build_menu, load_menu
+from menu_tags import ALLERGENS, INGREDIENTS, filter_items, item_masks, tag_menu
+
+ALLERGEN_BITS = {key: 1 << bit for bit, (key, _, _) in enumerate(ALLERGENS)}
+INGREDIENT_BITS = {key: 1 << bit for bit, (key, _, _) in enumerate(INGREDIENTS)}
+
+DISHES = [
+    {'id': 1, 'name': 'Том ям с креветками', 'category': 'Супы', 'composition': '* креветки\n* лемонграсс\n* лайм'},
+    {'id': 2, 'name': 'Паштет из утки', 'category': 'Закуски', 'composition': '* утиная печень\n* бриошь',
+     'allergens': 'глютен, орехи (макадамия)'},
+    {'id': 3, 'name': 'Цезарь с курицей', 'category': 'Салаты', 'composition': '* куриное филе\n* пармезан'},
+    {'id': 4, 'name': 'Гречневая каша', 'category': 'Закуски', 'description': 'Без глютена, с мускатным орехом'},
+    {'id': 5, 'name': 'Морс', 'category': 'Напитки'},
+]
+
+
+def allergens(text):
+    return {key for key, bit in ALLERGEN_BITS.items() if item_masks({'name': text})[0] & bit}
+
+
+def ingredients(text):
+    return {key for key, bit in INGREDIENT_BITS.items() if item_masks({'name': text})[1] & bit}
+
+
+class ItemMasksTest(unittest.TestCase):
+
+    def test_negation_is_ignored(self):
+        self.assertEqual(allergens('Салат без глютена'), set())
+        self.assertEqual(allergens('Салат без глютена, с пшеничными гренками'), {'gluten'})
+        self.assertEqual(allergens('Торт без орехов'), set())
+        self.assertEqual(allergens('Торт без орехов и без молока'), set())
+
+    def test_nutmeg_is_not_a_nut(self):
+        self.assertEqual(allergens('Пюре с мускатным орехом'), set())
+        self.assertEqual(allergens('Мускатный орех, грецкий орех'), {'nuts'})
+
+    def test_lemongrass_is_not_citrus(self):
+        self.assertEqual(allergens('Суп с лемонграссом'), set())
+        self.assertEqual(allergens('Суп с лемонграссом и лаймом'), {'citrus'})
+        self.assertEqual(allergens('Лимонник'), set())
+        self.assertEqual(allergens('Лимонный тарт'), {'citrus'})
+
+    def test_chicken_egg_is_not_chicken(self):
+        self.assertEqual(ingredients('Куриное яйцо'), set())
+        self.assertEqual(ingredients('Куриный желток'), set())
+        self.assertEqual(ingredients('Желток куриный'), set())
+        self.assertEqual(ingredients('Яйцо куриное'), set())
+        self.assertEqual(allergens('Куриное яйцо'), {'eggs'})
+        self.assertEqual(ingredients('Куриное филе'), {'chicken'})
+        self.assertEqual(ingredients('Бульон из цыплёнка'), {'chicken'})
+
+    def test_yo_and_whole_words(self):
+        self.assertEqual(allergens('Мёд'), {'honey'})
+        self.assertEqual(allergens('Медовик'), {'honey'})
+        self.assertEqual(allergens('Медведь'), set())
+        self.assertEqual(ingredients('Рис'), {'rice'})
+        self.assertEqual(ingredients('Рислинг'), set())
+        self.assertEqual(ingredients('Паста мисо'), {'pasta'})
+        self.assertEqual(ingredients('Мисо паста'), set())
+
+
+class TagMenuTest(unittest.TestCase):
+
+    def setUp(self):
+        self.menu = build_menu([dict(dish) for dish in DISHES])
+
+    def test_tag_menu_counts_changes(self):
+        self.assertEqual(tag_menu(self.menu), len(DISHES))
+        self.assertEqual(tag_menu(self.menu), 0)
+        self.assertEqual([tag['key'] for tag in self.menu['tags']['allergens']], list(ALLERGEN_BITS))
+        self.assertEqual(self.menu['all_items'][4]['allergen_mask'], 0)
+
+    def test_filter_items(self):
+        tag_menu(self.menu)
+
+        def ids(**kwargs):
+            return [item['id'] for item in filter_items(self.menu, **kwargs)]
+
+        self.assertEqual(ids(), [1, 2, 3, 4, 5])
+        self.assertEqual(ids(without_allergens=['nuts']), [1, 3, 4, 5])
+        self.assertEqual(ids(without_allergens=['gluten', 'seafood']), [3, 4, 5])
+        self.assertEqual(ids(without_allergens=['citrus']), [2, 3, 4, 5])
+        self.assertEqual(ids(with_ingredients=['shrimp']), [1])
+        self.assertEqual(ids(with_ingredients=['chicken', 'cheese']), [3])
+        self.assertEqual(ids(without_ingredients=['duck', 'chicken']), [1, 4, 5])
+        with self.assertRaises(ValueError):
+            ids(without_allergens=['shrimp'])
+
+    def test_untagged_items_are_not_excluded(self):
+        tag_menu(self.menu)
+        self.menu['all_items'].append({'id': 6, 'name': 'Орехи в меду', 'category': 'Десерты'})
+        self.assertEqual([item['id'] for item in filter_items(self.menu, without_allergens=['nuts'])],
+                         [1, 3, 4, 5, 6])
+
+    def test_shipped_menu_is_tagged(self):
+        menu = load_menu(SCRIPTS_DIR.parent / 'menu.json')
+        self.assertIn('tags', menu)
+        self.assertEqual(tag_menu(menu), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
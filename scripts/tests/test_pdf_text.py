@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Повторный разбор PDF в том же процессе после замены файла; PDF меню без
+текстового слоя
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+sys.path.insert(0, str(SCRIPTS_DIR / 'benchmarks'))
+
+import instrumentation
+import pdf_text
+from pdf_text import extract_pdf_lines
+from synthetic import write_price_pdf
+
+ENTRIES = [(f'Блюдо {i}', 100 + i) for i in range(100)]
+
+
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+prices_script = load_script('update-prices-from-pdf')
+
+
+def replace_pdf(path, entries):
+    """Пишет новый файл на место старого (как при загрузке свежего меню)"""
+    os.unlink(path)
+    write_price_pdf(path, entries, per_page=50)
+
+
+class ExtractAfterReplaceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf = os.path.join(self.tmp.name, 'menu.pdf')
+        self.cache = os.path.join(self.tmp.name, 'cache.json')
+        write_price_pdf(self.pdf, ENTRIES, per_page=50)
+
+    def tearDown(self):
+        for _, doc in pdf_text._worker_docs.values():
+            doc.close()
+        pdf_text._worker_docs.clear()
+        self.tmp.cleanup()
+
+    def test_serial_extract_reads_replaced_page(self):
+        lines, _ = extract_pdf_lines(self.pdf, jobs=1, cache_path=self.cache)
+        self.assertIn('Блюдо 60 160', lines[1])
+
+        entries = list(ENTRIES)
+        entries[60] = ('Блюдо 60', 999)
+        replace_pdf(self.pdf, entries)
+        lines, stats = extract_pdf_lines(self.pdf, jobs=1, cache_path=self.cache)
+        self.assertEqual((stats['parsed'], stats['cached']), (1, 1))
+        self.assertIn('Блюдо 60 999', lines[1])
+
+        # В кеше под новым отпечатком - новые строки
+        lines, stats = extract_pdf_lines(self.pdf, jobs=1, cache_path=self.cache)
+        self.assertEqual(stats['parsed'], 0)
+        self.assertIn('Блюдо 60 999', lines[1])
+
+    def test_worker_reopens_replaced_file(self):
+        lines, error = pdf_text._page_lines_worker(self.pdf, 1)
+        self.assertIsNone(error)
+        self.assertIn('Блюдо 60 160', lines)
+
+        entries = list(ENTRIES)
+        entries[60] = ('Блюдо 60', 12345)
+        replace_pdf(self.pdf, entries)
+        stat = os.stat(self.pdf)
+        os.utime(self.pdf, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        lines, error = pdf_text._page_lines_worker(self.pdf, 1)
+        self.assertIsNone(error)
+        self.assertIn('Блюдо 60 12345', lines)
+
+
+
+class MenuPdfTest(unittest.TestCase):
+    """PDF меню Sapiens: текст в кривых, цены берутся из встроенного списка"""
+
+    def test_menu_pdf_has_no_text(self):
+        pages, stats = extract_pdf_lines(prices_script.PDF_FILE, jobs=1)
+        self.assertEqual(stats['errors'], [])
+        self.assertGreater(stats['pages'], 0)
+        self.assertEqual(sum(len(lines) for lines in pages), 0)
+
+    def test_load_prices_warns_about_builtin_list(self):
+        instrumentation._stats.reset()
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            prices = prices_script.load_prices(prices_script.PDF_FILE, jobs=1)
+        self.assertEqual(prices, prices_script.extract_prices_from_pdf_content())
+        self.assertIn('используется встроенный список цен', stderr.getvalue())
+        self.assertEqual(instrumentation._stats.counters['prices.builtin_fallback'], 1)
+
+    def test_load_prices_without_fallback_fails(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            with self.assertRaises(prices_script.NoPricesError):
+                prices_script.load_prices(prices_script.PDF_FILE, jobs=1, fallback=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
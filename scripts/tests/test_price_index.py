@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Индекс цен против прежнего перебора прайса на названиях блюд menu.json
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import importlib.util
+import random
+import sys
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from menu_core import normalize_name
+from menu_io import load_menu
+from price_index import PriceIndex
+
+
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+prices_script = load_script('update-prices-from-pdf')
+
+
+def linear_match(name, prices_data):
+    """Прежний перебор из update_menu_json: цена для блюда без цены или None"""
+    item_name_normalized = normalize_name(name)
+    if item_name_normalized in prices_data:
+        return prices_data[item_name_normalized]
+
+    best_match = None
+    best_score = 0
+    item_name_clean = name.lower()
+    for price_name_norm, price_info in prices_data.items():
+        price_name_clean = price_info['name'].lower()
+        item_words = set(item_name_normalized.split())
+        price_words = set(price_name_norm.split())
+
+        # Первая запись с тем же началом - сразу
+        if item_name_clean.startswith(price_name_clean[:15]) or price_name_clean.startswith(item_name_clean[:15]):
+            return price_info
+
+        common_words = item_words & price_words
+        if len(common_words) >= 2 and len(common_words) > best_score:
+            best_score = len(common_words)
+            best_match = price_info
+    return best_match
+
+
+def variants(name, rng):
+    """Название и его искажения: другой регистр, обрезка, перестановка и замена слов"""
+    words = name.split()
+    yield name
+    yield name.upper()
+    yield name[:10]
+    yield name[:20] + ' по-домашнему'
+    yield ' '.join(reversed(words))
+    shuffled = list(words)
+    rng.shuffle(shuffled)
+    yield ' '.join(shuffled)
+    if len(words) > 2:
+        yield 'Блюдо ' + ' '.join(words[1:])
+        yield ' '.join(words[:-1]) + ' и шпинатом'
+
+
+class PriceIndexTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.names = [item['name'] for item in load_menu(SCRIPTS_DIR.parent / 'menu.json')['all_items']]
+        cls.prices = prices_script.extract_prices_from_pdf_content()
+
+    def assert_same_matches(self, names, prices):
+        index = PriceIndex(prices)
+        for name in names:
+            with self.subTest(name=name):
+                price_info, _ = index.match(name, normalize_name(name))
+                self.assertIs(price_info, linear_match(name, prices))
+
+    def test_menu_names(self):
+        self.assertGreater(len(self.names), 0)
+        self.assert_same_matches(self.names, self.prices)
+
+    def test_distorted_names(self):
+        rng = random.Random(0)
+        names = [variant for name in self.names + [p['name'] for p in self.prices.values()]
+                 for variant in variants(name, rng)]
+        self.assert_same_matches(names, self.prices)
+
+    def test_large_price_list(self):
+        # Больше записей, чем PRECOMPUTED_MASK_MIN_POSTINGS у частых слов ("с", "и")
+        rng = random.Random(1)
+        lines = [f'{name} {suffix} ..... {rng.randrange(300, 3000, 10)}'
+                 for suffix in ('', 'с трюфелем', 'и шпинатом', 'по-домашнему')
+                 for name in self.names]
+        prices = prices_script.parse_price_lines(lines)
+        self.assertGreater(len(prices), 64)
+        names = [variant for name in self.names for variant in variants(name, rng)]
+        self.assert_same_matches(names, prices)
+
+    def test_rules(self):
+        prices = prices_script.parse_price_lines([
+            'Салат романо с соусом Цезарь ..... 820',
+            'Салат романо с креветками ..... 990',
+            'Тартар из говядины с айоли ..... 1290',
+            'Тартар из тунца с авокадо ..... 1390',
+        ])
+        index = PriceIndex(prices)
+
+        def match(name):
+            price_info, rule = index.match(name, normalize_name(name))
+            return price_info and price_info['price'], rule
+
+        self.assertEqual(match('Тартар из тунца с авокадо'), (1390, 'exact'))
+        # Первые 15 символов совпадают у обоих салатов - первая запись
+        self.assertEqual(match('Салат романо с креветками и яйцом'), (820, 'prefix'))
+        self.assertEqual(match('Тунец тартар с авокадо'), (1390, 'words'))
+        self.assertEqual(match('Борщ'), (None, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
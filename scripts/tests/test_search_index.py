@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Поисковый индекс: запись, чтение и запросы по блюдам menu.json против
+прохода по всем блюдам
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import json
+import math
+import sys
+import unittest
+from collections import Counter
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from data_io import dumps, read_data
+from menu_io import load_menu
+from menu_shards import INDEX_FILE_NAME, shards_dir_for
+from search_index import (FUZZY_RATIO, NAME_WEIGHT, PARTIAL_WEIGHT, PREFIX_LENGTHS, SEARCH_FIELDS, TEXT_WEIGHT,
+                          SearchIndex, build_search_index, delta_decode, delta_encode, fold, stem, tokenize,
+                          trigrams)
+
+MENU_JSON = SCRIPTS_DIR.parent / 'menu.json'
+
+QUERIES = [
+    'креветк', 'креветками', 'что-нибудь с креветками', 'черный', 'чёрный', 'кре', 'кревет',
+    'креветочный', 'тыква суп', 'лосось авокадо', 'рис', 'NoSuchDish',
+]
+
+
+def linear_search(items, query):
+    """Тот же поиск проходом по текстам всех блюд, без индекса"""
+    shortest, longest = PREFIX_LENGTHS
+    docs = []
+    for item in items:
+        words = {}  # основа -> встречается в названии
+        doc_trigrams = set()
+        for field in SEARCH_FIELDS:
+            for token in tokenize(item.get(field) or ''):
+                words[stem(token)] = words.get(stem(token), False) or field == 'name'
+                doc_trigrams |= trigrams(token)
+        docs.append((item['id'], words, doc_trigrams))
+
+    tokens = list(dict.fromkeys(tokenize(query)))
+    matched = Counter()
+    scores = Counter()
+    for token in tokens:
+        term = stem(token)
+        for item_id, words, doc_trigrams in docs:
+            if term in words:
+                score = NAME_WEIGHT if words[term] else TEXT_WEIGHT
+            elif len(term) <= longest and any(word.startswith(term) for word in words):
+                score = PARTIAL_WEIGHT
+            elif (len(token) > longest
+                  and len(trigrams(token) & doc_trigrams) >= math.ceil(len(trigrams(token)) * FUZZY_RATIO)
+                  and any(word.startswith(token[:shortest]) for word in words)):
+                score = PARTIAL_WEIGHT
+            else:
+                continue
+            matched[item_id] += 1
+            scores[item_id] += score
+    ranked = sorted(matched, key=lambda item_id: (-matched[item_id], -scores[item_id], item_id))
+    if ranked and matched[ranked[0]] == len(tokens):
+        ranked = [item_id for item_id in ranked if matched[item_id] == len(tokens)]
+    return ranked
+
+
+def dish_text(item):
+    return fold(' '.join(item.get(field) or '' for field in SEARCH_FIELDS))
+
+
+class SearchIndexTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.items = load_menu(MENU_JSON)['all_items']
+        # Как в шардах: индекс пишется в JSON и читается клиентом заново
+        cls.index = SearchIndex(json.loads(dumps(build_search_index(cls.items), 'min')))
+
+    def test_delta_round_trip(self):
+        values = [0, 1, 5, 6, 100, 4096]
+        self.assertEqual(delta_encode(values), [0, 1, 4, 1, 94, 3996])
+        self.assertEqual(delta_decode(delta_encode(values)), values)
+
+    def test_docs_round_trip(self):
+        self.assertEqual(self.index.docs, sorted(item['id'] for item in self.items))
+
+    def test_queries_match_linear_scan(self):
+        for query in QUERIES:
+            with self.subTest(query=query):
+                self.assertEqual(self.index.search(query), linear_search(self.items, query))
+
+    def test_shrimp_stem(self):
+        self.assertEqual(stem('креветками'), 'креветк')
+        self.assertEqual(stem('креветки'), 'креветк')
+        results = self.index.search('креветк')
+        # Длинная форма слова находит еще и блюда с похожими словами (триграммы)
+        self.assertLessEqual(set(results), set(self.index.search('креветками')))
+        self.assertEqual(self.index.search('креветками'), self.index.search('что-нибудь с креветками'))
+        expected = {item['id'] for item in self.items if 'кревет' in dish_text(item)}
+        self.assertTrue(expected)
+        self.assertLessEqual(expected, set(results))
+
+    def test_yo_folds_to_ye(self):
+        results = self.index.search('черный')
+        self.assertEqual(results, self.index.search('чёрный'))
+        texts = {item['id']: ' '.join(item.get(field) or '' for field in SEARCH_FIELDS).lower()
+                 for item in self.items}
+        only_yo = {item_id for item_id, text in texts.items() if 'чёрн' in text and 'черн' not in text}
+        self.assertTrue(only_yo)
+        self.assertLessEqual(only_yo, set(results))
+
+    def test_prefix_while_typing(self):
+        results = self.index.search('кре')
+        self.assertLessEqual(set(self.index.search('креветк')), set(results))
+        expected = {
+            item['id'] for item in self.items
+            if any(token.startswith('кре') for token in tokenize(dish_text(item)))
+        }
+        self.assertEqual(set(results), expected)
+
+    def test_limit(self):
+        self.assertEqual(self.index.search('кре', limit=3), self.index.search('кре')[:3])
+
+    def test_shipped_index_is_current(self):
+        shards_dir = shards_dir_for(MENU_JSON)
+        search_file = read_data(shards_dir / INDEX_FILE_NAME)['search']
+        self.assertEqual(read_data(shards_dir / search_file), build_search_index(self.items))
+
+
+if __name__ == '__main__':
+    unittest.main()
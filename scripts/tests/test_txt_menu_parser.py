@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Лексер и парсер техкарты против прежнего построчного разбора
+
+fixtures/kitchen-spec.txt - начало "Копия Sapiens Kitchen.txt",
+fixtures/kitchen-spec.expected.json - блюда, которые из него извлекал
+прежний parse_txt_file (поле normalized_name не записано).
+
+    python3 -m unittest discover -s scripts/tests
+"""
+
+import importlib.util
+import json
+import sys
+import unittest
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent.parent
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from txt_menu_parser import iter_dishes, iter_dishes_from_file
+
+TXT_FILE = FIXTURES_DIR / 'kitchen-spec.txt'
+
+
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), SCRIPTS_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+txt_script = load_script('update-menu-from-txt')
+
+
+class TxtParserTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(FIXTURES_DIR / 'kitchen-spec.expected.json', 'r', encoding='utf-8') as f:
+            cls.expected = json.load(f)
+
+    def test_parse_txt_file_matches_previous_parser(self):
+        dishes = txt_script.parse_txt_file(TXT_FILE)
+        for normalized_name, dish in dishes.items():
+            self.assertEqual(dish.pop('normalized_name'), normalized_name)
+        self.assertEqual(list(dishes.values()), self.expected)
+
+    def test_lines_and_file_give_same_dishes(self):
+        lines = TXT_FILE.read_text(encoding='utf-8').splitlines(keepends=True)
+        self.assertEqual(list(iter_dishes(lines)), list(iter_dishes_from_file(TXT_FILE)))
+
+    def test_lines_without_line_breaks(self):
+        # Строки без перевода строки в конце (например, из str.splitlines())
+        lines = TXT_FILE.read_text(encoding='utf-8').splitlines()
+        self.assertEqual(list(iter_dishes(lines)), list(iter_dishes_from_file(TXT_FILE)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Потоковый разбор текстовой техкарты кухни (Копия Sapiens Kitchen.txt).
+
+Лексер читает файл построчно и одним заранее скомпилированным регулярным
+выражением относит каждую строку к типу токена: пустая строка, категория,
+заголовок раздела (Описание, Состав, Аллергены...), пункт списка "*",
+разделитель "____" или обычный текст. Парсер потребляет токены с
+заглядыванием на один токен вперед и лениво выдает записи о блюдах -
+как только начинается следующее блюдо или категория.
+
+Правила разбора те же, что и у прежнего построчного автомата, включая
+его особенности: строка-категория проверяется раньше заголовков, а
+разделы состава и аллергенов читают следующие строки до стоп-заголовка.
+"""
+
+import re
+from collections import namedtuple
+
+BLANK = 'blank'
+CATEGORY = 'category'
+SECTION = 'section'
+BULLET = 'bullet'
+SEPARATOR = 'separator'
+TEXT = 'text'
+
+SECTION_HEADERS = (
+    'Описание', 'Состав', 'Аллергены', 'Конфликт', 'Тайминг',
+    'Приборы', 'Технические', 'Пищевая',
+)
+MIN_DISH_NAME_LENGTH = 6
+# Длинная строка без "*" и "Основ..." завершает состав
+MAX_COMPOSITION_LINE = 50
+MAX_ALLERGEN_LINE = 100
+MIN_DESCRIPTION_CONTINUATION = 21
+
+# Категория проверяется заглядыванием, поэтому строка вида "Состав" одновременно
+# и категория, и заголовок раздела (для стоп-условий внутри разделов)
+_LINE_RE = re.compile(
+    r'(?=(?P<category>[А-ЯЁ][а-яё\s]+$))?'
+    r'(?:(?P<separator>________________)|(?P<bullet>\*)|(?P<header>'
+    + '|'.join(SECTION_HEADERS) + r'))?'
+)
+
+# Заголовки, на которых останавливается чтение состава и аллергенов
+_COMPOSITION_STOP = frozenset(('Описание', 'Аллергены', 'Конфликт', 'Тайминг', 'Технические'))
+_ALLERGENS_STOP = frozenset(('Описание', 'Состав', 'Конфликт', 'Тайминг', 'Технические'))
+
+Token = namedtuple('Token', 'kind text header')
+
+
+def classify_line(line):
+    """Токен для строки (строка уже без пробелов по краям)"""
+    if not line:
+        return Token(BLANK, line, None)
+    match = _LINE_RE.match(line)
+    header = match.group('header')
+    if match.group('category') is not None:
+        kind = CATEGORY
+    elif header is not None:
+        kind = SECTION
+    elif match.group('bullet') is not None:
+        kind = BULLET
+    elif match.group('separator') is not None:
+        kind = SEPARATOR
+    else:
+        kind = TEXT
+    return Token(kind, line, header)
+
+
+def tokenize(lines):
+    """Лексер: поток строк -> поток токенов"""
+    for line in lines:
+        yield classify_line(line.strip())
+
+
+def _is_stop(token, stop_headers):
+    return token.kind == BLANK or token.kind == SEPARATOR or token.header in stop_headers
+
+
+def _after_colon(text):
+    return text.split(':', 1)[1].strip() if ':' in text else ''
+
+
+def parse_tokens(tokens):
+    """Парсер: поток токенов -> записи о блюдах
+
+    Запись: {'name', 'category', 'description', 'composition', 'allergens'}.
+    Одно и то же блюдо может встретиться несколько раз - побеждает последнее.
+    """
+    tokens = iter(tokens)
+    pending = []          # токен, возвращенный после заглядывания
+
+    def next_token():
+        if pending:
+            return pending.pop()
+        return next(tokens, None)
+
+    dish = None
+    section = None
+    category = None
+
+    while True:
+        token = next_token()
+        if token is None:
+            break
+        kind, line, header = token
+
+        if kind == BLANK:
+            continue
+
+        if kind == CATEGORY:
+            category = line
+            if dish is not None:
+                yield dish
+            dish = None
+            continue
+
+        # Название блюда: любая достаточно длинная строка без заголовка после категории
+        if category and kind == TEXT and len(line) >= MIN_DISH_NAME_LENGTH:
+            if dish is not None:
+                yield dish
+            dish = {
+                'name': line,
+                'category': category,
+                'description': None,
+                'composition': None,
+                'allergens': None
+            }
+            section = None
+            continue
+
+        if dish is None:
+            continue
+
+        if header == 'Описание':
+            # "Описание: текст" или "Описание блюда" и текст на следующей строке
+            section = 'description'
+            desc_text = _after_colon(line)
+            if desc_text:
+                dish['description'] = desc_text
+            if not dish['description']:
+                token = next_token()
+                if token is not None:
+                    if token.kind != BLANK and token.kind != BULLET and token.header != 'Состав':
+                        dish['description'] = token.text
+                    else:
+                        pending.append(token)
+            continue
+
+        if header == 'Состав':
+            section = 'composition'
+            composition_lines = []
+            while True:
+                token = next_token()
+                if token is None:
+                    break
+                if _is_stop(token, _COMPOSITION_STOP) or (
+                        token.kind != BULLET and not token.text.startswith('Основ')
+                        and len(token.text) > MAX_COMPOSITION_LINE):
+                    pending.append(token)
+                    break
+                composition_lines.append(token.text)
+            if composition_lines:
+                dish['composition'] = '\n'.join(composition_lines)
+            continue
+
+        if header == 'Аллергены' or 'аллергены' in line.lower():
+            allergen_text = _after_colon(line)
+            if allergen_text:
+                dish['allergens'] = allergen_text
+            section = 'allergens'
+            allergen_lines = []
+            while True:
+                token = next_token()
+                if token is None:
+                    break
+                if _is_stop(token, _ALLERGENS_STOP):
+                    pending.append(token)
+                    break
+                text = token.text
+                if token.kind == BULLET or 'аллерген' in text.lower():
+                    allergen_lines.append(text.replace('*', '').strip())
+                elif len(text) < MAX_ALLERGEN_LINE:
+                    allergen_lines.append(text)
+            if allergen_lines and not dish['allergens']:
+                dish['allergens'] = ' '.join(allergen_lines)
+            continue
+
+        # Продолжение описания
+        if section == 'description' and kind != BULLET:
+            if not dish['description']:
+                dish['description'] = line
+            elif len(line) >= MIN_DESCRIPTION_CONTINUATION:
+                dish['description'] += ' ' + line
+
+    if dish is not None:
+        yield dish
+
+
+def iter_dishes(lines):
+    """Записи о блюдах из потока строк техкарты"""
+    return parse_tokens(tokenize(lines))
+
+
+def iter_dishes_from_file(txt_path):
+    """Записи о блюдах из файла техкарты; файл читается построчно"""
+    with open(txt_path, 'r', encoding='utf-8') as f:
+        yield from iter_dishes(f)
@@ -3,171 +3,100 @@
 """
 Скрипт для извлечения описаний блюд из HTML файла в архиве
 и обновления menu.json
+
+HTML читается из архива потоком и разбирается по событиям
+(см. html_menu_parser.py), без загрузки документа в память целиком.
+По обновленным текстам блюдам пересчитываются маски аллергенов и
+ингредиентов (см. menu_tags.py).
 """
 
-import json
-import re
-import html
 import zipfile
+import argparse
 import sys
 from pathlib import Path
 
-def normalize_name(name):
-    """Нормализует имя блюда для сравнения"""
-    name = re.sub(r'\s+', ' ', name.strip().lower())
-    name = re.sub(r'[^\w\s]', '', name)
-    return name
+from html_menu_parser import READ_CHUNK_SIZE, iter_dishes, iter_text_chunks
+from data_io import DEFAULT_FORMAT, add_format_argument
+from instrumentation import add_profile_arguments, count, start_run, timer
+from menu_core import MenuIndex, normalize_name
+from menu_io import format_size_change, load_menu, save_menu
+from menu_tags import tag_menu
 
-def extract_dish_info_from_html(html_content):
-    """Извлекает информацию о блюдах из HTML"""
-    # Декодируем HTML-entities
-    decoded = html.unescape(html_content)
-    
+HTML_MEMBER = "SapiensKitchen.html"
+
+def collect_dishes(records):
+    """Собирает записи потокового разбора в map нормализованное имя -> запись"""
     dishes = {}
-    
-    # Находим все заголовки h4 (названия блюд)
-    h4_pattern = r'<h4[^>]*id="[^"]*"[^>]*><span[^>]*>(.*?)</span></h4>'
-    h4_matches = list(re.finditer(h4_pattern, decoded, re.DOTALL))
-    
-    print(f"Найдено заголовков блюд: {len(h4_matches)}")
-    
-    # Извлекаем информацию о каждом блюде
-    for i, match in enumerate(h4_matches):
-        start = match.end()
-        # Определяем конец блока (следующий h4 или ограничение)
-        if i + 1 < len(h4_matches):
-            end = h4_matches[i+1].start()
-        else:
-            end = min(start + 10000, len(decoded))
-        
-        block = decoded[start:end]
-        
-        # Очищаем название от HTML тегов
-        name_raw = match.group(1)
-        name = re.sub(r'<[^>]+>', '', name_raw).strip()
-        name = re.sub(r'\s+', ' ', name)
-        
-        # Пропускаем, если это не название блюда (ссылки, разделители и т.д.)
-        if not name or len(name) < 5 or name.startswith('http') or '#' in name:
-            continue
-        
-        normalized_name = normalize_name(name)
-        
-        # Извлекаем параграфы с описанием
-        p_matches = re.findall(r'<p[^>]*><span[^>]*>(.*?)</span></p>', block, re.DOTALL)
-        
-        description_parts = []
-        composition_parts = []
-        allergens_parts = []
-        
-        current_section = None
-        
-        for p in p_matches:
-            text = re.sub(r'<[^>]+>', '', p).strip()
-            text = re.sub(r'\s+', ' ', text)
-            
-            if not text or len(text) < 5:
-                continue
-            
-            text_lower = text.lower()
-            
-            # Определяем тип информации
-            if 'тайминг' in text_lower or 'подача:' in text_lower or 'приборы:' in text_lower:
-                continue
-            elif text_lower.startswith('описание') or text_lower.startswith('описание:'):
-                current_section = 'description'
-                desc_text = text.split(':', 1)[-1].strip() if ':' in text else ''
-                if desc_text:
-                    description_parts.append(desc_text)
-            elif text_lower.startswith('состав') or text_lower.startswith('состав:'):
-                current_section = 'composition'
-                comp_text = text.split(':', 1)[-1].strip() if ':' in text else ''
-                if comp_text:
-                    composition_parts.append(comp_text)
-            elif text_lower.startswith('аллергены') or text_lower.startswith('аллерген'):
-                current_section = 'allergens'
-                all_text = text.split(':', 1)[-1].strip() if ':' in text else ''
-                if all_text:
-                    allergens_parts.append(all_text)
-            elif current_section == 'description' and not text_lower.startswith('состав'):
-                description_parts.append(text)
-            elif current_section == 'composition' or '*' in text or ('начинка' in text_lower or 'тесто' in text_lower):
-                composition_parts.append(text)
-            elif current_section == 'allergens' or 'аллерген' in text_lower:
-                allergens_parts.append(text)
-            elif len(text) > 50 and not any(x in text_lower for x in ['тайминг', 'подача', 'приборы']):
-                # Если не определено, но текст длинный, считаем описанием
-                if not description_parts:
-                    description_parts.append(text)
-        
-        # Объединяем части
-        description = ' '.join(description_parts).strip() if description_parts else None
-        composition = '\n'.join(composition_parts).strip() if composition_parts else None
-        allergens = ' '.join(allergens_parts).strip() if allergens_parts else None
-        
-        if description or composition or allergens:
-            dishes[normalized_name] = {
-                'name': name,
-                'description': description,
-                'composition': composition,
-                'allergens': allergens
-            }
-    
+    for record in records:
+        dishes[normalize_name(record['name'])] = record
+    count('html.dishes', len(dishes))
     return dishes
 
-def update_menu_json(menu_json_path, dishes_data):
-    """Обновляет menu.json данными из HTML"""
-    with open(menu_json_path, 'r', encoding='utf-8') as f:
-        menu_data = json.load(f)
-    
+@timer('html.parse')
+def extract_dish_info_from_html(html_content):
+    """Извлекает информацию о блюдах из HTML-строки"""
+    chunks = (html_content[i:i + READ_CHUNK_SIZE] for i in range(0, len(html_content), READ_CHUNK_SIZE))
+    return collect_dishes(iter_dishes(chunks))
+
+@timer('html.parse')
+def extract_dish_info_from_zip(zip_path, member=HTML_MEMBER):
+    """Извлекает информацию о блюдах из HTML в архиве, не распаковывая его целиком"""
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        count('bytes_read', zip_ref.getinfo(member).compress_size)
+        with zip_ref.open(member) as html_file:
+            return collect_dishes(iter_dishes(iter_text_chunks(html_file)))
+
+@timer('html.apply')
+def apply_dishes(menu_data, dishes_data, index=None):
+    """Дополняет блюда меню данными из HTML (в памяти) и пересчитывает маски тегов
+
+    Возвращает (число обновленных блюд, число блюд с новыми масками тегов).
+    """
+    index = index or MenuIndex(menu_data)
     updated_count = 0
     
-    # Обновляем все элементы в all_items
-    if 'all_items' in menu_data:
-        for item in menu_data['all_items']:
-            item_name_normalized = normalize_name(item['name'])
+    # Ищем блюда меню по нормализованному названию (категории хранят только id)
+    for normalized_name, dish_info in dishes_data.items():
+        for item in index.find_normalized(normalized_name):
+            # Обновляем только если данных еще нет или они пустые
+            if dish_info.get('description') and not item.get('description'):
+                item['description'] = dish_info['description']
+                updated_count += 1
             
-            # Ищем совпадение в распарсенных данных
-            if item_name_normalized in dishes_data:
-                dish_info = dishes_data[item_name_normalized]
-                
-                # Обновляем только если данных еще нет или они пустые
-                if dish_info.get('description') and not item.get('description'):
-                    item['description'] = dish_info['description']
-                    updated_count += 1
-                
-                if dish_info.get('composition') and not item.get('composition'):
-                    item['composition'] = dish_info['composition']
-                
-                if dish_info.get('allergens') and not item.get('allergens'):
-                    item['allergens'] = dish_info['allergens']
+            if dish_info.get('composition') and not item.get('composition'):
+                item['composition'] = dish_info['composition']
+            
+            if dish_info.get('allergens') and not item.get('allergens'):
+                item['allergens'] = dish_info['allergens']
     
-    # Обновляем элементы в категориях
-    if 'menu' in menu_data and 'categories' in menu_data['menu']:
-        for category in menu_data['menu']['categories']:
-            for item in category.get('items', []):
-                item_name_normalized = normalize_name(item['name'])
-                
-                if item_name_normalized in dishes_data:
-                    dish_info = dishes_data[item_name_normalized]
-                    
-                    if dish_info.get('description') and not item.get('description'):
-                        item['description'] = dish_info['description']
-                    
-                    if dish_info.get('composition') and not item.get('composition'):
-                        item['composition'] = dish_info['composition']
-                    
-                    if dish_info.get('allergens') and not item.get('allergens'):
-                        item['allergens'] = dish_info['allergens']
+    # Маски аллергенов и ингредиентов по новым текстам; если тексты те же,
+    # а маски изменились (меню собрано до появления тегов), это тоже изменение
+    retagged = tag_menu(menu_data)
+    return updated_count, retagged
+
+def update_menu_json(menu_json_path, dishes_data, format=DEFAULT_FORMAT):
+    """Обновляет menu.json данными из HTML"""
+    menu_data = load_menu(menu_json_path)
+    updated_count, retagged = apply_dishes(menu_data, dishes_data)
     
     # Сохраняем обновленный menu.json
-    with open(menu_json_path, 'w', encoding='utf-8') as f:
-        json.dump(menu_data, f, ensure_ascii=False, indent=2)
+    sizes = save_menu(menu_json_path, menu_data, format=format)
+    print(f"menu.json сохранен: {format_size_change(*sizes)}")
     
     print(f"Обновлено {updated_count} блюд с описаниями")
+    print(f"Маски тегов изменились у {retagged} блюд")
     return updated_count
 
+def parse_args():
+    """Разбирает аргументы командной строки"""
+    parser = argparse.ArgumentParser(description='Обновление menu.json описаниями из HTML-экспорта')
+    add_format_argument(parser)
+    add_profile_arguments(parser)
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    start_run(args)
     script_dir = Path(__file__).parent
     project_root = script_dir.parent
     
@@ -182,16 +111,12 @@ def main():
         print(f"Ошибка: файл {menu_json} не найден")
         sys.exit(1)
     
-    print("Извлечение HTML из архива...")
-    with zipfile.ZipFile(zip_file, 'r') as zip_ref:
-        html_content = zip_ref.read("SapiensKitchen.html").decode('utf-8')
-    
-    print("Парсинг HTML файла...")
-    dishes = extract_dish_info_from_html(html_content)
+    print("Парсинг HTML файла из архива...")
+    dishes = extract_dish_info_from_zip(zip_file)
     print(f"Найдено {len(dishes)} блюд с описаниями в HTML")
     
     print("Обновление menu.json...")
-    updated = update_menu_json(menu_json, dishes)
+    updated = update_menu_json(menu_json, dishes, format=args.format)
     
     print(f"Готово! Обновлено {updated} блюд")
 
@@ -2,25 +2,43 @@
 # -*- coding: utf-8 -*-
 """
 Скрипт для извлечения цен из PDF меню и обновления menu.json
+
+Цены читаются из текстового слоя PDF (pdf_text.py): страницы разбираются
+параллельно и кешируются по хешу их потоков. Если текста в PDF нет
+(например, шрифты переведены в кривые при сжатии), используется
+встроенный список цен с предупреждением в stderr - если он не отключен
+(fallback=False в load_prices, как в пакетной сборке заведений без
+"builtin_prices").
+
+В PDF_FILE текст переведен в кривые: из него извлекается 0 строк, и цены
+для него берутся из встроенного списка.
 """
 
-import json
+import argparse
 import re
 import sys
 from pathlib import Path
 
-def normalize_name(name):
-    """Нормализует имя блюда для сравнения"""
-    # Убираем лишние пробелы, приводим к нижнему регистру
-    name = re.sub(r'\s+', ' ', name.strip().lower())
-    # Убираем специальные символы и пунктуацию для лучшего сопоставления
-    name = re.sub(r'[^\w\s]', '', name)
-    # Заменяем ё на е для лучшего сопоставления
-    name = name.replace('ё', 'е')
-    return name
+from data_io import DEFAULT_FORMAT, add_format_argument
+from instrumentation import add_profile_arguments, count, start_run, timer
+from menu_core import normalize_name
+from menu_io import format_size_change, load_menu, save_menu
+from pdf_text import CACHE_FILE_NAME, PdfError, extract_pdf_lines
+from price_index import PriceIndex
+
+PROJECT_ROOT = Path(__file__).parent.parent
+PDF_FILE = PROJECT_ROOT / 'SAPIENS_MENU_FOODBreakfast_18112025_COLOR-3-7_compressed.pdf'
+
+
+class NoPricesError(Exception):
+    """В PDF нет цен, а встроенный список отключен"""
+
 
 def extract_prices_from_pdf_content():
-    """Извлекает цены из содержимого PDF (данные из веб-поиска)"""
+    """Встроенный список цен (данные из веб-поиска)
+
+    Используется, если в PDF нет текстового слоя.
+    """
     
     # Данные из PDF (из веб-поиска)
     pdf_content = """
@@ -99,10 +117,12 @@ Stefan salad / 250 г / 500 г ..... 1100 / 2200
 Сорбет / 50 г ..... 300
 """
     
+    return parse_price_lines(pdf_content.strip().split('\n'))
+
+def parse_price_lines(lines):
+    """Разбирает строки вида "название / вес ..... цена" в prices_map"""
     prices_map = {}
     
-    lines = pdf_content.strip().split('\n')
-    
     for line in lines:
         line = line.strip()
         if not line:
@@ -138,105 +158,103 @@ Stefan salad / 250 г / 500 г ..... 1100 / 2200
     
     return prices_map
 
-def update_menu_json(menu_json_path, prices_data):
-    """Обновляет menu.json ценами из PDF"""
-    with open(menu_json_path, 'r', encoding='utf-8') as f:
-        menu_data = json.load(f)
-    
+@timer('prices.apply')
+def apply_prices(menu_data, prices_data):
+    """Проставляет цены блюдам меню (в памяти); возвращает число обновленных"""
     updated_count = 0
     
-    # Обновляем все элементы в all_items
-    if 'all_items' in menu_data:
-        for item in menu_data['all_items']:
-            item_name_normalized = normalize_name(item['name'])
-            
-            # Пробуем точное совпадение
-            if item_name_normalized in prices_data:
-                price_info = prices_data[item_name_normalized]
-                if not item.get('price'):
-                    item['price'] = price_info['price']
-                    updated_count += 1
-                continue
-            
-            # Пробуем частичное совпадение (если название содержит ключевые слова)
-            best_match = None
-            best_score = 0
-            
-            # Специальные случаи для лучшего сопоставления
-            item_name_clean = item['name'].lower()
-            
-            for price_name_norm, price_info in prices_data.items():
-                price_name_clean = price_info['name'].lower()
-                
-                # Проверяем точное вхождение ключевых слов
-                item_words = set(item_name_normalized.split())
-                price_words = set(price_name_norm.split())
-                
-                # Если название начинается одинаково - высокий приоритет
-                if item_name_clean.startswith(price_name_clean[:15]) or price_name_clean.startswith(item_name_clean[:15]):
-                    if not item.get('price'):
-                        item['price'] = price_info['price']
-                        updated_count += 1
-                        continue
-                
-                # Ищем совпадение ключевых слов
-                common_words = item_words & price_words
-                # Снижаем требование до 2 слов для лучшего сопоставления
-                if len(common_words) >= 2 and len(common_words) > best_score:
-                    best_score = len(common_words)
-                    best_match = price_info
-            
-            if best_match and not item.get('price'):
-                item['price'] = best_match['price']
-                updated_count += 1
+    # Индекс строится один раз; блюда с ценой не трогаем
+    price_index = PriceIndex(prices_data)
+    for item in menu_data['all_items']:
+        if item.get('price'):
+            continue
+        price_info, _ = price_index.match(item['name'], normalize_name(item['name']))
+        if price_info is not None:
+            item['price'] = price_info['price']
+            updated_count += 1
     
-    # Обновляем элементы в категориях
-    if 'menu' in menu_data and 'categories' in menu_data['menu']:
-        for category in menu_data['menu']['categories']:
-            for item in category.get('items', []):
-                item_name_normalized = normalize_name(item['name'])
-                
-                if item_name_normalized in prices_data:
-                    price_info = prices_data[item_name_normalized]
-                    if not item.get('price'):
-                        item['price'] = price_info['price']
-                else:
-                    # Частичное совпадение
-                    best_match = None
-                    best_score = 0
-                    
-                    for price_name_norm, price_info in prices_data.items():
-                        item_words = set(item_name_normalized.split())
-                        price_words = set(price_name_norm.split())
-                        
-                        common_words = item_words & price_words
-                        if len(common_words) >= 3 and len(common_words) > best_score:
-                            best_score = len(common_words)
-                            best_match = price_info
-                    
-                    if best_match and not item.get('price'):
-                        item['price'] = best_match['price']
+    return updated_count
+
+def update_menu_json(menu_json_path, prices_data, format=DEFAULT_FORMAT):
+    """Обновляет menu.json ценами из PDF"""
+    menu_data = load_menu(menu_json_path)
+    updated_count = apply_prices(menu_data, prices_data)
     
     # Сохраняем обновленный menu.json
-    with open(menu_json_path, 'w', encoding='utf-8') as f:
-        json.dump(menu_data, f, ensure_ascii=False, indent=2)
+    sizes = save_menu(menu_json_path, menu_data, format=format)
+    print(f"menu.json сохранен: {format_size_change(*sizes)}")
     
     print(f"Обновлено {updated_count} блюд с ценами")
     return updated_count
 
-def main():
-    script_dir = Path(__file__).parent
-    project_root = script_dir.parent
+def extract_prices_from_pdf(pdf_path, jobs=None, cache_path=None):
+    """Извлекает цены из текстового слоя PDF
+
+    Возвращает prices_map или None, если текста (или строк с ценами) в PDF нет.
+    """
+    pages, stats = extract_pdf_lines(pdf_path, jobs=jobs, cache_path=cache_path)
+    print(f"  Страниц: {stats['pages']}, разобрано: {stats['parsed']}, из кеша: {stats['cached']}")
+    for error in stats['errors']:
+        print(f"  ✗ Ошибка: {error}")
+    
+    lines = [line for page in pages for line in page]
+    count('prices.pdf_lines', len(lines))
+    if not lines:
+        return None
+    return parse_price_lines(lines) or None
+
+@timer('prices.load')
+def load_prices(pdf_path, jobs=None, cache_path=None, fallback=True):
+    """Цены из PDF, а если в нем нет текста (или его нет вовсе) - встроенный список
+
+    Встроенный список - цены одного заведения; с fallback=False вместо
+    него выбрасывается NoPricesError.
+    """
+    prices = None
+    if pdf_path.exists():
+        print(f"Извлечение цен из {pdf_path.name}...")
+        try:
+            prices = extract_prices_from_pdf(pdf_path, jobs=jobs, cache_path=cache_path)
+        except PdfError as e:
+            print(f"  ✗ Не удалось разобрать PDF: {e}")
+        problem = "  ⚠ В PDF нет текстового слоя (текст в кривых)"
+    else:
+        problem = f"⚠ Файл {pdf_path} не найден"
     
-    menu_json = project_root / 'menu.json'
+    if prices is None:
+        if not fallback:
+            raise NoPricesError(f"нет цен в {pdf_path.name}, встроенный список цен отключен")
+        # Встроенный список может не совпадать с текущим меню - предупреждаем в stderr
+        count('prices.builtin_fallback')
+        print(f"{problem}, используется встроенный список цен", file=sys.stderr)
+        print("  ⚠ Цены НЕ из PDF: проверьте их или отключите встроенный список", file=sys.stderr)
+        prices = extract_prices_from_pdf_content()
+    return prices
+
+def parse_args():
+    """Разбирает аргументы командной строки"""
+    parser = argparse.ArgumentParser(description='Обновление цен в menu.json из PDF меню')
+    parser.add_argument('--pdf', type=Path, default=PDF_FILE, help='PDF с меню')
+    parser.add_argument('--menu', type=Path, default=PROJECT_ROOT / 'menu.json', help='путь к menu.json')
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help='число процессов для разбора страниц (0 - по числу ядер)')
+    parser.add_argument('--no-cache', action='store_true', help='не использовать кеш страниц')
+    add_format_argument(parser)
+    add_profile_arguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    start_run(args)
+    menu_json = args.menu
     
     if not menu_json.exists():
         print(f"Ошибка: файл {menu_json} не найден")
         sys.exit(1)
     
-    print("Извлечение цен из PDF...")
-    prices = extract_prices_from_pdf_content()
-    print(f"Найдено {len(prices)} цен в PDF")
+    prices = load_prices(args.pdf, jobs=args.jobs or None,
+                         cache_path=None if args.no_cache else PROJECT_ROOT / CACHE_FILE_NAME)
+    print(f"Найдено {len(prices)} цен")
     
     # Показываем несколько примеров
     print("\nПримеры цен:")
@@ -244,7 +262,7 @@ def main():
         print(f"  - {info['name']}: {info['price']} ₽")
     
     print("\nОбновление menu.json...")
-    updated = update_menu_json(menu_json, prices)
+    updated = update_menu_json(menu_json, prices, format=args.format)
     
     print(f"Готово! Обновлено {updated} блюд с ценами")
 
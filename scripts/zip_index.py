@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Индекс центрального каталога ZIP архива.
+
+Находит запись End Of Central Directory (включая ZIP64), отображает файл
+в память и разбирает каждую запись центрального каталога ровно один раз.
+Результат - таблица с сырыми байтами имен, флагом UTF-8 (бит 11),
+смещениями и размерами, по которой скрипты ищут файлы без повторного
+сканирования архива.
+"""
+
+import mmap
+import os
+import struct
+import time
+from collections import namedtuple
+
+from atomic_io import atomic_open
+from instrumentation import add_time, count, timer
+
+# Сигнатуры и форматы структур ZIP (см. APPNOTE.TXT)
+EOCD_SIGNATURE = b'PK\x05\x06'
+EOCD_STRUCT = struct.Struct('<4s4H2LH')
+ZIP64_LOCATOR_SIGNATURE = b'PK\x06\x07'
+ZIP64_LOCATOR_STRUCT = struct.Struct('<4sLQL')
+ZIP64_EOCD_SIGNATURE = b'PK\x06\x06'
+ZIP64_EOCD_STRUCT = struct.Struct('<4sQ2H2L4Q')
+CENTRAL_DIR_SIGNATURE = b'PK\x01\x02'
+CENTRAL_DIR_STRUCT = struct.Struct('<4s4B4HL2L5H2L')
+
+# Максимальная длина комментария архива + размер EOCD
+MAX_EOCD_SEARCH = 0xFFFF + EOCD_STRUCT.size
+
+FLAG_UTF8 = 0x800
+ZIP64_EXTRA_ID = 0x0001
+
+# Размер блока при потоковой распаковке файлов из архива
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+ZipEntry = namedtuple('ZipEntry', [
+    'raw_name',        # сырые байты имени из центрального каталога
+    'name',            # имя так, как его возвращает zipfile (cp437 или utf-8)
+    'fixed_name',      # имя в правильной кодировке (cp866 или utf-8)
+    'utf8',            # установлен ли бит 11 (имя в UTF-8)
+    'flags',
+    'compress_type',
+    'crc',
+    'compress_size',
+    'file_size',
+    'header_offset',   # смещение локального заголовка от начала файла
+])
+
+
+class ZipIndexError(Exception):
+    """Архив поврежден или не является ZIP файлом"""
+
+
+def _find_central_directory(mm):
+    """Возвращает (смещение каталога, размер каталога, число записей, сдвиг начала архива)"""
+    size = len(mm)
+    eocd_pos = mm.rfind(EOCD_SIGNATURE, max(0, size - MAX_EOCD_SEARCH))
+    if eocd_pos == -1 or eocd_pos + EOCD_STRUCT.size > size:
+        raise ZipIndexError('Не найдена запись End Of Central Directory')
+
+    (_, _, _, _, total_entries, cd_size,
+     cd_offset, _) = EOCD_STRUCT.unpack_from(mm, eocd_pos)
+    cd_end = eocd_pos
+
+    # ZIP64: локатор располагается непосредственно перед EOCD
+    locator_pos = eocd_pos - ZIP64_LOCATOR_STRUCT.size
+    if locator_pos >= 0 and mm[locator_pos:locator_pos + 4] == ZIP64_LOCATOR_SIGNATURE:
+        _, _, zip64_eocd_offset, _ = ZIP64_LOCATOR_STRUCT.unpack_from(mm, locator_pos)
+        zip64_pos = locator_pos - ZIP64_EOCD_STRUCT.size
+        if zip64_pos < 0 or mm[zip64_pos:zip64_pos + 4] != ZIP64_EOCD_SIGNATURE:
+            raise ZipIndexError('Повреждена запись ZIP64 End Of Central Directory')
+        (_, _, _, _, _, _, _, total_entries,
+         cd_size, cd_offset) = ZIP64_EOCD_STRUCT.unpack_from(mm, zip64_pos)
+        cd_end = zip64_pos
+
+    # Данные могут быть дописаны перед архивом (например, самораспаковщик)
+    concat = cd_end - cd_size - cd_offset
+    if concat < 0:
+        raise ZipIndexError('Некорректное смещение центрального каталога')
+    return cd_offset + concat, cd_size, total_entries, concat
+
+
+def _parse_zip64_extra(extra, file_size, compress_size, header_offset):
+    """Подставляет 64-битные размеры и смещение из extra-поля ZIP64"""
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, data_size = struct.unpack_from('<HH', extra, pos)
+        pos += 4
+        if header_id == ZIP64_EXTRA_ID:
+            values = extra[pos:pos + data_size]
+            idx = 0
+            if file_size == 0xFFFFFFFF:
+                file_size = struct.unpack_from('<Q', values, idx)[0]
+                idx += 8
+            if compress_size == 0xFFFFFFFF:
+                compress_size = struct.unpack_from('<Q', values, idx)[0]
+                idx += 8
+            if header_offset == 0xFFFFFFFF:
+                header_offset = struct.unpack_from('<Q', values, idx)[0]
+            break
+        pos += data_size
+    return file_size, compress_size, header_offset
+
+
+def _decode_names(raw_name, flags):
+    """Декодирует имя как zipfile и в правильной кодировке"""
+    if flags & FLAG_UTF8:
+        name = raw_name.decode('utf-8', errors='replace')
+        fixed_name = name
+    else:
+        name = raw_name.decode('cp437')
+        # Русские имена в архивах из Windows записаны в cp866
+        fixed_name = raw_name.decode('cp866', errors='ignore')
+    # zipfile обрезает имя на нулевом байте
+    null_byte = name.find('\x00')
+    if null_byte >= 0:
+        name = name[:null_byte]
+    return name, fixed_name
+
+
+class ZipIndex:
+    """Таблица записей центрального каталога ZIP архива"""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.by_name = {entry.name: entry for entry in entries}
+        self.by_raw_name = {entry.raw_name: entry for entry in entries}
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.by_name
+
+    def get(self, name, default=None):
+        """Ищет запись по имени в том виде, как его возвращает zipfile"""
+        return self.by_name.get(name, default)
+
+    def fixed_name(self, name):
+        """Возвращает имя в правильной кодировке (или исходное, если записи нет)"""
+        entry = self.by_name.get(name)
+        return entry.fixed_name if entry else name
+
+    def filename_map(self):
+        """Маппинг имени zipfile -> правильное имя для записей, где они различаются"""
+        return {
+            entry.name: entry.fixed_name
+            for entry in self.entries
+            if entry.name != entry.fixed_name
+        }
+
+
+@timer('zip.index')
+def read_zip_index(zip_path):
+    """Строит индекс центрального каталога за один проход по нему"""
+    entries = []
+    with open(zip_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ZipIndexError(f'Пустой файл: {zip_path}')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            cd_start, cd_size, total_entries, concat = _find_central_directory(mm)
+            pos = cd_start
+            cd_end = cd_start + cd_size
+            header_size = CENTRAL_DIR_STRUCT.size
+
+            while pos + header_size <= cd_end:
+                (signature, _, _, _, _, flags, compress_type, _, _, crc,
+                 compress_size, file_size, name_len, extra_len, comment_len,
+                 _, _, _, header_offset) = CENTRAL_DIR_STRUCT.unpack_from(mm, pos)
+                if signature != CENTRAL_DIR_SIGNATURE:
+                    raise ZipIndexError(f'Неверная сигнатура записи каталога по смещению {pos}')
+
+                name_start = pos + header_size
+                raw_name = mm[name_start:name_start + name_len]
+                if 0xFFFFFFFF in (file_size, compress_size, header_offset):
+                    extra = mm[name_start + name_len:name_start + name_len + extra_len]
+                    file_size, compress_size, header_offset = _parse_zip64_extra(
+                        extra, file_size, compress_size, header_offset)
+
+                name, fixed_name = _decode_names(raw_name, flags)
+                entries.append(ZipEntry(
+                    raw_name=raw_name,
+                    name=name,
+                    fixed_name=fixed_name,
+                    utf8=bool(flags & FLAG_UTF8),
+                    flags=flags,
+                    compress_type=compress_type,
+                    crc=crc,
+                    compress_size=compress_size,
+                    file_size=file_size,
+                    header_offset=header_offset + concat,
+                ))
+                pos = name_start + name_len + extra_len + comment_len
+
+    if len(entries) != total_entries:
+        raise ZipIndexError(
+            f'Ожидалось {total_entries} записей каталога, прочитано {len(entries)}')
+    count('zip.index_entries', len(entries))
+    count('bytes_read', cd_size)
+    return ZipIndex(entries)
+
+
+_index_cache = {}
+
+
+def cached_zip_index(zip_path):
+    """Возвращает индекс архива, перестраивая его только при изменении файла"""
+    stat = os.stat(zip_path)
+    key = str(zip_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _index_cache.get(key)
+    if cached is None or cached[0] != signature:
+        cached = (signature, read_zip_index(zip_path))
+        _index_cache[key] = cached
+    return cached[1]
+
+
+def stream_member(zip_ref, member, target_path, chunk_size=STREAM_CHUNK_SIZE, digest=None):
+    """Распаковывает файл из архива блоками сразу в target_path (атомарно)
+
+    Возвращает число записанных байт. Если передан digest (объект hashlib),
+    в него добавляются распакованные данные. Время распаковки и записи
+    учитывается раздельно (zip.decompress и zip.write).
+    """
+    written = 0
+    decompress_time = write_time = 0.0
+    clock = time.perf_counter
+    with zip_ref.open(member) as src, atomic_open(target_path, 'wb') as dst:
+        while True:
+            start = clock()
+            chunk = src.read(chunk_size)
+            decompress_time += clock() - start
+            if not chunk:
+                break
+            if digest is not None:
+                digest.update(chunk)
+            start = clock()
+            dst.write(chunk)
+            write_time += clock() - start
+            written += len(chunk)
+    add_time('zip.decompress', decompress_time)
+    add_time('zip.write', write_time)
+    count('zip.members')
+    count('zip.bytes_decompressed', written)
+    count('bytes_read', zip_ref.getinfo(member).compress_size)
+    return written
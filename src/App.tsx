@@ -1,25 +1,24 @@
-import React, { useState, useMemo } from 'react';
+import React, { useState, useMemo, useEffect } from 'react';
 import { AnimatePresence } from 'motion/react';
 import { MenuHeader } from './components/MenuHeader';
 import { CategoryTabs } from './components/CategoryTabs';
 import { MenuGrid } from './components/MenuGrid';
-import { MenuItem } from './components/types';
+import { Category, MenuIndex, MenuItem, MenuItemDetails } from './components/types';
 import { BottomNav } from './components/BottomNav';
 import { Recommendations } from './components/Recommendations';
 import { AIWaiter } from './components/AIWaiter';
 import { MenuDetailModal } from './components/MenuDetailModal';
 import { LoadingScreen } from './components/LoadingScreen';
-import menuData from '../menu.json';
+import { loadCategoryDetails, loadMenuIndex, mergeMenuDetails } from './utils/menuData';
 
-// Преобразуем данные из menu.json в формат MenuItem[]
-const menuItems: MenuItem[] = menuData.all_items || [];
-
-// Получаем список категорий из данных меню
-const categories = menuData.menu?.categories?.map(cat => ({
-  id: cat.name.toLowerCase().replace(/\s+/g, '-'),
-  name: cat.name,
-  icon: getCategoryIcon(cat.name)
-})) || [];
+// Получаем список категорий из индекса меню
+function getCategories(menuIndex: MenuIndex | null): Category[] {
+  return menuIndex?.categories.map(cat => ({
+    id: cat.name.toLowerCase().replace(/\s+/g, '-'),
+    name: cat.name,
+    icon: getCategoryIcon(cat.name)
+  })) || [];
+}
 
 function getCategoryIcon(categoryName: string): string {
   const lowerName = categoryName.toLowerCase();
@@ -38,6 +37,41 @@ export default function App() {
   const [selectedCategory, setSelectedCategory] = useState<string>('all');
   const [activeTab, setActiveTab] = useState<'recommendations' | 'menu' | 'ai'>('menu');
   const [selectedItem, setSelectedItem] = useState<MenuItem | null>(null);
+  const [menuIndex, setMenuIndex] = useState<MenuIndex | null>(null);
+  const [details, setDetails] = useState<Record<string, Partial<MenuItemDetails>>>({});
+
+  // Индекс меню (названия, цены, изображения) грузится при старте
+  useEffect(() => {
+    loadMenuIndex()
+      .then(setMenuIndex)
+      .catch(error => console.error('Ошибка загрузки меню:', error));
+  }, []);
+
+  const categories = useMemo(() => getCategories(menuIndex), [menuIndex]);
+
+  // Описания загружаем только для открытой категории ('all' - для всех)
+  // и для категории блюда, открытого в карточке
+  useEffect(() => {
+    if (!menuIndex) return;
+    const categoryName = categories.find(cat => cat.id === selectedCategory)?.name;
+    menuIndex.categories
+      .filter(cat => !categoryName || cat.name === categoryName || cat.name === selectedItem?.category)
+      .forEach(cat => {
+        loadCategoryDetails(cat)
+          .then(shard => setDetails(prev => ({ ...prev, ...shard })))
+          .catch(error => console.error('Ошибка загрузки описаний:', error));
+      });
+  }, [menuIndex, categories, selectedCategory, selectedItem?.category]);
+
+  const menuItems = useMemo(
+    () => mergeMenuDetails(menuIndex?.items || [], details),
+    [menuIndex, details]
+  );
+
+  // Карточка блюда получает описание, как только загрузится его шард
+  const selectedMenuItem = selectedItem
+    ? menuItems.find(item => item.id === selectedItem.id) || selectedItem
+    : null;
 
   const filteredItems = useMemo(() => {
     if (selectedCategory === 'all') {
@@ -46,7 +80,7 @@ export default function App() {
     const categoryName = categories.find(cat => cat.id === selectedCategory)?.name;
     if (!categoryName) return menuItems;
     return menuItems.filter(item => item.category === categoryName);
-  }, [selectedCategory]);
+  }, [menuItems, categories, selectedCategory]);
 
   return (
     <>
@@ -73,14 +107,14 @@ export default function App() {
 
           {activeTab === 'recommendations' && <Recommendations menuItems={menuItems} onItemClick={setSelectedItem} />}
           
-          {activeTab === 'ai' && <AIWaiter menuItems={menuItems} onItemClick={setSelectedItem} />}
+          {activeTab === 'ai' && <AIWaiter menuItems={menuItems} menuIndex={menuIndex} onItemClick={setSelectedItem} />}
 
           <BottomNav activeTab={activeTab} onTabChange={setActiveTab} />
           
       <AnimatePresence>
-        {selectedItem && (
+        {selectedMenuItem && (
           <MenuDetailModal 
-            item={selectedItem}
+            item={selectedMenuItem}
             menuItems={menuItems}
             onClose={() => setSelectedItem(null)}
             onItemClick={setSelectedItem}
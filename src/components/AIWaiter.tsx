@@ -1,8 +1,9 @@
 import { motion, AnimatePresence } from 'motion/react';
 import { useState, useRef, useEffect, useMemo } from 'react';
 import { Send, Bot, User } from 'lucide-react';
-import { MenuItem } from './types';
+import { MenuIndex, MenuItem } from './types';
 import { ImageWithFallback } from './figma/ImageWithFallback';
+import { loadSearchIndex } from '../utils/menuData';
 
 interface Message {
   id: string;
@@ -14,6 +15,7 @@ interface Message {
 
 interface AIWaiterProps {
   menuItems: MenuItem[];
+  menuIndex?: MenuIndex | null; // Для поиска блюд по запросу гостя
   onItemClick: (item: MenuItem) => void;
 }
 
@@ -33,7 +35,7 @@ const getWebhookUrl = () => {
 
 const WEBHOOK_URL = getWebhookUrl();
 
-export function AIWaiter({ menuItems, onItemClick }: AIWaiterProps) {
+export function AIWaiter({ menuItems, menuIndex, onItemClick }: AIWaiterProps) {
   const [messages, setMessages] = useState<Message[]>([
     {
       id: '1',
@@ -134,6 +136,20 @@ export function AIWaiter({ menuItems, onItemClick }: AIWaiterProps) {
           }
         });
 
+        // Ответ не называет блюд - подбираем их по запросу гостя
+        if (suggestedItems.length === 0 && menuIndex) {
+          try {
+            const searchIndex = await loadSearchIndex(menuIndex);
+            const itemsById = new Map(menuItems.map(item => [item.id, item]));
+            searchIndex?.search(currentInput, 4).forEach(id => {
+              const item = itemsById.get(id);
+              if (item) suggestedItems.push(item);
+            });
+          } catch (error) {
+            console.error('Ошибка поиска по меню:', error);
+          }
+        }
+
         const aiMessage: Message = {
           id: (Date.now() + 1).toString(),
           text: responseText,
@@ -3,6 +3,10 @@ import { motion } from 'motion/react';
 import { MenuItem } from './types';
 import { ImageWithFallback } from './figma/ImageWithFallback';
 import { cleanText } from '../utils/textUtils';
+import { getMenuImageSources } from '../utils/imageUtils';
+
+// Ширина карточки: 1 колонка на телефоне, 2 на планшете, 3 на десктопе (max-w-6xl)
+const CARD_IMAGE_SIZES = '(min-width: 1024px) 384px, (min-width: 640px) 50vw, 100vw';
 
 interface MenuCardProps {
   item: MenuItem;
@@ -24,13 +28,30 @@ export function MenuCard({ item, imageUrl, onClick }: MenuCardProps) {
     >
       {/* Image Container */}
       <div className="relative h-64 overflow-hidden bg-gradient-to-br from-[#212529]/5 to-[#eeecdd]">
+        {/* Размытая заглушка видна, пока грузится полноразмерное фото */}
+        {imageUrl && item.placeholder && (
+          <div
+            className="absolute inset-0"
+            style={{
+              backgroundImage: `url(${item.placeholder})`,
+              backgroundSize: 'cover',
+              backgroundPosition: 'center',
+              filter: 'blur(16px)',
+              transform: 'scale(1.1)'
+            }}
+            aria-hidden="true"
+          />
+        )}
         {imageUrl ? (
           <motion.div
+            className="relative"
             animate={{ scale: isHovered ? 1.1 : 1 }}
             transition={{ duration: 0.4 }}
           >
             <ImageWithFallback
               src={imageUrl}
+              sources={getMenuImageSources(item.image_variants)}
+              sizes={CARD_IMAGE_SIZES}
               alt={item.name}
               className="w-full h-64 object-cover"
             />
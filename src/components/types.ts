@@ -8,6 +8,70 @@ export interface MenuItem {
   image_format?: string;
   composition?: string | null;
   allergens?: string | null;
+  image_variants?: ImageVariant[]; // Адаптивные версии изображения для srcset
+  placeholder?: string; // Крошечная миниатюра (data URI), пока грузится фото
+  allergen_mask?: number; // Бит i - i-й аллерген из MenuTags.allergens
+  ingredient_mask?: number; // Бит i - i-й ингредиент из MenuTags.ingredients
+}
+
+// Словари аллергенов и ингредиентов (scripts/menu_tags.py): позиция - номер бита в масках
+export interface MenuTag {
+  key: string; // 'nuts', 'fish', 'shrimp', ...
+  name: string; // Название для интерфейса: 'орехи', 'рыба', 'креветки', ...
+}
+
+export interface MenuTags {
+  allergens: MenuTag[];
+  ingredients: MenuTag[];
+}
+
+export interface ImageVariant {
+  width: number;
+  format: string; // 'webp' | 'jpg'
+  path: string;
+  bytes: number;
+}
+
+// Индекс меню для ленивой загрузки (public/menu-data/menu-index.json)
+export interface MenuIndexCategory {
+  name: string;
+  item_ids: number[];
+  count: number;
+  shard?: string; // Файл с описаниями блюд категории (имя содержит хеш)
+}
+
+export interface MenuIndex {
+  schema_version: number;
+  search?: string; // Файл поискового индекса (имя содержит хеш)
+  tags?: MenuTags | null; // Словари для масок аллергенов и ингредиентов
+  categories: MenuIndexCategory[];
+  items: MenuItem[]; // Без description, composition и allergens
+}
+
+// Шард категории с тяжелыми текстовыми полями
+export type MenuItemDetails = Pick<MenuItem, 'description' | 'composition' | 'allergens'>;
+
+export interface MenuShard {
+  category: string;
+  items: Record<string, Partial<MenuItemDetails>>;
+}
+
+// Поисковый индекс (scripts/search_index.py); списки документов хранятся разностями
+export interface SearchIndexData {
+  version: number;
+  analyzer: {
+    fields: string[];
+    min_token_length: number;
+    min_stem_length: number;
+    prefix_lengths: [number, number];
+    fuzzy_ratio: number;
+    endings: string[];
+    stop_words: string[];
+  };
+  docs: number[];
+  terms: Record<string, number[]>; // Номер документа << 1 | встречается в названии
+  prefixes: Record<string, number[]>;
+  trigrams: Record<string, number[]>;
 }
 
 export interface Category {
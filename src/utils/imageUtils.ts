@@ -2,6 +2,21 @@
  * Утилиты для работы с изображениями меню
  */
 
+import { ImageVariant } from '../components/types';
+
+/**
+ * Источник для элемента <picture>
+ */
+export interface ImageSource {
+  type: string;
+  srcSet: string;
+}
+
+const MIME_TYPES: Record<string, string> = {
+  webp: 'image/webp',
+  jpg: 'image/jpeg',
+};
+
 /**
  * Получает URL изображения из пути в menu.json
  * @param imagePath - путь из menu.json (например, "images/filename.jpg")
@@ -23,3 +38,30 @@ export function getMenuImageUrl(imagePath: string): string {
   return imagePath;
 }
 
+
+/**
+ * Строит srcset из адаптивных версий изображения заданного формата
+ * @param variants - image_variants из menu.json
+ * @param format - формат версий ('webp' или 'jpg')
+ * @returns строка srcset или пустая строка, если версий нет
+ */
+export function getMenuImageSrcSet(variants: ImageVariant[] | undefined, format: string): string {
+  if (!variants) return '';
+
+  return variants
+    .filter(variant => variant.format === format)
+    .sort((a, b) => a.width - b.width)
+    .map(variant => `${getMenuImageUrl(variant.path)} ${variant.width}w`)
+    .join(', ');
+}
+
+/**
+ * Получает источники для <picture>: WebP и JPEG как запасной вариант
+ * @param variants - image_variants из menu.json
+ * @returns список источников (пустой, если версий нет)
+ */
+export function getMenuImageSources(variants: ImageVariant[] | undefined): ImageSource[] {
+  return Object.keys(MIME_TYPES)
+    .map(format => ({ type: MIME_TYPES[format], srcSet: getMenuImageSrcSet(variants, format) }))
+    .filter(source => source.srcSet);
+}
@@ -0,0 +1,87 @@
+/**
+ * Ленивая загрузка меню: индекс при старте, описания - по категориям,
+ * поисковый индекс - при первом поиске
+ */
+
+import {
+  MenuIndex, MenuIndexCategory, MenuItem, MenuItemDetails, MenuShard, SearchIndexData
+} from '../components/types';
+import { SearchIndex } from './searchIndex';
+
+const baseUrl = (import.meta as any).env?.BASE_URL || '/sapiens/';
+const MENU_DATA_URL = `${baseUrl}menu-data/`;
+
+// Загруженные (или загружаемые) шарды: один запрос на файл
+const shardCache = new Map<string, Promise<MenuShard>>();
+const searchIndexCache = new Map<string, Promise<SearchIndex>>();
+
+async function fetchJson<T>(url: string, init?: RequestInit): Promise<T> {
+  const response = await fetch(url, init);
+  if (!response.ok) {
+    throw new Error(`Не удалось загрузить ${url}: ${response.status}`);
+  }
+  return response.json();
+}
+
+/**
+ * Загружает индекс меню (категории, названия, цены, изображения)
+ * @returns индекс меню без тяжелых текстовых полей
+ */
+export function loadMenuIndex(): Promise<MenuIndex> {
+  // Имя индекса не меняется, поэтому проверяем актуальность при каждом запуске
+  return fetchJson<MenuIndex>(`${MENU_DATA_URL}menu-index.json`, { cache: 'no-cache' });
+}
+
+/**
+ * Загружает описания блюд категории
+ * @param category - категория из индекса
+ * @returns map id блюда -> описание, состав, аллергены
+ */
+export async function loadCategoryDetails(
+  category: MenuIndexCategory
+): Promise<Record<string, Partial<MenuItemDetails>>> {
+  if (!category.shard) return {};
+
+  let shard = shardCache.get(category.shard);
+  if (!shard) {
+    shard = fetchJson<MenuShard>(`${MENU_DATA_URL}${category.shard}`);
+    // Неудачный запрос не кешируем, чтобы его можно было повторить
+    shard.catch(() => shardCache.delete(category.shard!));
+    shardCache.set(category.shard, shard);
+  }
+  return (await shard).items;
+}
+
+/**
+ * Загружает поисковый индекс меню
+ * @param menuIndex - индекс меню (имя файла в поле search)
+ * @returns поисковый индекс или null, если меню собрано без него
+ */
+export async function loadSearchIndex(menuIndex: MenuIndex): Promise<SearchIndex | null> {
+  const file = menuIndex.search;
+  if (!file) return null;
+
+  let index = searchIndexCache.get(file);
+  if (!index) {
+    index = fetchJson<SearchIndexData>(`${MENU_DATA_URL}${file}`).then(data => new SearchIndex(data));
+    index.catch(() => searchIndexCache.delete(file));
+    searchIndexCache.set(file, index);
+  }
+  return index;
+}
+
+/**
+ * Дополняет блюда загруженными описаниями
+ * @param items - блюда из индекса
+ * @param details - map id блюда -> описание, состав, аллергены
+ * @returns новый массив блюд (исходные объекты не меняются)
+ */
+export function mergeMenuDetails(
+  items: MenuItem[],
+  details: Record<string, Partial<MenuItemDetails>>
+): MenuItem[] {
+  return items.map(item => {
+    const itemDetails = details[String(item.id)];
+    return itemDetails ? { ...item, ...itemDetails } : item;
+  });
+}
@@ -0,0 +1,56 @@
+/**
+ * Фильтры блюд по аллергенам и ингредиентам (битовые маски из scripts/menu_tags.py)
+ */
+
+import { MenuItem, MenuTag, MenuTags } from '../components/types';
+
+export interface TagFilter {
+  withoutAllergens?: string[]; // Ключи аллергенов: 'nuts', 'fish', ...
+  withoutIngredients?: string[];
+  withIngredients?: string[]; // Блюдо должно содержать все эти ингредиенты
+}
+
+/**
+ * Маска из ключей словаря
+ * @param vocabulary - словарь из MenuTags (позиция - номер бита)
+ * @param keys - ключи тегов
+ * @returns маска; неизвестный ключ - ошибка
+ */
+export function tagMask(vocabulary: MenuTag[], keys: string[] = []): number {
+  let mask = 0;
+  for (const key of keys) {
+    const bit = vocabulary.findIndex(tag => tag.key === key);
+    if (bit < 0) {
+      throw new Error(`Неизвестный тег: ${key}`);
+    }
+    mask |= 1 << bit;
+  }
+  return mask;
+}
+
+/**
+ * Теги, биты которых установлены в маске (например, для значков в карточке блюда)
+ */
+export function tagsFromMask(vocabulary: MenuTag[], mask: number = 0): MenuTag[] {
+  return vocabulary.filter((_, bit) => (mask >>> bit) & 1);
+}
+
+/**
+ * Отбирает блюда без указанных аллергенов и ингредиентов и со всеми нужными ингредиентами
+ * @param items - блюда (масками из индекса меню)
+ * @param tags - словари из индекса меню
+ * @param filter - ключи тегов
+ * @returns блюда в исходном порядке; блюда без масок ничего не исключают
+ */
+export function filterByTags(items: MenuItem[], tags: MenuTags, filter: TagFilter): MenuItem[] {
+  const excludedAllergens = tagMask(tags.allergens, filter.withoutAllergens);
+  const excludedIngredients = tagMask(tags.ingredients, filter.withoutIngredients);
+  const required = tagMask(tags.ingredients, filter.withIngredients);
+  return items.filter(item => {
+    const allergens = item.allergen_mask || 0;
+    const ingredients = item.ingredient_mask || 0;
+    return (allergens & excludedAllergens) === 0
+      && (ingredients & excludedIngredients) === 0
+      && (ingredients & required) === required;
+  });
+}
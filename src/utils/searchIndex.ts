@@ -0,0 +1,163 @@
+/**
+ * Поиск блюд по поисковому индексу меню (тот же алгоритм, что в scripts/search_index.py)
+ */
+
+import { SearchIndexData } from '../components/types';
+
+export const SEARCH_INDEX_VERSION = 1;
+
+const NAME_WEIGHT = 4;
+const TEXT_WEIGHT = 2;
+const PARTIAL_WEIGHT = 1;
+
+const TOKEN_RE = /[\p{L}\p{N}]+/gu;
+
+type Table = 'terms' | 'prefixes' | 'trigrams';
+
+function deltaDecode(encoded: number[]): number[] {
+  const values = new Array<number>(encoded.length);
+  let value = 0;
+  for (let i = 0; i < encoded.length; i++) {
+    value += encoded[i];
+    values[i] = value;
+  }
+  return values;
+}
+
+function trigrams(token: string): Set<string> {
+  const result = new Set<string>();
+  for (let i = 0; i + 3 <= token.length; i++) {
+    result.add(token.slice(i, i + 3));
+  }
+  return result;
+}
+
+export class SearchIndex {
+  private readonly data: SearchIndexData;
+  private readonly docs: number[];
+  private readonly stopWords: Set<string>;
+  // Списки документов раскодируются при первом обращении
+  private readonly decoded = new Map<string, number[]>();
+  private readonly sets = new Map<string, Set<number>>();
+
+  constructor(data: SearchIndexData) {
+    if (data.version !== SEARCH_INDEX_VERSION) {
+      throw new Error(`Неподдерживаемая версия поискового индекса: ${data.version}`);
+    }
+    this.data = data;
+    this.docs = deltaDecode(data.docs);
+    this.stopWords = new Set(data.analyzer.stop_words);
+  }
+
+  /**
+   * Слова текста: нижний регистр, "ё" -> "е", без служебных и коротких
+   */
+  tokenize(text: string): string[] {
+    const { min_token_length } = this.data.analyzer;
+    const words = text.toLowerCase().replace(/ё/g, 'е').match(TOKEN_RE) || [];
+    return words.filter(word => word.length >= min_token_length && !this.stopWords.has(word));
+  }
+
+  /**
+   * Основа слова: русское окончание отрезается, остальные слова не меняются
+   */
+  stem(token: string): string {
+    const last = token[token.length - 1];
+    if (!(last >= 'а' && last <= 'я')) return token;
+    const { endings, min_stem_length } = this.data.analyzer;
+    for (const ending of endings) {
+      if (token.endsWith(ending) && token.length - ending.length >= min_stem_length) {
+        return token.slice(0, -ending.length);
+      }
+    }
+    return token;
+  }
+
+  private postings(table: Table, key: string): number[] {
+    const cacheKey = `${table}:${key}`;
+    let postings = this.decoded.get(cacheKey);
+    if (!postings) {
+      postings = deltaDecode(this.data[table][key] || []);
+      this.decoded.set(cacheKey, postings);
+    }
+    return postings;
+  }
+
+  private postingSet(table: Table, key: string): Set<number> {
+    const cacheKey = `${table}:${key}`;
+    let docs = this.sets.get(cacheKey);
+    if (!docs) {
+      docs = new Set(this.postings(table, key));
+      this.sets.set(cacheKey, docs);
+    }
+    return docs;
+  }
+
+  /**
+   * Документы для слова запроса: документ -> вес
+   */
+  private matchTerm(token: string): Map<number, number> {
+    const term = this.stem(token);
+    const scores = new Map<number, number>();
+    for (const value of this.postings('terms', term)) {
+      scores.set(value >> 1, value & 1 ? NAME_WEIGHT : TEXT_WEIGHT);
+    }
+
+    // Начало слова, пока гость набирает запрос
+    const [shortest, longest] = this.data.analyzer.prefix_lengths;
+    if (term.length <= longest) {
+      for (const doc of this.postings('prefixes', term)) {
+        if (!scores.has(doc)) scores.set(doc, PARTIAL_WEIGHT);
+      }
+    }
+
+    // Длинные слова в другой форме, недонабранные и с опечатками:
+    // большая часть триграмм слова при том же начале
+    if (token.length > longest) {
+      const tokenTrigrams = trigrams(token);
+      const needed = Math.ceil(tokenTrigrams.size * this.data.analyzer.fuzzy_ratio);
+      const hits = new Map<number, number>();
+      for (const trigram of tokenTrigrams) {
+        for (const doc of this.postings('trigrams', trigram)) {
+          hits.set(doc, (hits.get(doc) || 0) + 1);
+        }
+      }
+      const sameStart = this.postingSet('prefixes', token.slice(0, shortest));
+      hits.forEach((count, doc) => {
+        if (count >= needed && sameStart.has(doc) && !scores.has(doc)) {
+          scores.set(doc, PARTIAL_WEIGHT);
+        }
+      });
+    }
+    return scores;
+  }
+
+  /**
+   * Ищет блюда по запросу
+   * @param query - текст запроса, например "что-нибудь с креветками"
+   * @param limit - сколько блюд вернуть (по умолчанию все)
+   * @returns id блюд, лучшие первыми: сначала блюда со всеми словами запроса,
+   * если таких нет - с наибольшим числом найденных слов
+   */
+  search(query: string, limit?: number): number[] {
+    const tokens = Array.from(new Set(this.tokenize(query)));
+    if (tokens.length === 0) return [];
+
+    const matched = new Map<number, number>();
+    const scores = new Map<number, number>();
+    for (const token of tokens) {
+      this.matchTerm(token).forEach((score, doc) => {
+        matched.set(doc, (matched.get(doc) || 0) + 1);
+        scores.set(doc, (scores.get(doc) || 0) + score);
+      });
+    }
+
+    let ranked = Array.from(matched.keys()).sort(
+      (a, b) => matched.get(b)! - matched.get(a)! || scores.get(b)! - scores.get(a)! || a - b
+    );
+    if (ranked.length > 0 && matched.get(ranked[0]) === tokens.length) {
+      ranked = ranked.filter(doc => matched.get(doc) === tokens.length);
+    }
+    return ranked.slice(0, limit).map(doc => this.docs[doc]);
+  }
+}